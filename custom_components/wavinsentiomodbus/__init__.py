@@ -1,18 +1,82 @@
+import asyncio
 import logging
+import time
+from operator import methodcaller
 
 from homeassistant import config_entries, core
 
-from homeassistant.exceptions import ConfigEntryAuthFailed, Unauthorized
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady, Unauthorized
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    CONF_MAX_CONCURRENT_POLLS,
+    DEFAULT_MAX_CONCURRENT_POLLS,
+    DATA_POLL_LIMITER,
+    UNIQUE_ID_SERIAL_PREFIX,
+    POLL_TIER_FAST,
+    POLL_TIER_SLOW,
+    DEVICE_CONTROLLER,
+    DEVICE_ROOM,
+    DEVICE_ITC,
+    DEVICE_HCC,
+    DEVICE_BOILERTANK,
+    SENTIO_THERMISTORS,
+    THERMISTOR_RECHECK_INTERVAL,
+    SETPOINT_WRITE_DEBOUNCE,
+    STORAGE_VERSION,
+    STORAGE_KEY,
+    RECONNECT_BACKOFF_MIN,
+    DATA_FLOW_HANDOFF,
+    FLOW_HANDOFF_TIMEOUT,
+    IO_PRIORITY_WRITE,
+    IO_PRIORITY_POLL,
+    IO_PRIORITY_BACKGROUND,
+)
+from .connection import SentioConnectionManager
+from .coordinator import WavinSentioDataCoordinator
+from .metrics import SentioPollMetrics
+from .pollinterval import SentioPollInterval
+from .readplanner import ReadBlock, RegisterRange, SentioReadPlanner
+from .snapshot import SentioSnapshot, boilerTankState, circuitState, controllerState, roomState
+from .registers import devicePollReads, discoveryReads, nameRead, roomReads, thermistorField, thermistorReads
+from .transport import SentioAsyncTransport, SentioRegisterCache, toModbusType
+from .worker import SentioIoWorker
 
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_TYPE, CONF_SLAVE, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall
 
 from WavinSentioModbus.SentioApi import SentioModbus, NoConnectionPossible, ModbusType
 
+from pymodbus.exceptions import ModbusException
+
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = vol.Schema(
+    {
+        vol.Optional(DOMAIN): vol.Schema(
+            {
+                vol.Optional(CONF_MAX_CONCURRENT_POLLS, default=DEFAULT_MAX_CONCURRENT_POLLS): vol.All(
+                    cv.positive_int, vol.Range(min=1)
+                ),
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: config_entries.ConfigEntry
@@ -22,7 +86,14 @@ async def async_setup_entry(
     #hass_data = dict(entry.data)
     _LOGGER.debug("__INIT__ Setting up with data --> {0}".format(entry.data))
     
-    hass.data[DOMAIN] = SentioApiHandler(entry.data[CONF_TYPE], entry.data[CONF_HOST], entry.data[CONF_PORT], entry.data[CONF_SLAVE], logging.DEBUG, hass)
+    store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry.entry_id))
+    # Right after the config flow its connected and discovered handler is reused
+    sentioApi = async_claim_flow_handoff(hass, entry.data)
+    fromCache = False
+    if sentioApi is None:
+        sentioApi = SentioApiHandler(entry.data[CONF_TYPE], entry.data[CONF_HOST], entry.data[CONF_PORT], entry.data[CONF_SLAVE], logging.DEBUG, hass)
+        cached = await store.async_load()
+        fromCache = cached is not None and sentioApi.loadTopology(cached)
     #try:      
     #    api = await hass.async_add_executor_job(
     #        SentioModbus, entry.data[CONF_TYPE], entry.data[CONF_HOST], entry.data[CONF_PORT], entry.data[CONF_SLAVE], entry.data[CONF_PORT], logging.DEBUG
@@ -36,56 +107,698 @@ async def async_setup_entry(
     #except NoConnectionPossible as err:
     #    raise ConfigEntryAuthFailed(err) from err
 
+    if not fromCache:
+        # An unreachable controller is retried by Home Assistant with backoff
+        try:
+            status = await sentioApi.connect()
+            if status != True:
+                raise ConfigEntryNotReady("Failed to connect")
+            status = await sentioApi.initialize()
+            if status != True:
+                raise ConfigEntryNotReady("Failed to initialize")
+        except (NoConnectionPossible, ModbusException) as err:
+            await sentioApi.disconnect()
+            raise ConfigEntryNotReady(err) from err
+        except ConfigEntryNotReady:
+            # Release the transport, a serial bus is shared with the other entries
+            await sentioApi.disconnect()
+            raise
+
+    # One coordinator per controller; every platform listens to it so a
+    # single updateData sweep feeds climate and sensor entities alike.
+    sentioApi.slowScanInterval = entry.options.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL)
+    sentioApi.coordinator = WavinSentioDataCoordinator(
+        hass,
+        sentioApi,
+        limiter=hass.data.get(DATA_POLL_LIMITER),
+        pollInterval=SentioPollInterval(
+            entry.options.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL),
+            entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+            entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+        ),
+    )
+    if not fromCache:
+        try:
+            await sentioApi.coordinator.async_config_entry_first_refresh()
+        except ConfigEntryNotReady:
+            await sentioApi.disconnect()
+            raise
+        sentioApi.detectPresent()
+        await store.async_save(sentioApi.getTopology())
+    await _async_migrate_unique_ids(hass, entry, sentioApi)
+
+    hass.data[DOMAIN][entry.entry_id] = sentioApi
+
     hass.async_create_task(
-        hass.config_entries.async_forward_entry_setups(entry, ["climate"])
+        hass.config_entries.async_forward_entry_setups(entry, ["climate", "sensor"])
     )
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    async def _async_recheck(now) -> None:
+        await _async_recheck_thermistors(hass, entry, sentioApi, store)
+
+    entry.async_on_unload(async_track_time_interval(
+        hass, _async_recheck, THERMISTOR_RECHECK_INTERVAL, name="wavinsentiomodbus thermistor recheck"
+    ))
+    if fromCache:
+        # Entities are created from the cached topology, the controller is checked in the background
+        entry.async_create_background_task(
+            hass, _async_reconcile_topology(hass, entry, sentioApi, store, cached), "wavinsentiomodbus rediscovery"
+        )
 
     return True
 
 
+async def async_reload_entry(
+    hass: HomeAssistant, entry: config_entries.ConfigEntry
+) -> None:
+    """Reload the entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_unload_entry(
+    hass: HomeAssistant, entry: config_entries.ConfigEntry
+) -> bool:
+    """Unload a config entry and release the Modbus connection."""
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, ["climate", "sensor"])
+    if unload_ok:
+        sentioApi = hass.data[DOMAIN].pop(entry.entry_id)
+        await sentioApi.disconnect()
+    return unload_ok
+
+
+def _handoffKey(data):
+    return (toModbusType(data[CONF_TYPE]).value, data[CONF_HOST], data[CONF_PORT], data[CONF_SLAVE])
+
+
+@core.callback
+def async_store_flow_handoff(hass: HomeAssistant, data, sentioApi) -> None:
+    """Keep the handler the config flow connected and discovered with for async_setup_entry.
+
+    Unclaimed handlers are disconnected after FLOW_HANDOFF_TIMEOUT seconds.
+    """
+    handoffs = hass.data.setdefault(DATA_FLOW_HANDOFF, {})
+    key = _handoffKey(data)
+
+    @core.callback
+    def _expire() -> None:
+        if key in handoffs and handoffs[key][0] is sentioApi:
+            handoffs.pop(key)
+            hass.async_create_task(sentioApi.disconnect())
+
+    previous = handoffs.pop(key, None)
+    if previous is not None:
+        previous[1].cancel()
+        hass.async_create_task(previous[0].disconnect())
+    handoffs[key] = (sentioApi, hass.loop.call_later(FLOW_HANDOFF_TIMEOUT, _expire))
+
+
+@core.callback
+def async_claim_flow_handoff(hass: HomeAssistant, data):
+    """Return the handler left by the config flow for this connection, if any."""
+    handoff = hass.data.get(DATA_FLOW_HANDOFF, {}).pop(_handoffKey(data), None)
+    if handoff is None:
+        return None
+    handoff[1].cancel()
+    return handoff[0]
+
+
+async def async_remove_entry(
+    hass: HomeAssistant, entry: config_entries.ConfigEntry
+) -> None:
+    """Drop the cached topology of a removed entry."""
+    await Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry.entry_id)).async_remove()
+
+
+async def _async_reconcile_topology(hass: HomeAssistant, entry: config_entries.ConfigEntry, sentioApi, store, cached) -> None:
+    """Rediscover after a start from the cached topology and reload when the controller changed."""
+    await sentioApi.connect()
+    # Every rediscovery counts a miss of the devices it does not find, run it once per start
+    while True:
+        try:
+            await sentioApi.rediscover()
+            break
+        except ModbusException as err:
+            _LOGGER.debug("Sentio rediscovery postponed: {0}".format(err))
+        await asyncio.sleep(max(sentioApi.reconnectDelay, RECONNECT_BACKOFF_MIN))
+    while True:
+        await sentioApi.coordinator.async_refresh()
+        # A refresh skipped while unloading leaves the rediscovered devices undecoded
+        if sentioApi.coordinator.last_update_success and not sentioApi.fullPollPending:
+            break
+        await asyncio.sleep(max(sentioApi.reconnectDelay, RECONNECT_BACKOFF_MIN))
+    await _async_save_topology(hass, entry, sentioApi, store, cached)
+
+
+async def _async_save_topology(hass: HomeAssistant, entry: config_entries.ConfigEntry, sentioApi, store, cached) -> None:
+    """Detect the present values after the full poll of a rediscovery, save them and reload when they changed."""
+    sentioApi.detectPresent()
+    topology = sentioApi.getTopology()
+    if topology != cached:
+        await store.async_save(topology)
+    # Devices or values missing once only change what is saved, not the entities
+    if cached is not None and any(topology[key] != cached.get(key) for key in ("registers", "present")):
+        _LOGGER.info("Sentio topology changed since it was saved, reloading {0}".format(entry.title))
+        hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+
+
+async def _async_recheck_thermistors(hass: HomeAssistant, entry: config_entries.ConfigEntry, sentioApi, store) -> None:
+    """Look for thermistors fitted since discovery and reload to add their sensors."""
+    try:
+        found = await sentioApi.recheckThermistors()
+    except ModbusException as err:
+        _LOGGER.debug("Sentio thermistor recheck postponed: {0}".format(err))
+        return
+    if found:
+        await store.async_save(sentioApi.getTopology())
+        _LOGGER.info("Sentio thermistors {0} found, reloading {1}".format(found, entry.title))
+        hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+
+
+async def _async_migrate_unique_ids(hass: HomeAssistant, entry: config_entries.ConfigEntry, sentioApi) -> None:
+    """Prefix unique ids from before multi controller support with the controller serial."""
+    prefix = sentioApi.uniqueId("")
+
+    @core.callback
+    def _migrate(entity_entry: er.RegistryEntry):
+        # Also ids of another serial, after a controller swap or a misread serial
+        if UNIQUE_ID_SERIAL_PREFIX.match(entity_entry.unique_id):
+            return None
+        return {"new_unique_id": prefix + entity_entry.unique_id}
+
+    await er.async_migrate_entries(hass, entry.entry_id, _migrate)
+
+
 class SentioApiHandler:
 
     def __init__(self, type, host, port, slave, loglevel, hass: HomeAssistant):
         self._data = {}
-        self._connected = False
         self._initialized = False
         self._value = 0
         self._hass = hass
+        self.coordinator = None
+        self._rooms = {}
+        self._itcs = {}
+        self._hccs = {}
+        self._boilerTanks = {}
+        # The library objects only decode; all bus I/O goes through the asyncio transport
         self._api = SentioModbus(type, host, port, slave, port, loglevel)
+        self._transport = SentioAsyncTransport(type, host, port, slave)
+        self._connection = SentioConnectionManager(self._transport, self._connectionStateChanged)
+        self._registers = SentioRegisterCache(self._transport.client, self._transport.slave)
+        # Every operation that touches the bus or the register cache runs on this worker
+        self._worker = SentioIoWorker("Sentio {0}/{1}".format(host, slave))
+        self._api.modbusWrapper = self._registers
+        self._planner = SentioReadPlanner()
+        self.metrics = SentioPollMetrics()
+        self.slowScanInterval = DEFAULT_SLOW_SCAN_INTERVAL
+        self._lastSlowPoll = None
+        # Read every register on the next poll, also those no entity listens to
+        self._fullPoll = False
+        self._pendingSetpoints = {}
+        self._setpointBatch = None
+        self._lastSetpointWrite = None
+        self._closing = False
+        # (deviceKey, field) of optional values the controller reported, decides which entities exist
+        self._present = set()
+        # Devices and present values missing at the last check; missing twice in a row removes them
+        self._missingDevices = set()
+        self._missingValues = set()
         _LOGGER.debug("Sentio API class {0}".format(self._value))
 
     async def connect(self):
-        if self._connected:
-            _LOGGER.info("Sentio connection already established")
-            return self._connected
-        else:
-            status = await self._hass.async_add_executor_job(self._api.connect)
-            if status == 0:
-                self._connected = True
+        # The manager keeps reconnecting in the background, also when this attempt fails
+        self._connection.start(self._hass)
+        start = time.monotonic()
+        try:
+            await self._connection.ensureConnected()
+        except ModbusException as err:
+            _LOGGER.debug("Sentio connection failed: {0}".format(err))
+            return False
+        self.metrics.recordPhase("connect", time.monotonic() - start)
+        return True
+
+    async def disconnect(self):
+        # A reconnect of the last setpoint batch does not refresh an entry that is unloading
+        self._closing = True
+        if self._setpointBatch is not None:
+            # Do not drop setpoints the user already confirmed
+            try:
+                await asyncio.shield(self._setpointBatch)
+            except ModbusException as err:
+                _LOGGER.warning("Pending setpoints could not be written: {0}".format(err))
+        self._connection.stop()
+        self._worker.close()
+        self._transport.close()
+
+    @property
+    def connectionState(self):
+        return self._connection.state
+
+    @property
+    def reconnectDelay(self):
+        return self._connection.retryIn
+
+    @property
+    def connection(self):
+        return self._connection
+
+    @property
+    def queuedJobs(self):
+        """Bus operations waiting for the worker, the running one not included."""
+        return self._worker.pending
+
+    def _connectionStateChanged(self, state):
+        if self.coordinator is not None and not self._closing:
+            self.coordinator.async_set_connection_state(state)
+
+    def _ranges(self, reads):
+        return [
+            RegisterRange(register.regType, self._registers.resolve(register, subIndex), register.count)
+            for register, subIndex in reads
+        ]
+
+    async def _prefetch(self, reads):
+        """Read (register, subIndex) pairs into the register cache using merged block reads.
+
+        Returns the (ReadBlock, words, seconds) of every request made. Between
+        two blocks queued jobs of a higher priority, like writes, may run.
+        """
+        log = []
+        for block in self._planner.plan(self._ranges(reads)):
+            await self._worker.checkpoint()
+            start = time.monotonic()
+            words = await self._readRegisters(block.regType, block.address, block.count)
+            log.append((block, words, time.monotonic() - start))
+            if words is not None:
+                self._registers.store(block.regType, block.address, words)
+            elif len(block.parts) == 1:
+                self._registers.invalidate(block.regType, block.address, block.count)
             else:
-                _LOGGER.debug("Sentio connection failed")
-        return self._connected
+                # One of the merged ranges is not readable, fall back to the individual reads
+                self._planner.markBroken(block)
+                for part in block.parts:
+                    self.metrics.countRetry()
+                    start = time.monotonic()
+                    words = await self._readRegisters(part.regType, part.address, part.count)
+                    log.append((ReadBlock(part.regType, part.address, part.count, (part,)), words, time.monotonic() - start))
+                    if words is None:
+                        self._registers.invalidate(part.regType, part.address, part.count)
+                    else:
+                        self._registers.store(part.regType, part.address, words)
+        return log
+
+    async def _readRegisters(self, regType, address, count):
+        self.metrics.countRequest(count)
+        return await self._transport.readRegisters(regType, address, count)
+
+    async def _flushWrites(self):
+        """Send the writes queued in the register cache.
+
+        Writes that do not reach the controller are taken back out of the
+        cache and the slow tier is read on the next poll; raises when the
+        controller is unreachable.
+        """
+        writes = self._registers.popWrites()
+        if not writes:
+            return
+        start = time.monotonic()
+        try:
+            await self._connection.ensureConnected()
+        except ModbusException as err:
+            self._dropWrites(writes, err)
+            raise
+        failed = []
+        for write in writes:
+            self.metrics.countRequest(1)
+            if not await self._transport.writeRegister(write[0], write[1]):
+                failed.append(write)
+        self.metrics.recordWrite(time.monotonic() - start)
+        if failed:
+            self._dropWrites(failed, "not accepted by the controller")
+        if self.coordinator is not None:
+            # The controller reacts to a write over the next minutes, follow it closely
+            self.coordinator.async_note_activity()
+
+    def _dropWrites(self, writes, reason):
+        _LOGGER.warning("Sentio writes {0} lost: {1}".format([(address, value) for address, value, _ in writes], reason))
+        for _ in writes:
+            self.metrics.countError()
+        self._registers.revert(writes)
+        self.requestSlowPoll()
 
     async def initialize(self):
+        return await self._worker.submit(self._initialize, IO_PRIORITY_BACKGROUND)
+
+    async def _initialize(self):
         if self._initialized:
             _LOGGER.info("Sentio data already initialized")
             return self._initialized
         else:
-            status = await self._hass.async_add_executor_job(self._api.initialize)
+            start = time.monotonic()
+            await self._prefetch(discoveryReads())
+            status = self._api.initialize()
             if status == 0:
                 self._initialized = True
+                self.rebuildIndexes()
+            self.metrics.recordPhase("initialize", time.monotonic() - start)
         return self._initialized
 
-    async def update(self):
+    def loadTopology(self, topology):
+        """Initialize from a persisted topology without touching the bus; False when unusable."""
+        try:
+            self._registers.restore(topology["registers"])
+            present = {((kind, index), field) for kind, index, field in topology["present"]}
+            missingDevices = {(kind, index) for kind, index in topology.get("missing_devices", [])}
+            missingValues = {((kind, index), field) for kind, index, field in topology.get("missing_values", [])}
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring cached Sentio topology: {0}".format(err))
+            return False
+        if self._api.initialize() != 0:
+            return False
+        self._initialized = True
+        self._present = present
+        self._missingDevices = missingDevices
+        self._missingValues = missingValues
+        self.rebuildIndexes()
+        return True
+
+    def getTopology(self):
+        """Discovery registers and present optional values, as persisted between restarts."""
+        return {
+            "registers": self._registers.snapshot(self._ranges(discoveryReads())),
+            "present": sorted([kind, index, field] for (kind, index), field in self._present),
+            "missing_devices": sorted([kind, index] for kind, index in self._missingDevices),
+            "missing_values": sorted([kind, index, field] for (kind, index), field in self._missingValues),
+        }
+
+    def detectPresent(self):
+        """Remember which values the last poll returned; call after a successful poll.
+
+        A present value is only dropped when it is also missing at the next
+        detection, a single failed read does not remove its entity.
+        """
+        snapshot = self.takeSnapshot()
+        found = {key for key, value in snapshot.items() if value is not None}
+        missing = {key for key in self._present - found if key[0] in snapshot.devices}
+        self._present = found | (missing - self._missingValues)
+        self._missingValues = missing - self._missingValues
+
+    def isPresent(self, deviceKey, field):
+        return (deviceKey, field) in self._present
+
+    def rebuildIndexes(self):
+        """Index the detected topology by device index; call after every (re)discovery."""
+        self._rooms = {room.index: room for room in self._api.availableRooms}
+        self._itcs = {itc.index: itc for itc in self._api.availableItcs}
+        self._hccs = {hcc.index: hcc for hcc in self._api.availableHccs}
+        self._boilerTanks = {tank.index: tank for tank in self._api.boilerTanks}
+        _LOGGER.debug("Indexed {0} rooms, {1} ITCs, {2} HCCs, {3} boiler tanks".format(
+            len(self._rooms), len(self._itcs), len(self._hccs), len(self._boilerTanks)))
+
+    async def update(self, wanted=None):
+        """Poll the controller; wanted limits the reads, see devicePollReads."""
+        await self._worker.submit(lambda: self._update(wanted), IO_PRIORITY_POLL)
+
+    async def _update(self, wanted):
         _LOGGER.debug("Calling Update")
-        if self._connected == False or self._initialized == False:
+        if self._initialized == False:
             _LOGGER.debug("Connect and initialize first!")
         else:
-            await self._hass.async_add_executor_job(self._api.updateData)
+            now = time.monotonic()
+            self.metrics.startPoll()
+            try:
+                # Fails fast while the controller is unreachable and the backoff runs
+                await self._connection.ensureConnected()
+            except ModbusException:
+                self.metrics.countError()
+                raise
+            tiers = [POLL_TIER_FAST]
+            if self._lastSlowPoll is None or now - self._lastSlowPoll >= self.slowScanInterval:
+                tiers.append(POLL_TIER_SLOW)
+            if self._fullPoll:
+                # Presence is detected from this poll, values without a listener count too
+                wanted = None
+            devices = self._pollReads(tiers, wanted)
+            try:
+                log = await self._prefetch([read for _, reads in devices for read in reads])
+            except ModbusException as err:
+                self.metrics.countError()
+                self._connection.markFailed(err)
+                raise
+            if POLL_TIER_SLOW in tiers:
+                self._lastSlowPoll = now
+            self._fullPoll = False
+            # Writes that ran between two blocks of this poll are not part of it
+            interrupted = self._worker.interrupted
+            read = time.monotonic()
+            self._api.updateData()
+            done = time.monotonic()
+            self.metrics.recordPhase("read", read - now - interrupted)
+            self.metrics.recordPhase("decode", done - read)
+            self.metrics.recordBlocks(log, {
+                registerRange: deviceKey
+                for deviceKey, reads in devices
+                for registerRange in self._ranges(reads)
+            })
+            self.metrics.endPoll(done - now - interrupted)
+
+    def _pollReads(self, tiers, wanted):
+        """devicePollReads of the topology, plus skipped registers that were never read.
+
+        The library decodes every register, one it never saw may not decode;
+        skipped registers that were read before keep their last value.
+        """
+        topology = (self._rooms.values(), self._itcs.values(), self._hccs.values(), self._boilerTanks.values())
+        devices = devicePollReads(*topology, tiers)
+        if wanted is None:
+            return devices
+        selected = dict(devicePollReads(*topology, tiers, wanted))
+        # Missing thermistors are left to recheckThermistors, also when a read of them fails
+        missing = thermistorReads(self.missingThermistors())
+        return [
+            (deviceKey, [
+                read for read in reads
+                if (read in selected[deviceKey] or not self._isCached(read)) and read not in missing
+            ])
+            for deviceKey, reads in devices
+        ]
+
+    def _isCached(self, read):
+        register, subIndex = read
+        return self._registers.contains(register.regType, self._registers.resolve(register, subIndex), register.count)
+
+    @property
+    def fullPollPending(self):
+        """Whether the poll reading every register after a rediscovery has yet to run."""
+        return self._fullPoll
+
+    def missingThermistors(self):
+        """Thermistors that did not report a temperature at discovery."""
+        controller = (DEVICE_CONTROLLER, 0)
+        return [index for index in SENTIO_THERMISTORS if (controller, thermistorField(index)) not in self._present]
+
+    async def recheckThermistors(self):
+        """Read the missing thermistors once; returns the ones that are fitted now."""
+        return await self._worker.submit(self._recheckThermistors, IO_PRIORITY_BACKGROUND)
+
+    async def _recheckThermistors(self):
+        missing = self.missingThermistors()
+        if not missing:
+            return []
+        await self._connection.ensureConnected()
+        try:
+            await self._prefetch(thermistorReads(missing))
+        except ModbusException as err:
+            self._connection.markFailed(err)
+            raise
+        self._api.sentioData.updateData()
+        found = [index for index in missing if self.getTemperatureSensors(index) is not None]
+        controller = (DEVICE_CONTROLLER, 0)
+        self._present.update((controller, thermistorField(index)) for index in found)
+        return found
+
+    def requestSlowPoll(self):
+        """Read the slow tier (setpoints and modes) on the next update."""
+        self._lastSlowPoll = None
+
+    async def rediscover(self):
+        """Re-read identity and topology; returns True when the set of devices changed."""
+        return await self._worker.submit(self._rediscover, IO_PRIORITY_BACKGROUND)
+
+    async def _rediscover(self):
+        before = self._deviceKeys()
+        names = {deviceKey: self._registers.words(*self._ranges([nameRead(deviceKey)])[0]) for deviceKey in before}
+        await self._connection.ensureConnected()
+        try:
+            await self._prefetch(discoveryReads())
+        except ModbusException as err:
+            self._connection.markFailed(err)
+            raise
+        if self._api.initialize() != 0:
+            _LOGGER.error("Sentio rediscovery failed")
+            return False
+        self.rebuildIndexes()
+        missing = before - self._deviceKeys()
+        kept, lost = await self._keepMissingDevices(missing, names)
+        if kept:
+            if self._api.initialize() != 0:
+                _LOGGER.error("Sentio rediscovery failed")
+                return False
+            self.rebuildIndexes()
+        self.requestSlowPoll()
+        self._fullPoll = True
+        if lost is not None:
+            self._connection.markFailed(lost)
+            raise lost
+        return before != self._deviceKeys()
+
+    def _deviceKeys(self):
+        return (
+            {(DEVICE_ROOM, index) for index in self._rooms}
+            | {(DEVICE_ITC, index) for index in self._itcs}
+            | {(DEVICE_HCC, index) for index in self._hccs}
+            | {(DEVICE_BOILERTANK, index) for index in self._boilerTanks}
+        )
+
+    async def _keepMissingDevices(self, missing, names):
+        """Put back the cached name of devices not confirmed gone.
+
+        A device is gone when the controller answers that its name register
+        does not exist on two rediscoveries in a row. A failed read or a
+        first refusal keeps the device. When the connection is lost the
+        remaining devices are kept unchecked and no new miss is counted, the
+        rediscovery is retried as a whole. Returns whether any device was
+        put back and the error that interrupted the check, if any.
+        """
+        strikes = set()
+        gone = set()
+        kept = False
+        lost = None
+        for deviceKey in sorted(missing):
+            register = self._ranges([nameRead(deviceKey)])[0]
+            exists = None
+            if lost is None:
+                self.metrics.countRequest(register.count)
+                try:
+                    exists = await self._transport.registersExist(register.regType, register.address, register.count)
+                except ModbusException as err:
+                    lost = err
+            if exists is False and deviceKey in self._missingDevices:
+                _LOGGER.info("Sentio {0} {1} is gone".format(*deviceKey))
+                gone.add(deviceKey)
+                continue
+            if exists is False or (exists is None and deviceKey in self._missingDevices):
+                strikes.add(deviceKey)
+            _LOGGER.debug("Sentio {0} {1} not detected, keeping it until confirmed".format(*deviceKey))
+            self._registers.store(register.regType, register.address, names[deviceKey])
+            kept = True
+        if lost is None:
+            self._missingDevices = strikes
+        else:
+            self._missingDevices = (self._missingDevices & missing) - gone
+        return kept, lost
     
     async def setRoomTemperature(self, roomIndex, temperature):
-        room = self.getRoom(self, roomIndex)
-        await self._hass.async_add_executor_job(room.setRoomSetpoint, temperature)
+        """Buffer a setpoint and wait until it is written.
+
+        A lone setpoint is written right away. Setpoints that follow a write
+        within the debounce window are buffered until the window ends and
+        written as one batch, with only the last value per room.
+        """
+        if self.getRoom(roomIndex) is None:
+            _LOGGER.debug("Failed to get room with index {0}".format(roomIndex))
+            return
+        self._pendingSetpoints[roomIndex] = temperature
+        if self._setpointBatch is None:
+            self._setpointBatch = self._hass.async_create_task(self._flushSetpoints())
+            self._setpointBatch.add_done_callback(self._setpointBatchDone)
+        # Every caller of the window waits for the shared batch, a cancelled caller does not cancel it
+        await asyncio.shield(self._setpointBatch)
+
+    def _setpointBatchDone(self, batch):
+        # Retrieved here as well, all callers may have been cancelled
+        if not batch.cancelled() and batch.exception() is not None:
+            _LOGGER.warning("Sentio setpoints could not be written: {0}".format(batch.exception()))
+
+    async def _flushSetpoints(self):
+        if self._lastSetpointWrite is not None:
+            # At most one batch per window, the setpoints of the rest of the window join it
+            wait = self._lastSetpointWrite + SETPOINT_WRITE_DEBOUNCE - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        pending = self._pendingSetpoints
+        self._pendingSetpoints = {}
+        self._setpointBatch = None
+        self._lastSetpointWrite = time.monotonic()
+        _LOGGER.debug("Writing coalesced setpoints {0}".format(pending))
+        await self._worker.submit(lambda: self._writeRooms({
+            roomIndex: methodcaller("setRoomSetpoint", temperature) for roomIndex, temperature in pending.items()
+        }), IO_PRIORITY_WRITE)
+
+    async def setRoomMode(self, roomIndex, roomMode):
+        if self.getRoom(roomIndex) is None:
+            _LOGGER.debug("Failed to get room with index {0}".format(roomIndex))
+            return
+        await self._worker.submit(
+            lambda: self._writeRooms({roomIndex: methodcaller("setRoomMode", roomMode)}), IO_PRIORITY_WRITE
+        )
+
+    async def setRoomPreset(self, roomIndex, roomPreset):
+        if self.getRoom(roomIndex) is None:
+            _LOGGER.debug("Failed to get room with index {0}".format(roomIndex))
+            return
+        await self._worker.submit(
+            lambda: self._writeRooms({roomIndex: methodcaller("setRoomPreset", roomPreset)}), IO_PRIORITY_WRITE
+        )
+
+    async def _writeRooms(self, writes):
+        """Apply {roomIndex: write(room)} to the library rooms, send the writes and read the rooms back."""
+        for roomIndex, write in writes.items():
+            room = self.getRoom(roomIndex)
+            if room is not None:
+                write(room)
+        self.metrics.startWrite()
+        try:
+            await self._flushWrites()
+            await self._readbackRooms(writes)
+        except ModbusException:
+            # The rooms decode the cached values again, the setters changed them already
+            for room in map(self.getRoom, writes):
+                if room is not None:
+                    room.updateData()
+            raise
+        finally:
+            self.metrics.endWrite()
+
+    async def _readbackRooms(self, roomIndexes):
+        """Confirm a write by reading back only the registers of the written rooms."""
+        rooms = [room for room in map(self.getRoom, roomIndexes) if room is not None]
+        try:
+            await self._prefetch(roomReads([room.index for room in rooms]))
+        except ModbusException as err:
+            _LOGGER.warning("Readback of rooms {0} failed, confirming on next poll: {1}".format(
+                [room.index for room in rooms], err))
+            self._connection.markFailed(err)
+            self.requestSlowPoll()
+            return
+        for room in rooms:
+            room.updateData()
+        if self.coordinator is not None:
+            self.coordinator.async_set_partial_data({(DEVICE_ROOM, room.index): roomState(room) for room in rooms})
+
+    def uniqueId(self, localId):
+        """Entity unique id, namespaced by controller so several controllers can coexist."""
+        return "{0}_{1}".format(self.sentioData.serial_number, localId)
+
+    def takeSnapshot(self):
+        """Immutable copy of the last poll, published as the coordinator data."""
+        records = {(DEVICE_CONTROLLER, 0): controllerState(self.sentioData, self._api.temperatureSensors())}
+        records.update(((DEVICE_ROOM, index), roomState(room)) for index, room in self._rooms.items())
+        records.update(((DEVICE_ITC, index), circuitState(itc)) for index, itc in self._itcs.items())
+        records.update(((DEVICE_HCC, index), circuitState(hcc)) for index, hcc in self._hccs.items())
+        records.update(((DEVICE_BOILERTANK, index), boilerTankState(tank)) for index, tank in self._boilerTanks.items())
+        return SentioSnapshot.build(records)
 
     @property
     def sentioData(self):
@@ -114,31 +827,53 @@ class SentioApiHandler:
         return self._api.sentioData.temperature_sensors(index)
 
     def getRoom(self, index):
-        for room in self._api.availableRooms:
-            if room.index == index:
-                return room
-        return None
+        return self._rooms.get(index)
     
     def getItcCircuit(self, index):
-        for itc in self._api.availableItcs:
-            if itc.index == index:
-                return itc
-        return None
+        return self._itcs.get(index)
     
     def getHccCircuit(self, index):
-        for hcc in self._api.availableHccs:
-            if hcc.index == index:
-                return hcc
-        return None
+        return self._hccs.get(index)
 
     def getBoilerTankByIndex(self, index):
-        for tank in self._api.boilerTanks:
-            if tank.index == index:
-                return tank
-        return None
+        return self._boilerTanks.get(index)
     
 async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
     """Set up the Wavin Sentio component."""
-    # @TODO: Add setup code.
     _LOGGER.debug("__INIT__ : Calling async setup for INIT file ")
+
+    conf = config.get(DOMAIN, {})
+    hass.data[DATA_POLL_LIMITER] = asyncio.Semaphore(
+        conf.get(CONF_MAX_CONCURRENT_POLLS, DEFAULT_MAX_CONCURRENT_POLLS)
+    )
+
+    async def async_rediscover_entry(entry, sentioApi) -> None:
+        store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry.entry_id))
+        try:
+            changed = await sentioApi.rediscover()
+        except ModbusException as err:
+            # One unreachable controller does not fail the rediscovery of the others
+            _LOGGER.warning("Sentio rediscovery of {0} failed: {1}".format(entry.title, err))
+            return
+        if changed:
+            _LOGGER.info("Sentio topology changed, reloading {0}".format(entry.title))
+            # The cached topology is outdated, let the reload discover from the controller
+            await store.async_remove()
+            hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+            return
+        # Misses counted here have to survive a restart, like those of the rediscovery at startup
+        await sentioApi.coordinator.async_refresh()
+        if sentioApi.coordinator.last_update_success and not sentioApi.fullPollPending:
+            await _async_save_topology(hass, entry, sentioApi, store, await store.async_load())
+
+    async def async_rediscover(call: ServiceCall) -> None:
+        """Re-read identity and topology of every controller on demand."""
+        handlers = hass.data.get(DOMAIN, {})
+        await asyncio.gather(*(
+            async_rediscover_entry(entry, handlers[entry.entry_id])
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry.entry_id in handlers
+        ))
+
+    hass.services.async_register(DOMAIN, "rediscover", async_rediscover)
     return True
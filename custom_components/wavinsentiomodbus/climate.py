@@ -50,6 +50,7 @@ from .const import(
     _LOGGER, 
     DEFAULT_MAX_TEMPERATURE,
     DEFAULT_MIN_TEMPERATURE,
+    DEVICE_ROOM,
 )
 
 
@@ -75,29 +76,20 @@ HVAC_MODE_SENTIO_TO_HASS: Final[dict[SentioHeatingStates, HVACMode]] = {
 }
 
 
+# Room values the climate entity shows, only these are polled for a room without sensors
+CLIMATE_FIELDS = ("setpoint", "temperature", "humidity", "heating_state", "mode")
+
 PRESET_MODES = {
     "Eco": {"profile": SentioRoomPreset.RP_ECO},
     "Comfort": {"profile": SentioRoomPreset.RP_COMFORT},
     "Extracomfort": {"profile": SentioRoomPreset.RP_EXTRA_COMFORT},
 }
 
-UPDATE_DELAY = timedelta(seconds=30)
-
 async def async_setup_entry(hass, entry, async_add_entities):
     rooms=None
 
-    sentioApi = hass.data[SENTIO_CLIMATE_DOMAIN]
-    try:      
-        status = await sentioApi.connect()
-        if status != True: 
-            raise ConfigEntryAuthFailed("Failed to connect")
-        status = await sentioApi.initialize()
-        if status != True:
-            raise ConfigEntryAuthFailed("Failed to initialize")
-        await sentioApi.update()
-
-    except NoConnectionPossible as err:
-        raise ConfigEntryAuthFailed(err) from err
+    # Connect, initialize and the first refresh are done once in __init__
+    sentioApi = hass.data[SENTIO_CLIMATE_DOMAIN][entry.entry_id]
 
     rooms = sentioApi.getAvailableRooms()
     #_LOGGER.debug("Found rooms: {0}".format(rooms))
@@ -105,9 +97,6 @@ async def async_setup_entry(hass, entry, async_add_entities):
         hass, sentioApi, rooms
     )
 
-    dataservice.async_setup()
-    await dataservice.coordinator.async_refresh()
-
     entities = []
     for room in rooms:
         ws = WavinSentioEntity(hass, room, dataservice)
@@ -115,12 +104,6 @@ async def async_setup_entry(hass, entry, async_add_entities):
         
     async_add_entities(entities)
 
-    sensors = True
-    if sensors:
-        hass.async_create_task(
-            hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
-        )
-
 
 
 class WavinSentioClimateDataService:
@@ -133,30 +116,7 @@ class WavinSentioClimateDataService:
         self.roomdata = roomdata
 
         self.hass = hass
-        self.coordinator = None
-
-    @callback
-    def async_setup(self):
-        """Coordinator creation."""
-        self.coordinator = DataUpdateCoordinator(
-            self.hass,
-            _LOGGER,
-            name="WavinSentioDataService",
-            update_method=self.async_update_data,
-            update_interval=self.update_interval,
-        )
-       
-
-    @property
-    def update_interval(self):
-        return UPDATE_DELAY
-
-    async def async_update_data(self):
-        _LOGGER.debug("Auto update self called")
-        try:
-            await self._api.update()
-        except KeyError as ex:
-            raise UpdateFailed("Missing overview data, skipping update") from ex
+        self.coordinator = api.coordinator
 
     def get_room(self, roomIndex):
         return self._api.getRoom(roomIndex)
@@ -166,26 +126,32 @@ class WavinSentioClimateDataService:
     
     def get_serialNumber(self):
         return self._api.sentioData.serial_number
+
+    def get_uniqueId(self, localId):
+        return self._api.uniqueId(localId)
     
     async def set_new_temperature(self, roomIndex, temperature):
         _LOGGER.debug("Setting temperature: {0} -> {1}".format(roomIndex,temperature))
-        room = self._api.getRoom(roomIndex)
-        await self.hass.async_add_executor_job(room.setRoomSetpoint, temperature)
+        await self._api.setRoomTemperature(roomIndex, temperature)
+
+    async def set_new_mode(self, roomIndex, roomMode):
+        _LOGGER.debug("Setting mode: {0} -> {1}".format(roomIndex, roomMode))
+        await self._api.setRoomMode(roomIndex, roomMode)
 
     async def set_new_profile(self, roomIndex, profile):
         _LOGGER.debug("Setting profile: {0} -> {1}".format(roomIndex, profile))
-        await self.hass.async_add_executor_job(self.api.set_profile, roomIndex, profile)
+        await self._api.setRoomPreset(roomIndex, profile)
 
 
 class WavinSentioEntity(CoordinatorEntity, ClimateEntity):
     """Representation of a Wavin Sentio device."""
 
     def __init__(self, hass, room, dataservice):
-        super().__init__(dataservice.coordinator)
+        super().__init__(dataservice.coordinator, ((DEVICE_ROOM, room.index), CLIMATE_FIELDS))
         """Initialize the climate device."""
         self._name = room.name
         self._attr_name = room.name
-        self._attr_unique_id = f"{room.name}_{room.index}"
+        self._attr_unique_id = dataservice.get_uniqueId(f"{room.name}_{room.index}")
 
         self._roomcode = room.index
         self._hass = hass
@@ -223,11 +189,17 @@ class WavinSentioEntity(CoordinatorEntity, ClimateEntity):
         if (temperature := kwargs.get(ATTR_TEMPERATURE)) is None:
             return
         _LOGGER.debug("--------------------> Set Temperature {0}".format(temperature))
-        if self._hvac_mode == HVACMode.AUTO:
-            temp_room = self._dataservice.get_room(self._roomcode)
-            temp_room.setRoomMode(SentioRoomMode.MANUAL)
-        await self._dataservice.set_new_temperature(self._roomcode, temperature)
-        self.updateSentioData()
+        # Show the new setpoint right away, the readback after the write confirms it
+        self._attr_target_temperature = temperature
+        self.async_write_ha_state()
+        try:
+            if self._hvac_mode == HVACMode.AUTO:
+                await self._dataservice.set_new_mode(self._roomcode, SentioRoomMode.MANUAL)
+            await self._dataservice.set_new_temperature(self._roomcode, temperature)
+        finally:
+            # Also drops the optimistic value of a write that failed
+            self.updateSentioData()
+            self.async_write_ha_state()
 
     async def async_turn_off(self) -> None:
         await self.async_set_hvac_mode(HVACMode.OFF)
@@ -237,43 +209,51 @@ class WavinSentioEntity(CoordinatorEntity, ClimateEntity):
 
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
         """Set new target hvac mode."""
-        if hvac_mode == HVACMode.OFF:
-            self._on = False
-            await self._dataservice.set_new_temperature(self._roomcode, self._attr_min_temp)
-        else:
-            self._on = True
-            if hvac_mode == HVACMode.AUTO:
-                temp_room = await self.hass.async_add_executor_job(self._dataservice.get_room, self._roomcode)
-                if temp_room is not None:
-                    temp_room.setRoomMode(SentioRoomMode.SCHEDULE)
-                    self._hvac_mode = HVACMode.AUTO
-                else:
-                    _LOGGER.debug("Failed to get room with index {0}".format(self._roomcode))
+        try:
+            if hvac_mode == HVACMode.OFF:
+                self._on = False
+                self._attr_target_temperature = self._attr_min_temp
+                self.async_write_ha_state()
+                await self._dataservice.set_new_temperature(self._roomcode, self._attr_min_temp)
             else:
-                _LOGGER.debug("Hvac mode follows, not settable {0}".format(hvac_mode))
-        self.updateSentioData()
+                self._on = True
+                if hvac_mode == HVACMode.AUTO:
+                    temp_room = self._dataservice.get_room(self._roomcode)
+                    if temp_room is not None:
+                        self._attr_hvac_mode = HVACMode.AUTO
+                        self.async_write_ha_state()
+                        await self._dataservice.set_new_mode(self._roomcode, SentioRoomMode.SCHEDULE)
+                        self._hvac_mode = HVACMode.AUTO
+                    else:
+                        _LOGGER.debug("Failed to get room with index {0}".format(self._roomcode))
+                else:
+                    _LOGGER.debug("Hvac mode follows, not settable {0}".format(hvac_mode))
+        finally:
+            # Also drops the optimistic value of a write that failed
+            self.updateSentioData()
+            self.async_write_ha_state()
 
     def updateSentioData(self) -> None:
         """Retrieve latest state."""
-        temp_room = self._dataservice.get_room(self._roomcode)
+        snapshot = self.coordinator.data
+        temp_room = None if snapshot is None else snapshot.device((DEVICE_ROOM, self._roomcode))
         if temp_room is not None:
-            if temp_room.getRoomRelativeHumidity() != None:
-                self._attr_current_humidity = int(temp_room.getRoomRelativeHumidity())
+            if temp_room.humidity != None:
+                self._attr_current_humidity = int(temp_room.humidity)
             
-            self._attr_target_temperature = temp_room.getRoomSetpoint()
-            self._attr_current_temperature = temp_room.getRoomActualTemperature()
+            self._attr_target_temperature = temp_room.setpoint
+            self._attr_current_temperature = temp_room.temperature
             self._current_temperature = self._attr_current_temperature
             self._current_humidity = self._attr_current_humidity
 
-            roomMode = temp_room.getRoomMode()
-            if roomMode == SentioRoomMode.SCHEDULE:
+            if temp_room.mode == SentioRoomMode.SCHEDULE:
                 self._hvac_mode = HVACMode.AUTO
-            else:    
-                self._hvac_mode = HVAC_MODE_SENTIO_TO_HASS[temp_room.getRoomHeatingState()]
+            elif temp_room.heating_state in HVAC_MODE_SENTIO_TO_HASS:
+                self._hvac_mode = HVAC_MODE_SENTIO_TO_HASS[temp_room.heating_state]
             self._attr_hvac_mode = self._hvac_mode
 
             _LOGGER.debug(
-                "Update {0}, current temp: {1} state = {2} || {3}".format(self._name, self._attr_current_temperature, temp_room.getRoomHeatingState(), self._hvac_mode )
+                "Update %s, current temp: %s state = %s || %s", self._name, self._attr_current_temperature, temp_room.heating_state, self._hvac_mode
             )
 
 
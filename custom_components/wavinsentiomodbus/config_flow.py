@@ -7,13 +7,27 @@ import homeassistant.helpers.config_validation as cv
 
 from homeassistant import config_entries, core, exceptions
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_TYPE, CONF_SLAVE
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 
 import voluptuous as vol
 
-from WavinSentioModbus.SentioApi import SentioModbus, NoConnectionPossible, ModbusType
-
-from .const import DOMAIN
+from WavinSentioModbus.SentioApi import NoConnectionPossible, ModbusType
+
+from pymodbus.exceptions import ModbusException
+
+from . import SentioApiHandler, async_store_flow_handoff
+from .const import (
+    DOMAIN,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,6 +40,14 @@ class WavinSentioConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Wavin Sentio config flow."""
     data: Optional[Dict[str, Any]]
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return WavinSentioOptionsFlow(config_entry)
+
     #async def async_step_user(self, user_input: Optional[Dict[str, Any]] = None):
         
     async def async_step_user(
@@ -80,9 +102,6 @@ class WavinSentioConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     ) -> FlowResult:
         self.data = user_input
         errors: dict[str, str] = {}
-        _LOGGER.debug("Serial Modbus not yet supported.... ") #TODO REMOVE
-        if user_input is None:
-            return None
         if user_input is not None:
             self.data[CONF_TYPE] = ModbusType.MODBUS_RTU
             data = await self.async_validate_wavin_sentio_connection(user_input, errors)
@@ -115,31 +134,64 @@ class WavinSentioConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Validate Sentio connection and create data."""
         self.data = input_data
         _LOGGER.debug("Got here with data {0}".format(input_data))
+        api = SentioApiHandler(
+            self.data[CONF_TYPE], self.data[CONF_HOST], self.data[CONF_PORT], self.data[CONF_SLAVE], logging.DEBUG, self.hass
+        )
         try:
-            api = await self.hass.async_add_executor_job(
-                SentioModbus, self.data[CONF_TYPE], self.data[CONF_HOST], self.data[CONF_PORT], self.data[CONF_SLAVE], 0, logging.DEBUG
-            )
-
-            status = await self.hass.async_add_executor_job(api.connect)
-            if status == 0:
+            if await api.connect() and await api.initialize():
                 info = {
                     "WavinSentio": self.data[CONF_HOST],
                 }
                 
                 data = {**self.data, **info}
                 _LOGGER.debug("Filled data {0}".format(data))
-                _LOGGER.debug("Initialized Wavin Sentio Done, now disconnect")
-
-                #throw away the connection now.
-                await self.hass.async_add_executor_job(
-                        api.disconnect
-                )
+                _LOGGER.debug("Initialized Wavin Sentio Done, handing the connection to setup")
 
+                # Setup of the new entry reuses the connection and the discovery
+                async_store_flow_handoff(self.hass, data, api)
                 return data
             else:
                 errors["base"] = "connect_error"
-        except NoConnectionPossible:
+        except (NoConnectionPossible, ModbusException):
             errors["base"] = "connect_error"
 
+        await api.disconnect()
         return 0
 
+
+class WavinSentioOptionsFlow(config_entries.OptionsFlow):
+    """Wavin Sentio options flow, polling intervals per tier and the adaptive bounds."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the polling intervals."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_FAST_SCAN_INTERVAL,
+                    default=options.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=5)),
+                vol.Required(
+                    CONF_SLOW_SCAN_INTERVAL,
+                    default=options.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=30)),
+                vol.Required(
+                    CONF_MIN_SCAN_INTERVAL,
+                    default=options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=5)),
+                vol.Required(
+                    CONF_MAX_SCAN_INTERVAL,
+                    default=options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=5)),
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema)
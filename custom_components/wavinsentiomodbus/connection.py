@@ -0,0 +1,121 @@
+import asyncio
+import random
+import time
+
+from pymodbus.exceptions import ModbusException
+
+from .const import (
+    _LOGGER,
+    CONNECTION_STATE_CONNECTED,
+    CONNECTION_STATE_DISCONNECTED,
+    KEEPALIVE_INTERVAL,
+    RECONNECT_BACKOFF_MIN,
+    RECONNECT_BACKOFF_MAX,
+)
+from .registers import PROBE_REGISTER
+
+
+class SentioConnectionUnavailable(ModbusException):
+    """The controller is known to be unreachable and the next reconnect is not due yet."""
+
+
+class SentioConnectionManager:
+    """Keep the transport of one controller connected.
+
+    A failed request drops the connection (a timed out TCP socket is
+    usually half-open) and the next attempt is delayed with jittered
+    exponential backoff. Until then requests fail immediately instead of
+    waiting for the Modbus timeout. While connected, an idle link is
+    probed every KEEPALIVE_INTERVAL seconds; while disconnected the same
+    task reconnects as soon as the backoff expires.
+    """
+
+    def __init__(self, transport, onStateChange=None):
+        self._transport = transport
+        self._onStateChange = onStateChange
+        self.state = CONNECTION_STATE_DISCONNECTED
+        self.failures = 0
+        self.lastError = None
+        self._nextAttempt = 0.0
+        self._lock = asyncio.Lock()
+        self._keepAlive = None
+
+    @property
+    def retryIn(self):
+        """Seconds until the next reconnect attempt, 0 when one is allowed now."""
+        return max(0.0, self._nextAttempt - time.monotonic())
+
+    def _setState(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        if self._onStateChange is not None:
+            self._onStateChange(state)
+
+    async def ensureConnected(self):
+        """Return when the controller answers, raise SentioConnectionUnavailable otherwise."""
+        if self.state == CONNECTION_STATE_CONNECTED and self._transport.connected:
+            return
+        async with self._lock:
+            if self.state == CONNECTION_STATE_CONNECTED and self._transport.connected:
+                return
+            if self.retryIn > 0:
+                raise SentioConnectionUnavailable(
+                    "Controller unreachable, next attempt in {0:.0f} s".format(self.retryIn))
+            if not self._transport.connected and not await self._transport.connect():
+                self.markFailed("connect failed")
+                raise SentioConnectionUnavailable("Failed to connect")
+            # An open port or socket does not mean the controller answers
+            try:
+                await self._probe()
+            except ModbusException as err:
+                self.markFailed(err)
+                raise SentioConnectionUnavailable("Controller does not answer: {0}".format(err)) from err
+            self.failures = 0
+            self.lastError = None
+            self._setState(CONNECTION_STATE_CONNECTED)
+
+    def markFailed(self, err):
+        """Drop the connection after a failed request and schedule the next attempt."""
+        delay = min(RECONNECT_BACKOFF_MAX, RECONNECT_BACKOFF_MIN * 2 ** self.failures)
+        delay = random.uniform(delay / 2, delay)
+        self.failures += 1
+        self.lastError = str(err)
+        self._nextAttempt = time.monotonic() + delay
+        self._transport.reset()
+        if self.state == CONNECTION_STATE_CONNECTED:
+            _LOGGER.warning("Connection to Sentio controller lost: {0}".format(err))
+        _LOGGER.debug("Sentio reconnect attempt {0} in {1:.1f} s".format(self.failures, delay))
+        self._setState(CONNECTION_STATE_DISCONNECTED)
+
+    async def _probe(self):
+        await self._transport.readRegisters(PROBE_REGISTER.regType, PROBE_REGISTER.address, PROBE_REGISTER.count)
+
+    def start(self, hass):
+        if self._keepAlive is None:
+            self._keepAlive = hass.async_create_background_task(self._run(), "wavinsentiomodbus keep-alive")
+
+    def stop(self):
+        if self._keepAlive is not None:
+            self._keepAlive.cancel()
+            self._keepAlive = None
+        # Closing is not an outage, nobody is told
+        self.state = CONNECTION_STATE_DISCONNECTED
+
+    async def _run(self):
+        while True:
+            if self.state == CONNECTION_STATE_CONNECTED:
+                idle = time.monotonic() - self._transport.lastActivity
+                if idle < KEEPALIVE_INTERVAL:
+                    await asyncio.sleep(KEEPALIVE_INTERVAL - idle)
+                    continue
+                try:
+                    await self._probe()
+                except ModbusException as err:
+                    self.markFailed(err)
+            else:
+                await asyncio.sleep(min(self.retryIn, KEEPALIVE_INTERVAL))
+                try:
+                    await self.ensureConnected()
+                except SentioConnectionUnavailable:
+                    pass
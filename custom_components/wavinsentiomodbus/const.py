@@ -1,4 +1,6 @@
 import logging
+import re
+from datetime import timedelta
 _LOGGER = logging.getLogger(__name__)
 
 DOMAIN = "wavinsentiomodbus"
@@ -6,4 +8,82 @@ DOMAIN = "wavinsentiomodbus"
 CONF_LOCATION_ID = "ULC"
 
 DEFAULT_MIN_TEMPERATURE = 4
-DEFAULT_MAX_TEMPERATURE = 40
\ No newline at end of file
+DEFAULT_MAX_TEMPERATURE = 40
+
+UPDATE_DELAY = timedelta(seconds=30)
+MODBUS_TIMEOUT = 3
+# RTU frames are separated by 3.5 character times (8E1 is 11 bits per character),
+# fixed at 1.75 ms above 19200 baud
+MODBUS_RTU_CHAR_BITS = 11
+MODBUS_RTU_MIN_FRAME_GAP = 0.00175
+
+# Connection management; reconnects back off exponentially (with jitter) between these bounds
+CONNECTION_STATE_CONNECTED = "connected"
+CONNECTION_STATE_DISCONNECTED = "disconnected"
+KEEPALIVE_INTERVAL = 60
+RECONNECT_BACKOFF_MIN = 1
+RECONNECT_BACKOFF_MAX = 300
+
+# Read function 3/4 PDU limit and the largest hole worth reading through
+MODBUS_MAX_READ_REGISTERS = 125
+MODBUS_MAX_READ_GAP = 4
+# Exception code of a read of registers that do not exist, like the name of a missing room
+MODBUS_ILLEGAL_DATA_ADDRESS = 2
+
+# Polling tiers; identity and topology are only read by (re)discovery
+POLL_TIER_FAST = "fast"
+POLL_TIER_SLOW = "slow"
+
+CONF_FAST_SCAN_INTERVAL = "fast_scan_interval"
+CONF_SLOW_SCAN_INTERVAL = "slow_scan_interval"
+DEFAULT_FAST_SCAN_INTERVAL = 30
+DEFAULT_SLOW_SCAN_INTERVAL = 300
+
+# Adaptive fast tier: the minimum right after writes and state switches, the fast scan
+# interval while rooms or circuits heat or cool, backing off to the maximum while all is idle
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+DEFAULT_MIN_SCAN_INTERVAL = 10
+DEFAULT_MAX_SCAN_INTERVAL = 120
+ADAPTIVE_BURST_POLLS = 3
+ADAPTIVE_BACKOFF_FACTOR = 2
+# Largest temperature change between two polls that still counts as stable; one 0.1 degree step
+ADAPTIVE_STABLE_DELTA = 0.15
+
+# Controllers poll independently; this bounds how many polls run at the same time
+CONF_MAX_CONCURRENT_POLLS = "max_concurrent_polls"
+DEFAULT_MAX_CONCURRENT_POLLS = 4
+DATA_POLL_LIMITER = DOMAIN + "_poll_limiter"
+# Unique ids start with the controller serial ("2021-00-1234-5678_"), legacy ids do not
+UNIQUE_ID_SERIAL_PREFIX = re.compile(r"^\w+-\d{2}-\d{4}-\d*_")
+
+# Device kinds, a device is keyed by (kind, index) in coordinator data
+DEVICE_CONTROLLER = "controller"
+DEVICE_ROOM = "room"
+DEVICE_ITC = "itc"
+DEVICE_HCC = "hcc"
+DEVICE_BOILERTANK = "boilertank"
+
+SENTIO_THERMISTORS = range(1, 6)
+# Thermistors found missing at discovery are only read again at this interval
+THERMISTOR_RECHECK_INTERVAL = timedelta(hours=1)
+
+# Number of polls the latency percentiles are computed over
+METRICS_WINDOW = 100
+
+# Discovered topology, persisted per config entry so setup does not wait for the controller
+STORAGE_VERSION = 1
+STORAGE_KEY = DOMAIN + ".{0}"
+
+# Connected handler left by the config flow for the first setup of its entry
+DATA_FLOW_HANDOFF = DOMAIN + "_flow_handoff"
+FLOW_HANDOFF_TIMEOUT = 120
+
+# Priorities of the jobs on the I/O worker of a controller, lower runs first. A running job
+# lets queued jobs of a higher priority go first between two of its requests
+IO_PRIORITY_WRITE = 0
+IO_PRIORITY_POLL = 1
+IO_PRIORITY_BACKGROUND = 2
+
+# Setpoint writes within this window after a write are coalesced per room and flushed as one batch
+SETPOINT_WRITE_DEBOUNCE = 1.0
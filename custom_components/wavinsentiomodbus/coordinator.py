@@ -0,0 +1,154 @@
+import contextlib
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant, callback
+
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+
+from pymodbus.exceptions import ModbusException
+
+from .connection import SentioConnectionUnavailable
+from .const import (
+    _LOGGER,
+    CONNECTION_STATE_CONNECTED,
+    UPDATE_DELAY,
+)
+
+
+def listenerFields(context):
+    """(deviceKey, fields) of a listener context; fields is None for a whole device.
+
+    A context is a deviceKey, a (deviceKey, field) or a (deviceKey, (field, ...)).
+    """
+    deviceKey, detail = context
+    if isinstance(detail, str):
+        return deviceKey, (detail,)
+    if isinstance(detail, tuple):
+        return deviceKey, detail
+    return context, None
+
+
+class WavinSentioDataCoordinator(DataUpdateCoordinator):
+    """Single coordinator per controller, shared by all platforms.
+
+    The coordinator data is the SentioSnapshot of the last poll, replaced as
+    a whole and never changed in place. Entities subscribe with a deviceKey
+    or a (deviceKey, field or fields) context and are only called back when
+    something they show changed. The same contexts decide which registers
+    are polled, so entities disabled in the registry cost no bus time.
+    """
+
+    def __init__(self, hass: HomeAssistant, api, update_interval=UPDATE_DELAY, limiter=None, pollInterval=None):
+        """Initialize the coordinator around a SentioApiHandler.
+
+        limiter is an optional semaphore shared by the coordinators of all
+        controllers to bound the number of concurrent polls. pollInterval is
+        an optional SentioPollInterval that adapts update_interval after
+        every poll.
+        """
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="WavinSentioDataService",
+            update_interval=update_interval if pollInterval is None else timedelta(seconds=pollInterval.current),
+        )
+        self.api = api
+        self._limiter = limiter
+        self._pollInterval = pollInterval
+        # None means notify every listener (first refresh, failures, recovery)
+        self._changed = None
+        self.connectionState = api.connectionState
+
+    async def _async_update_data(self):
+        _LOGGER.debug("Coordinator update called")
+        self._changed = None
+        try:
+            async with self._limiter or contextlib.nullcontext():
+                await self.api.update(self.wantedFields())
+        except SentioConnectionUnavailable as ex:
+            raise UpdateFailed(str(ex)) from ex
+        except KeyError as ex:
+            raise UpdateFailed("Missing overview data, skipping update") from ex
+        except ModbusException as ex:
+            raise UpdateFailed("Modbus communication failed: {0}".format(ex)) from ex
+
+        snapshot = self.api.takeSnapshot()
+        if self.last_update_success and self.data is not None:
+            self._changed = self._changedKeys(snapshot)
+        if self._pollInterval is not None:
+            self.update_interval = self._pollInterval.next(snapshot, self.data)
+        return snapshot
+
+    def _changedKeys(self, snapshot):
+        changed = snapshot.changedKeys(self.data)
+        _LOGGER.debug("{0} of {1} devices changed".format(
+            sum(1 for key in changed if key in snapshot.devices), len(snapshot.devices)))
+        return changed
+
+    @callback
+    def async_set_partial_data(self, records) -> None:
+        """Publish {deviceKey: record} refreshed outside the poll cycle (write readbacks).
+
+        Unlike async_set_updated_data this keeps the poll schedule and only
+        notifies the listeners of what changed.
+        """
+        if self.data is None:
+            return
+        snapshot = self.data.replace(records)
+        changed = self._changedKeys(snapshot)
+        self.data = snapshot
+        if changed:
+            self._changed = changed
+            self.async_update_listeners()
+
+    def wantedFields(self):
+        """{deviceKey: fields} entities listen to, fields None for a whole device.
+
+        None until the first entity listens, the first refresh reads everything.
+        """
+        if not self._listeners:
+            return None
+        wanted = {}
+        for context in self.async_contexts():
+            if context is None:
+                continue
+            deviceKey, fields = listenerFields(context)
+            if fields is None:
+                wanted[deviceKey] = None
+            elif deviceKey not in wanted:
+                wanted[deviceKey] = set(fields)
+            elif wanted[deviceKey] is not None:
+                wanted[deviceKey].update(fields)
+        return wanted
+
+    @callback
+    def async_note_activity(self) -> None:
+        """Called after writes; moves the next poll forward to the minimum interval."""
+        if self._pollInterval is None:
+            return
+        self.update_interval = self._pollInterval.noteActivity()
+        if self._unsub_refresh is not None:
+            self._schedule_refresh()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Only call listeners whose device or field changed in the last poll."""
+        changed = self._changed
+        self._changed = None
+        for update_callback, context in list(self._listeners.values()):
+            if changed is None or context is None or context in changed:
+                update_callback()
+            elif isinstance(context[1], tuple) and any((context[0], field) in changed for field in context[1]):
+                update_callback()
+
+    @callback
+    def async_set_connection_state(self, state) -> None:
+        """Called by the connection manager; refresh right away when the link comes back."""
+        previous = self.connectionState
+        self.connectionState = state
+        if state == CONNECTION_STATE_CONNECTED and previous != state and self.data is not None:
+            _LOGGER.info("Connection to Sentio controller restored")
+            self.hass.async_create_task(self.async_request_refresh())
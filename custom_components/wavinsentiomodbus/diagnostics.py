@@ -0,0 +1,50 @@
+"""Diagnostics support for Wavin Sentio Modbus."""
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+# The title is "host:port" as the config flow creates it
+TO_REDACT = {CONF_HOST, "title", "WavinSentio", "serial_number", "unique_id"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return connection state, timings and the register blocks of the last poll."""
+    sentioApi = hass.data[DOMAIN][entry.entry_id]
+    connection = sentioApi.connection
+    metrics = sentioApi.metrics
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "controller": async_redact_data(
+            {
+                "serial_number": sentioApi.sentioData.serial_number,
+                "firmware": "{0}.{1}".format(
+                    sentioApi.sentioData.firmware_version_major, sentioApi.sentioData.firmware_version_minor
+                ),
+                "rooms": {room.index: room.name for room in sentioApi.getAvailableRooms()},
+                "itcs": [itc.index for itc in sentioApi.getItcData()],
+                "hccs": [hcc.index for hcc in sentioApi.getHccData()],
+                "boiler_tanks": [tank.index for tank in sentioApi.getBoilerTanks()],
+            },
+            TO_REDACT,
+        ),
+        "connection": {
+            "state": connection.state,
+            "failures": connection.failures,
+            "last_error": connection.lastError,
+            "retry_in": round(connection.retryIn, 1),
+            "queued_jobs": sentioApi.queuedJobs,
+        },
+        "poll_interval": sentioApi.coordinator.update_interval.total_seconds(),
+        "metrics": metrics.asDict(),
+        "timings_ms": {
+            "phases": metrics.phases,
+            "devices": metrics.deviceTimings,
+        },
+        "last_poll_blocks": metrics.lastBlocks,
+    }
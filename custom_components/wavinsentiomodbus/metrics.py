@@ -0,0 +1,126 @@
+import collections
+import math
+
+from .const import METRICS_WINDOW
+
+
+class SentioPollMetrics:
+    """Timing and traffic counters of one controller, fed by SentioApiHandler.
+
+    Per poll counters (requests, bytes) describe the last completed poll,
+    per write counters the last write with its readback, also when it ran
+    in the middle of a poll; errors and retries count up since setup.
+    Latencies are in milliseconds.
+    """
+
+    def __init__(self, window=METRICS_WINDOW):
+        self._durations = collections.deque(maxlen=window)
+        self.lastPollDuration = None
+        self.lastWriteLatency = None
+        self.requestsPerPoll = None
+        self.bytesPerPoll = None
+        self.requestsPerWrite = None
+        self.bytesPerWrite = None
+        self.errors = 0
+        self.retries = 0
+        self._requests = 0
+        self._bytes = 0
+        self._writing = False
+        self._writeRequests = 0
+        self._writeBytes = 0
+        # Breakdown for diagnostics: phase durations and the blocks of the last poll
+        self.phases = {}
+        self.lastBlocks = []
+        self.deviceTimings = {}
+
+    def startPoll(self):
+        self._requests = 0
+        self._bytes = 0
+
+    def endPoll(self, seconds):
+        self.lastPollDuration = round(seconds * 1000, 1)
+        self._durations.append(self.lastPollDuration)
+        self.requestsPerPoll = self._requests
+        self.bytesPerPoll = self._bytes
+
+    def startWrite(self):
+        """Requests until endWrite belong to the write, not to a poll it interrupted."""
+        self._writing = True
+        self._writeRequests = 0
+        self._writeBytes = 0
+
+    def endWrite(self):
+        self._writing = False
+        self.requestsPerWrite = self._writeRequests
+        self.bytesPerWrite = self._writeBytes
+
+    def countRequest(self, registers):
+        """One Modbus request; bytes are the register payload, two per register."""
+        if self._writing:
+            self._writeRequests += 1
+            self._writeBytes += 2 * registers
+        else:
+            self._requests += 1
+            self._bytes += 2 * registers
+
+    def countError(self):
+        self.errors += 1
+
+    def countRetry(self):
+        self.retries += 1
+
+    def recordWrite(self, seconds):
+        self.lastWriteLatency = round(seconds * 1000, 1)
+
+    def recordPhase(self, name, seconds):
+        self.phases[name] = round(seconds * 1000, 1)
+
+    def recordBlocks(self, blocks, owners):
+        """Keep the (ReadBlock, words, seconds) reads of the last poll.
+
+        owners maps a RegisterRange to the deviceKey it was read for; the
+        time of a merged block is split over its devices by register count.
+        """
+        self.lastBlocks = []
+        timings = collections.defaultdict(float)
+        for block, words, seconds in blocks:
+            devices = []
+            total = sum(part.count for part in block.parts)
+            for part in block.parts:
+                deviceKey = owners.get(part)
+                if deviceKey is None:
+                    continue
+                name = "{0} {1}".format(*deviceKey)
+                timings[name] += seconds * part.count / total
+                if name not in devices:
+                    devices.append(name)
+            self.lastBlocks.append({
+                "type": block.regType.name,
+                "address": block.address,
+                "count": block.count,
+                "ms": round(seconds * 1000, 1),
+                "devices": devices,
+                "registers": words,
+            })
+        self.deviceTimings = {name: round(seconds * 1000, 1) for name, seconds in timings.items()}
+
+    def percentile(self, fraction):
+        """Nearest-rank percentile of the poll durations in the rolling window."""
+        if not self._durations:
+            return None
+        ordered = sorted(self._durations)
+        return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+    def asDict(self):
+        return {
+            "last_poll_duration": self.lastPollDuration,
+            "poll_latency_p50": self.percentile(0.50),
+            "poll_latency_p95": self.percentile(0.95),
+            "requests_per_poll": self.requestsPerPoll,
+            "bytes_per_poll": self.bytesPerPoll,
+            "errors": self.errors,
+            "retries": self.retries,
+            "write_latency": self.lastWriteLatency,
+            "requests_per_write": self.requestsPerWrite,
+            "bytes_per_write": self.bytesPerWrite,
+        }
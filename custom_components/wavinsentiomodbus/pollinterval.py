@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from WavinSentioModbus.SentioTypes import SentioHeatingStates
+
+from .const import (
+    _LOGGER,
+    DEVICE_ROOM,
+    DEVICE_ITC,
+    DEVICE_HCC,
+    ADAPTIVE_BURST_POLLS,
+    ADAPTIVE_BACKOFF_FACTOR,
+    ADAPTIVE_STABLE_DELTA,
+)
+
+ACTIVE_STATES = (SentioHeatingStates.HEATING, SentioHeatingStates.COOLING)
+
+# Fields whose change means someone or something switched the installation
+SWITCH_FIELDS = frozenset(("setpoint", "mode", "heating_state", "state", "pump_state", "hc_source_state"))
+TEMPERATURE_FIELDS = frozenset(
+    ("temperature", "floor_temperature", "inlet_temperature", "return_temperature", "supplier_temperature")
+)
+
+
+class SentioPollInterval:
+    """Chooses the interval of the next poll from the last two snapshots.
+
+    After a write or a switch of a setpoint, mode or heating state the next
+    polls use the minimum interval. While a room or circuit heats or cools
+    the configured fast scan interval is used. When every room and circuit
+    is idle and no temperature moved more than one step, the interval grows
+    towards the maximum.
+    """
+
+    def __init__(self, interval, minimum, maximum):
+        self.minimum = min(minimum, maximum)
+        self.maximum = maximum
+        self.base = min(max(interval, self.minimum), self.maximum)
+        self.current = self.base
+        self._burst = 0
+
+    def noteActivity(self):
+        """Poll at the minimum interval for the next few polls; returns that interval."""
+        self._burst = ADAPTIVE_BURST_POLLS
+        self.current = self.minimum
+        return timedelta(seconds=self.current)
+
+    def next(self, snapshot, previous):
+        if previous is None:
+            switched, drift = False, None
+        else:
+            switched, drift = self._compare(snapshot, previous)
+        if switched:
+            self._burst = ADAPTIVE_BURST_POLLS
+        if self._burst > 0:
+            self._burst -= 1
+            interval = self.minimum
+        elif self._active(snapshot) or drift is None or drift > ADAPTIVE_STABLE_DELTA:
+            interval = self.base
+        else:
+            interval = min(max(self.current, self.base) * ADAPTIVE_BACKOFF_FACTOR, self.maximum)
+        if interval != self.current:
+            _LOGGER.debug("Sentio poll interval {0}s -> {1}s".format(self.current, interval))
+        self.current = interval
+        return timedelta(seconds=interval)
+
+    @staticmethod
+    def _active(snapshot):
+        for (kind, _), record in snapshot.devices.items():
+            if kind == DEVICE_ROOM and record.heating_state in ACTIVE_STATES:
+                return True
+            if kind in (DEVICE_ITC, DEVICE_HCC) and record.state in ACTIVE_STATES:
+                return True
+        return False
+
+    @staticmethod
+    def _compare(snapshot, previous):
+        """Whether a switch field changed, and the largest temperature change."""
+        switched = False
+        drift = 0.0
+        for (deviceKey, field), value in snapshot.items():
+            if field in SWITCH_FIELDS:
+                switched = switched or value != previous.get(deviceKey, field)
+            elif field in TEMPERATURE_FIELDS and value is not None:
+                before = previous.get(deviceKey, field)
+                if before is not None:
+                    drift = max(drift, abs(value - before))
+        return switched, drift
@@ -0,0 +1,63 @@
+from typing import NamedTuple
+
+from .const import (
+    _LOGGER,
+    MODBUS_MAX_READ_REGISTERS,
+    MODBUS_MAX_READ_GAP,
+)
+
+
+class RegisterRange(NamedTuple):
+    regType: object
+    address: int
+    count: int
+
+
+class ReadBlock(NamedTuple):
+    regType: object
+    address: int
+    count: int
+    parts: tuple
+
+
+class SentioReadPlanner:
+    """Merge register reads into the fewest block reads the PDU allows.
+
+    Ranges of the same register type are merged when they touch or are
+    separated by at most maxGap unused registers. Blocks the controller
+    refused as a whole are remembered and read range by range afterwards.
+    """
+
+    def __init__(self, maxCount=MODBUS_MAX_READ_REGISTERS, maxGap=MODBUS_MAX_READ_GAP):
+        self._maxCount = maxCount
+        self._maxGap = maxGap
+        self._brokenBlocks = set()
+
+    def plan(self, ranges):
+        blocks = []
+        current = None
+        parts = []
+        for item in sorted(set(ranges), key=lambda r: (r.regType.value, r.address, r.count)):
+            if current is not None and item.regType == current.regType:
+                end = max(current.address + current.count, item.address + item.count)
+                if item.address <= current.address + current.count + self._maxGap and end - current.address <= self._maxCount:
+                    current = RegisterRange(current.regType, current.address, end - current.address)
+                    parts.append(item)
+                    continue
+            if current is not None:
+                blocks += self._emit(current, parts)
+            current = item
+            parts = [item]
+        if current is not None:
+            blocks += self._emit(current, parts)
+        return blocks
+
+    def _emit(self, merged, parts):
+        block = ReadBlock(merged.regType, merged.address, merged.count, tuple(parts))
+        if len(parts) > 1 and block in self._brokenBlocks:
+            return [ReadBlock(part.regType, part.address, part.count, (part,)) for part in parts]
+        return [block]
+
+    def markBroken(self, block):
+        _LOGGER.debug("Block read of {0} registers at {1} refused, splitting it from now on".format(block.count, block.address))
+        self._brokenBlocks.add(block)
@@ -0,0 +1,182 @@
+"""Registers read by the WavinSentioModbus library objects.
+
+The library still decodes every value itself; these tables only tell the
+transport which registers to fetch before the library code runs.
+"""
+from WavinSentioModbus.Defaults import Defaults
+from WavinSentioModbus.SentioRegisterMap import SentioRegisterMap
+
+from .const import (
+    POLL_TIER_FAST,
+    POLL_TIER_SLOW,
+    DEVICE_CONTROLLER,
+    DEVICE_ROOM,
+    DEVICE_ITC,
+    DEVICE_HCC,
+    DEVICE_BOILERTANK,
+)
+
+# Cheap read used to check that the controller still answers
+PROBE_REGISTER = SentioRegisterMap.Location.DeviceType
+
+LOCATION_REGISTERS = (
+    SentioRegisterMap.Location.DeviceType,
+    SentioRegisterMap.Location.DeviceSerialNrPrefix,
+    SentioRegisterMap.Location.DeviceSerialNumber,
+    SentioRegisterMap.Location.DeviceSwVersion,
+    SentioRegisterMap.Location.DeviceSwVersionMinor,
+)
+
+# Fast tier: measurements and states that move on their own.
+# Slow tier: user setpoints and modes, which only change on writes or schedule steps.
+# Controller computed loop targets (desired inlet, tank desired) stay in the fast tier.
+# The last column is the snapshot field a register feeds, None for values no entity shows;
+# registers of fields no enabled entity listens to are left out of the poll.
+SENSOR_REGISTERS = (
+    (SentioRegisterMap.Outdoors.AirTemperature, POLL_TIER_FAST, "outdoor_temperature"),
+    (SentioRegisterMap.HCSource.State, POLL_TIER_FAST, "hc_source_state"),
+    (SentioRegisterMap.HardwareIO.Thermistor.T1, POLL_TIER_FAST, "thermistor_1"),
+    (SentioRegisterMap.HardwareIO.Thermistor.T2, POLL_TIER_FAST, "thermistor_2"),
+    (SentioRegisterMap.HardwareIO.Thermistor.T3, POLL_TIER_FAST, "thermistor_3"),
+    (SentioRegisterMap.HardwareIO.Thermistor.T4, POLL_TIER_FAST, "thermistor_4"),
+    (SentioRegisterMap.HardwareIO.Thermistor.T5, POLL_TIER_FAST, "thermistor_5"),
+)
+
+ROOM_REGISTERS = (
+    (SentioRegisterMap.Room.DesiredTemperature, POLL_TIER_SLOW, "setpoint"),
+    (SentioRegisterMap.Room.GeneralHeatingCoolingState, POLL_TIER_FAST, "heating_state"),
+    (SentioRegisterMap.Room.GeneralHeatingCoolingBlockingSource, POLL_TIER_FAST, "heating_state"),
+    (SentioRegisterMap.Room.AirTemperature, POLL_TIER_FAST, "temperature"),
+    (SentioRegisterMap.Room.FloorTemperature, POLL_TIER_FAST, "floor_temperature"),
+    (SentioRegisterMap.Room.RelativeHumidity, POLL_TIER_FAST, "humidity"),
+    (SentioRegisterMap.Room.CalculatedDewPoint, POLL_TIER_FAST, "dewpoint"),
+    (SentioRegisterMap.Room.CO2Concentration, POLL_TIER_FAST, "co2"),
+    (SentioRegisterMap.Room.Mode, POLL_TIER_SLOW, "mode"),
+    (SentioRegisterMap.Room.ModeOverride, POLL_TIER_SLOW, "setpoint"),
+    (SentioRegisterMap.Room.TemperaturePreset, POLL_TIER_SLOW, "mode"),
+)
+
+ITC_REGISTERS = (
+    (SentioRegisterMap.ITCCircuits.State, POLL_TIER_FAST, "state"),
+    (SentioRegisterMap.ITCCircuits.PumpState, POLL_TIER_FAST, "pump_state"),
+    (SentioRegisterMap.ITCCircuits.MeasuredInletTemperature, POLL_TIER_FAST, "inlet_temperature"),
+    (SentioRegisterMap.ITCCircuits.DesiredInletTemperature, POLL_TIER_FAST, "inlet_desired"),
+    (SentioRegisterMap.ITCCircuits.MainSupplierTemperature, POLL_TIER_FAST, "supplier_temperature"),
+)
+
+# SentioItcCircuit reads the return temperature without a sub index
+ITC_SHARED_REGISTERS = (
+    (SentioRegisterMap.ITCCircuits.MeasuredReturnTemperature, POLL_TIER_FAST, "return_temperature"),
+)
+
+HCC_REGISTERS = (
+    (SentioRegisterMap.HCCControllers.State, POLL_TIER_FAST, "state"),
+    (SentioRegisterMap.HCCControllers.PumpState, POLL_TIER_FAST, "pump_state"),
+    (SentioRegisterMap.HCCControllers.MeasuredTemperature, POLL_TIER_FAST, "inlet_temperature"),
+    (SentioRegisterMap.HCCControllers.DesiredInletTemperature, POLL_TIER_FAST, "inlet_desired"),
+)
+
+BOILERTANK_REGISTERS = (
+    (SentioRegisterMap.DHWTanks.State, POLL_TIER_FAST, None),
+    (SentioRegisterMap.DHWTanks.MeasuredTemperature, POLL_TIER_FAST, "temperature"),
+    (SentioRegisterMap.DHWTanks.DesiredTemperature, POLL_TIER_FAST, None),
+    (SentioRegisterMap.DHWTanks.CirculationState, POLL_TIER_FAST, None),
+    (SentioRegisterMap.DHWTanks.SourceInletTemperature, POLL_TIER_FAST, None),
+    (SentioRegisterMap.DHWTanks.SourceReturnTemperature, POLL_TIER_FAST, None),
+    (SentioRegisterMap.DHWTanks.CleaningTemperature, POLL_TIER_SLOW, None),
+    (SentioRegisterMap.DHWTanks.TemperatureSetpoint, POLL_TIER_SLOW, "setpoint"),
+)
+
+
+# Name register per device kind, the controller refuses it for devices that do not exist
+NAME_REGISTERS = {
+    DEVICE_ROOM: SentioRegisterMap.Room.Name,
+    DEVICE_ITC: SentioRegisterMap.ITCCircuits.Name,
+    DEVICE_HCC: SentioRegisterMap.HCCControllers.Name,
+    DEVICE_BOILERTANK: SentioRegisterMap.DHWTanks.Name,
+}
+
+
+def nameRead(deviceKey):
+    """(register, subIndex) of the name a device is detected by."""
+    kind, index = deviceKey
+    return (NAME_REGISTERS[kind], index)
+
+
+def discoveryReads():
+    """(register, subIndex) pairs read by SentioModbus.initialize()."""
+    reads = [(register, 0) for register in LOCATION_REGISTERS]
+    reads += [(SentioRegisterMap.Room.Name, index) for index in range(Defaults.MaxNumberOfRooms)]
+    reads += [(SentioRegisterMap.ITCCircuits.Name, index) for index in range(Defaults.MaxNumberOfItcs)]
+    reads += [(SentioRegisterMap.HCCControllers.Name, index) for index in range(Defaults.MaxNumberOfHCCs)]
+    reads += [(SentioRegisterMap.DHWTanks.Name, index) for index in range(Defaults.MaxNumberOfBoilerTanks)]
+    return reads
+
+
+def _tierReads(table, subIndex, tiers, fields=None):
+    return [
+        (register, subIndex)
+        for register, tier, field in table
+        if tier in tiers and (fields is None or field in fields)
+    ]
+
+
+def _wantedFields(wanted, deviceKey):
+    """Fields of a device to read; None reads all, an empty tuple none."""
+    return None if wanted is None else wanted.get(deviceKey, ())
+
+
+def devicePollReads(rooms, itcs, hccs, tanks, tiers=(POLL_TIER_FAST, POLL_TIER_SLOW), wanted=None):
+    """(deviceKey, reads) per device of the detected topology, see pollReads.
+
+    wanted is {deviceKey: fields} of the values entities listen to, fields
+    None for all values of a device; None reads every register.
+    """
+    controller = (DEVICE_CONTROLLER, 0)
+    devices = [(controller, _tierReads(SENSOR_REGISTERS, 0, tiers, _wantedFields(wanted, controller)))]
+    for room in rooms:
+        deviceKey = (DEVICE_ROOM, room.index)
+        devices.append((deviceKey, _tierReads(ROOM_REGISTERS, room.index, tiers, _wantedFields(wanted, deviceKey))))
+    # Every circuit shows the shared return temperature, read it when any of them needs it
+    itcFields = [_wantedFields(wanted, (DEVICE_ITC, itc.index)) for itc in itcs]
+    sharedFields = None if None in itcFields else {field for fields in itcFields for field in fields}
+    for position, itc in enumerate(itcs):
+        reads = _tierReads(ITC_REGISTERS, itc.index, tiers, itcFields[position])
+        if position == 0:
+            # The shared return temperature is accounted to the first circuit
+            reads += _tierReads(ITC_SHARED_REGISTERS, 0, tiers, sharedFields)
+        devices.append(((DEVICE_ITC, itc.index), reads))
+    for hcc in hccs:
+        deviceKey = (DEVICE_HCC, hcc.index)
+        devices.append((deviceKey, _tierReads(HCC_REGISTERS, hcc.index, tiers, _wantedFields(wanted, deviceKey))))
+    for tank in tanks:
+        deviceKey = (DEVICE_BOILERTANK, tank.index)
+        devices.append((deviceKey, _tierReads(BOILERTANK_REGISTERS, tank.index, tiers, _wantedFields(wanted, deviceKey))))
+    return devices
+
+
+def pollReads(rooms, itcs, hccs, tanks, tiers=(POLL_TIER_FAST, POLL_TIER_SLOW)):
+    """(register, subIndex) pairs read by SentioModbus.updateData() for the detected topology.
+
+    Only registers of the requested tiers are returned; the others keep
+    their last value in the register cache.
+    """
+    return [read for _, reads in devicePollReads(rooms, itcs, hccs, tanks, tiers) for read in reads]
+
+
+def thermistorField(index):
+    return "thermistor_{0}".format(index)
+
+
+def thermistorReads(indexes):
+    """(register, subIndex) pairs of the given thermistors (1 to 5)."""
+    fields = {thermistorField(index) for index in indexes}
+    return [(register, 0) for register, _, field in SENSOR_REGISTERS if field in fields]
+
+
+def roomReads(roomIndexes):
+    """(register, subIndex) pairs of every tier for the given rooms, used to confirm writes."""
+    reads = []
+    for roomIndex in roomIndexes:
+        reads += [(register, roomIndex) for register, _, _ in ROOM_REGISTERS]
+    return reads
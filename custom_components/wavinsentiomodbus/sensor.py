@@ -4,6 +4,7 @@ from typing import Any, Final
 from enum import Enum, IntEnum
 from collections.abc import Callable
 from dataclasses import dataclass
+from operator import attrgetter
 
 from homeassistant.core import callback
 from homeassistant.const import CONF_HOST, CONF_PORT, CONF_TYPE, CONF_SLAVE
@@ -14,7 +15,10 @@ from homeassistant.const import (
     CONF_TYPE, 
     CONF_SLAVE, 
     PERCENTAGE,
+    EntityCategory,
+    UnitOfInformation,
     UnitOfTemperature,
+    UnitOfTime,
     STATE_ON,
     STATE_OFF,
 )
@@ -44,127 +48,30 @@ from homeassistant.helpers.typing import StateType
 from .const import (
     DOMAIN as SENTIO_CLIMATE_DOMAIN,
     _LOGGER,
+    DEVICE_CONTROLLER,
+    DEVICE_ROOM,
+    DEVICE_ITC,
+    DEVICE_HCC,
+    DEVICE_BOILERTANK,
+    SENTIO_THERMISTORS,
 )
 
 #from WavinSentioInterface.SentioApi import SentioApi, NoConnectionPossible
 from WavinSentioModbus.SentioApi import SentioModbus, NoConnectionPossible, ModbusType, SentioSensors, PumpState
 from WavinSentioModbus.SentioTypes import SentioHeatingStates
 
-class SentioThermistor(IntEnum):
-    T1 = 1
-    T2 = 2
-    T3 = 3
-    T4 = 4
-    T5 = 5
-    THERMISTOR_START = 1
-    THERMISTOR_MAX = 6 # Always 1 higher than the last supported thermistor
-
-class SentioSensorTypes(Enum):
-    ROOM_HUMIDITY = 0
-    ROOM_FLOORTEMP = 1
-    ROOM_CALCULATED_DEWPOINT = 2
-    ROOM_CO2_LEVEL = 3
-    OUTDOOR_TEMPERATURE_SENSOR = 10
-    ITC_STATE = 20
-    ITC_PUMPSTATE = 21
-    ITC_INLETTEMP = 22
-    ITC_INLETDESIRED = 23
-    ITC_RETURNTEMP = 24
-    ITC_SUPPLIERTEMP = 25
-    MAIN_HC_SOURCE = 30
-    HCC_STATE = 40
-    HCC_PUMPSTATE = 41
-    HCC_INLETTEMP = 42
-    HCC_INLETDESIRED = 43
-    HCC_RETURNTEMP = 44
-    HCC_SUPPLIERTEMP = 45
-    BOILERTANK_SETPOINT = 50
-    BOILERTANK_ACTUALTEMP = 51
-    
-
-SENSORTYPE_TO_STRING: Final[dict[SentioSensorTypes, Any]] = {
-    SentioSensorTypes.ROOM_HUMIDITY: "Humidity",
-    SentioSensorTypes.ROOM_FLOORTEMP: "FloorTemp",
-    SentioSensorTypes.ROOM_CALCULATED_DEWPOINT: "CalculatedDewpoint",
-    SentioSensorTypes.ROOM_CO2_LEVEL: "CO2 Level",
-    SentioSensorTypes.OUTDOOR_TEMPERATURE_SENSOR: "Temperature",
-    SentioSensorTypes.ITC_STATE: "ITC State",
-    SentioSensorTypes.ITC_PUMPSTATE: "ITC Pump State",
-    SentioSensorTypes.ITC_INLETTEMP: "ITC InletTemperature",
-    SentioSensorTypes.ITC_INLETDESIRED: "ITC Desired InletTemperature",
-    SentioSensorTypes.ITC_RETURNTEMP: "ITC Return Temperature",
-    SentioSensorTypes.ITC_SUPPLIERTEMP: "ITC Supplier Temperature",
-    SentioSensorTypes.HCC_STATE: "HCC State",
-    SentioSensorTypes.HCC_PUMPSTATE: "HCC Pump State",
-    SentioSensorTypes.HCC_INLETTEMP: "HCC InletTemperature",
-    SentioSensorTypes.HCC_INLETDESIRED: "HCC Desired InletTemperature",
-    SentioSensorTypes.HCC_RETURNTEMP: "HCC Return Temperature",
-    SentioSensorTypes.HCC_SUPPLIERTEMP: "HCC Supplier Temperature",
-    SentioSensorTypes.BOILERTANK_SETPOINT: "Boiler Tank Setpoint",
-    SentioSensorTypes.BOILERTANK_ACTUALTEMP: "Boiler Tank Actual Temperature",
-    
-}
-
-SENSORTYPE_TO_DEVICECLASS: Final[dict[SentioSensorTypes, Any]] = {
-    SentioSensorTypes.OUTDOOR_TEMPERATURE_SENSOR: SensorDeviceClass.TEMPERATURE,
-    SentioSensorTypes.ITC_STATE: BinarySensorDeviceClass.HEAT,
-    SentioSensorTypes.ITC_PUMPSTATE: BinarySensorDeviceClass.HEAT,
-    SentioSensorTypes.ITC_INLETTEMP: SensorDeviceClass.TEMPERATURE,
-    SentioSensorTypes.ITC_INLETDESIRED:SensorDeviceClass.TEMPERATURE,
-    SentioSensorTypes.ITC_RETURNTEMP: SensorDeviceClass.TEMPERATURE,
-    SentioSensorTypes.ITC_SUPPLIERTEMP: SensorDeviceClass.TEMPERATURE,
-    SentioSensorTypes.HCC_STATE: BinarySensorDeviceClass.HEAT,
-    SentioSensorTypes.HCC_PUMPSTATE: BinarySensorDeviceClass.HEAT,
-    SentioSensorTypes.HCC_INLETTEMP: SensorDeviceClass.TEMPERATURE,
-    SentioSensorTypes.HCC_INLETDESIRED:SensorDeviceClass.TEMPERATURE,
-    SentioSensorTypes.HCC_RETURNTEMP: SensorDeviceClass.TEMPERATURE,
-    SentioSensorTypes.HCC_SUPPLIERTEMP: SensorDeviceClass.TEMPERATURE,
-    SentioSensorTypes.BOILERTANK_ACTUALTEMP: SensorDeviceClass.TEMPERATURE,
-    SentioSensorTypes.BOILERTANK_SETPOINT: SensorDeviceClass.TEMPERATURE,
-}
-
-SENSORTYPE_TO_NATIVETYPE: Final[dict[SentioSensorTypes, Any]] = {
-    SentioSensorTypes.ROOM_HUMIDITY: float,
-    SentioSensorTypes.ROOM_FLOORTEMP: float,
-    SentioSensorTypes.ROOM_CALCULATED_DEWPOINT: float,
-    SentioSensorTypes.ROOM_CO2_LEVEL: int,
-    SentioSensorTypes.OUTDOOR_TEMPERATURE_SENSOR: float,
-    SentioSensorTypes.ITC_STATE: int,
-    SentioSensorTypes.ITC_PUMPSTATE: int,
-    SentioSensorTypes.ITC_INLETTEMP: float,
-    SentioSensorTypes.ITC_INLETDESIRED: float,
-    SentioSensorTypes.ITC_RETURNTEMP: float,
-    SentioSensorTypes.ITC_SUPPLIERTEMP: float,
-    SentioSensorTypes.HCC_STATE: int,
-    SentioSensorTypes.HCC_PUMPSTATE: int,
-    SentioSensorTypes.HCC_INLETTEMP: float,
-    SentioSensorTypes.HCC_INLETDESIRED: float,
-    SentioSensorTypes.HCC_RETURNTEMP: float,
-    SentioSensorTypes.HCC_SUPPLIERTEMP: float,
-    SentioSensorTypes.BOILERTANK_SETPOINT: float,
-    SentioSensorTypes.BOILERTANK_ACTUALTEMP: float,
+HEATING_STATE_TO_VALUE: Final[dict[SentioHeatingStates, Any]] = {
+    SentioHeatingStates.IDLE: HVACMode.OFF,
+    SentioHeatingStates.HEATING: HVACMode.HEAT,
+    SentioHeatingStates.COOLING: HVACMode.COOL,
+    SentioHeatingStates.BLOCKED_HEATING: "Blocked Heat",
+    SentioHeatingStates.BLOCKED_COOLING: "Blocked Cooling",
 }
-
-SENSORTYPE_TO_SENSORUNIT: Final[dict[SentioSensorTypes, Any]] = {
-    SentioSensorTypes.OUTDOOR_TEMPERATURE_SENSOR: UnitOfTemperature.CELSIUS,
-    SentioSensorTypes.ITC_STATE: None,
-    SentioSensorTypes.ITC_PUMPSTATE: None,
-    SentioSensorTypes.ROOM_CO2_LEVEL: "ppm",
-    SentioSensorTypes.ROOM_HUMIDITY: PERCENTAGE,
-    SentioSensorTypes.ROOM_FLOORTEMP: UnitOfTemperature.CELSIUS,
-    SentioSensorTypes.ROOM_CALCULATED_DEWPOINT: UnitOfTemperature.CELSIUS,
-    SentioSensorTypes.ITC_INLETTEMP: UnitOfTemperature.CELSIUS,
-    SentioSensorTypes.ITC_INLETDESIRED: UnitOfTemperature.CELSIUS,
-    SentioSensorTypes.ITC_RETURNTEMP: UnitOfTemperature.CELSIUS,
-    SentioSensorTypes.ITC_SUPPLIERTEMP: UnitOfTemperature.CELSIUS,
-    SentioSensorTypes.HCC_STATE: None,
-    SentioSensorTypes.HCC_PUMPSTATE: None,
-    SentioSensorTypes.HCC_INLETTEMP: UnitOfTemperature.CELSIUS,
-    SentioSensorTypes.HCC_INLETDESIRED: UnitOfTemperature.CELSIUS,
-    SentioSensorTypes.HCC_RETURNTEMP: UnitOfTemperature.CELSIUS,
-    SentioSensorTypes.HCC_SUPPLIERTEMP: UnitOfTemperature.CELSIUS,
-    SentioSensorTypes.BOILERTANK_SETPOINT: UnitOfTemperature.CELSIUS,
-    SentioSensorTypes.BOILERTANK_ACTUALTEMP: UnitOfTemperature.CELSIUS,
+# ITC and HCC state sensors keep their last value while the circuit is blocked
+CIRCUIT_STATE_TO_VALUE: Final[dict[SentioHeatingStates, Any]] = {
+    SentioHeatingStates.IDLE: HVACMode.OFF,
+    SentioHeatingStates.HEATING: HVACMode.HEAT,
+    SentioHeatingStates.COOLING: HVACMode.COOL,
 }
 
 
@@ -174,43 +81,173 @@ HVAC_MODE_HASS_TO_SENTIO: Final[dict[HVACMode, SentioHeatingStates]] = {
     HVACMode.OFF: SentioHeatingStates.IDLE,
 }
 
-'''
-@dataclass
-class SentioSensorDescriptionMixin:
-    """Mixin for required keys."""
 
-    value_fn: Callable[[SentioModbus], Any]
+def _heatingState(state):
+    return HEATING_STATE_TO_VALUE.get(state)
+
+
+def _circuitState(state):
+    return CIRCUIT_STATE_TO_VALUE.get(state)
+
+
+def _pumpState(state):
+    return "IDLE" if state == PumpState.PUMP_IDLE else "ON"
+
+
+def _rounded(value):
+    return round(float(value), 1)
+
 
+@dataclass(frozen=True, kw_only=True)
+class SentioSensorEntityDescription(SensorEntityDescription):
+    """Describes a Sentio sensor by the coordinator value it shows.
 
-@dataclass
-class SentioSensorEntityDescription(
-        SensorEntityDescription, SentioSensorDescriptionMixin
-):
-    """Describes a Aseko binary sensor entity."""
+    value_fn converts the polled value, it is never called with None.
+    Controller sensors have a fixed unique_id, device sensors derive theirs
+    from the device index and name.
+    """
 
+    kind: str
+    field: str
+    value_fn: Callable[[Any], StateType] = lambda value: value
+    unique_id: str | None = None
 
-UNIT_SENSORS: tuple[SentioSensorEntityDescription, ...] = (
+
+def _temperature(key, name, kind, field, **kwargs):
+    return SentioSensorEntityDescription(
+        key=key,
+        name=name,
+        kind=kind,
+        field=field,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        suggested_display_precision=1,
+        **kwargs,
+    )
+
+
+def _circuitSensors(kind, prefix):
+    return (
+        SentioSensorEntityDescription(
+            key="state", name="{0} State".format(prefix), kind=kind, field="state", value_fn=_circuitState,
+        ),
+        SentioSensorEntityDescription(
+            key="pump_state", name="{0} Pump State".format(prefix), kind=kind, field="pump_state", value_fn=_pumpState,
+        ),
+        _temperature("inlet_temperature", "{0} InletTemperature".format(prefix), kind, "inlet_temperature"),
+        _temperature("inlet_desired", "{0} Desired InletTemperature".format(prefix), kind, "inlet_desired"),
+        _temperature("return_temperature", "{0} Return Temperature".format(prefix), kind, "return_temperature"),
+        _temperature("supplier_temperature", "{0} Supplier Temperature".format(prefix), kind, "supplier_temperature"),
+    )
+
+
+# Names are part of the unique ids, do not change them
+ROOM_SENSORS: tuple[SentioSensorEntityDescription, ...] = (
     SentioSensorEntityDescription(
-        key="outsideTemp",
-        name="Outside Temperature",
-        icon="mdi:waves-arrow-right",
-        value_fn=lambda sensorObject: sensorObject.getOutdoorTemp,
+        key="humidity",
+        name="Humidity",
+        kind=DEVICE_ROOM,
+        field="humidity",
+        value_fn=_rounded,
+        native_unit_of_measurement=PERCENTAGE,
+        device_class=SensorDeviceClass.HUMIDITY,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+    ),
+    _temperature("floor_temperature", "FloorTemp", DEVICE_ROOM, "floor_temperature",
+                 value_fn=_rounded, state_class=SensorStateClass.MEASUREMENT),
+    _temperature("dewpoint", "CalculatedDewpoint", DEVICE_ROOM, "dewpoint",
+                 value_fn=_rounded, state_class=SensorStateClass.MEASUREMENT),
+    SentioSensorEntityDescription(
+        key="co2",
+        name="CO2 Level",
+        kind=DEVICE_ROOM,
+        field="co2",
+        value_fn=int,
+        native_unit_of_measurement="ppm",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+    ),
+)
+
+ITC_SENSORS = _circuitSensors(DEVICE_ITC, "ITC")
+HCC_SENSORS = _circuitSensors(DEVICE_HCC, "HCC")
+
+BOILERTANK_SENSORS: tuple[SentioSensorEntityDescription, ...] = (
+    _temperature("setpoint", "Boiler Tank Setpoint", DEVICE_BOILERTANK, "setpoint"),
+    _temperature("temperature", "Boiler Tank Actual Temperature", DEVICE_BOILERTANK, "temperature"),
+)
+
+CONTROLLER_SENSORS: tuple[SentioSensorEntityDescription, ...] = (
+    _temperature("outdoor_temperature", "Outdoor Temperature", DEVICE_CONTROLLER, "outdoor_temperature",
+                 unique_id="Invalid Serial"),
+    SentioSensorEntityDescription(
+        key="hc_source_state",
+        name="HC Source",
+        kind=DEVICE_CONTROLLER,
+        field="hc_source_state",
+        value_fn=_heatingState,
+        unique_id="Sentio-HCSource",
+    ),
+) + tuple(
+    _temperature("thermistor_{0}".format(index), "Thermistor T{0}".format(index), DEVICE_CONTROLLER,
+                 "thermistor_{0}".format(index), unique_id="Thermistor_T{0}".format(index))
+    for index in SENTIO_THERMISTORS
+)
+
+# Poll and bus metrics of SentioApiHandler, disabled until enabled in the entity registry
+METRIC_SENSORS: tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(
+        key="last_poll_duration",
+        name="Last poll duration",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="poll_latency_p50",
+        name="Poll latency p50",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="poll_latency_p95",
+        name="Poll latency p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="requests_per_poll",
+        name="Modbus requests per poll",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="bytes_per_poll",
+        name="Modbus bytes per poll",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(
+        key="errors",
+        name="Modbus errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    SensorEntityDescription(
+        key="retries",
+        name="Modbus retries",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    SensorEntityDescription(
+        key="write_latency",
+        name="Write latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
     ),
-    #SentioSensorEntityDescription(
-    #    key="has_alarm",
-    #    name="Alarm",
-    #    value_fn=lambda unit: unit.has_alarm,
-    #    device_class=BinarySensorDeviceClass.SAFETY,
-    #),
-    #SentioSensorEntityDescription(
-    #    key="has_error",
-    #    name="Error",
-    #    value_fn=lambda unit: unit.has_error,
-    #    device_class=BinarySensorDeviceClass.PROBLEM,
-    #),
 )
-'''
-UPDATE_DELAY = timedelta(seconds=30)
 
 async def async_setup_entry(hass, entry, async_add_entities):
     _LOGGER.debug("Printing HASS Object Start")
@@ -219,93 +256,44 @@ async def async_setup_entry(hass, entry, async_add_entities):
     
     outdoor_temp=None
 
-    try:      
-        sentioApi = hass.data[SENTIO_CLIMATE_DOMAIN]
-
-        status = await sentioApi.connect()
-        if status != True: 
-            raise ConfigEntryAuthFailed("Failed to connect")
-        status = await sentioApi.initialize()
-        if status != True:
-            raise ConfigEntryAuthFailed("Failed to initialize")
-        await sentioApi.update()
+    # Connect, initialize and the first refresh are done once in __init__
+    sentioApi = hass.data[SENTIO_CLIMATE_DOMAIN][entry.entry_id]
 
-    except NoConnectionPossible as err:
-        raise ConfigEntryAuthFailed(err) from err
-
-    outdoor_temp = sentioApi.outdoorTemperature
+    controller = (DEVICE_CONTROLLER, 0)
 
     itcs =  sentioApi.getItcData()
     hccs = sentioApi.getHccData()
     boilerTanks = sentioApi.getBoilerTanks()
 
-    hcSource = sentioApi.hcSourceState
-
     rooms = sentioApi.getAvailableRooms()
 
     dataservice = WavinSentioSensorDataService(
         hass, sentioApi
     )
-    dataservice.async_setup()
     
     entities = []
 
-    if itcs != None:
-        for itc in itcs:
-            _LOGGER.debug("We have ITC Circuits {0}".format(itc))
-            entities.append(WavinItcSensor(hass, itc, dataservice, SentioSensorTypes.ITC_STATE))
-            entities.append(WavinItcSensor(hass, itc, dataservice, SentioSensorTypes.ITC_PUMPSTATE))
-            entities.append(WavinItcSensor(hass, itc, dataservice, SentioSensorTypes.ITC_INLETTEMP))
-            entities.append(WavinItcSensor(hass, itc, dataservice, SentioSensorTypes.ITC_INLETDESIRED))
-            entities.append(WavinItcSensor(hass, itc, dataservice, SentioSensorTypes.ITC_RETURNTEMP))
-            entities.append(WavinItcSensor(hass, itc, dataservice, SentioSensorTypes.ITC_SUPPLIERTEMP))
-    else:
-        _LOGGER.debug("We have NO ITC Circuits")
-    
-    if boilerTanks != None:
-        for boilerTank in boilerTanks:
-            _LOGGER.debug("We have Boiler Tank {0}".format(boilerTank))
-            entities.append(WavinBoilerTankSensor(hass, boilerTank, dataservice, SentioSensorTypes.BOILERTANK_SETPOINT))
-            entities.append(WavinBoilerTankSensor(hass, boilerTank, dataservice, SentioSensorTypes.BOILERTANK_ACTUALTEMP)) 
-    
-    if hccs != None:
-        for hcc in hccs:
-            _LOGGER.debug("We have HCC Circuits {0}".format(hcc))
-            entities.append(WavinHccSensor(hass, hcc, dataservice, SentioSensorTypes.HCC_STATE))
-            entities.append(WavinHccSensor(hass, hcc, dataservice, SentioSensorTypes.HCC_PUMPSTATE))
-            entities.append(WavinHccSensor(hass, hcc, dataservice, SentioSensorTypes.HCC_INLETTEMP))
-            entities.append(WavinHccSensor(hass, hcc, dataservice, SentioSensorTypes.HCC_INLETDESIRED))
-            entities.append(WavinHccSensor(hass, hcc, dataservice, SentioSensorTypes.HCC_RETURNTEMP))
-            entities.append(WavinHccSensor(hass, hcc, dataservice, SentioSensorTypes.HCC_SUPPLIERTEMP))
-    else:
-        _LOGGER.debug("We have NO HCC Circuits")
-    
-    if rooms != None:
-        for room in rooms:
-            _LOGGER.debug("We found a Room {0}".format(room))
-            if room.getRoomRelativeHumidity() != None:
-                entities.append(WavinSentioRoomSensor(room, dataservice, SentioSensorTypes.ROOM_HUMIDITY))
-            if room.GetFloorTemp() != None:
-                entities.append(WavinSentioRoomSensor(room, dataservice, SentioSensorTypes.ROOM_FLOORTEMP))
-            if room.getRoomCalculatedDewPoint() != None:
-                entities.append(WavinSentioRoomSensor(room, dataservice, SentioSensorTypes.ROOM_CALCULATED_DEWPOINT))
-            if room.getRoomCO2Level() != None:
-                entities.append(WavinSentioRoomSensor(room, dataservice, SentioSensorTypes.ROOM_CO2_LEVEL))
-
-    for index in range(SentioThermistor.THERMISTOR_START, SentioThermistor.THERMISTOR_MAX):
-        sensor = sentioApi.getTemperatureSensors(index)
-        _LOGGER.info("Found Thermistor {0} sensor {1}".format(index, sensor))
-        if sensor != None:
-            entities.append(WavinSentioThermistorTemperatureSensor(dataservice, index))
-            
-    if hcSource != None:
-        entities.append(WavinHCSourceTemperatureSensor(dataservice))
-
-    if outdoor_temp != None:
-        _LOGGER.debug("We have an outdoor temperature sensor {0}".format(outdoor_temp))
-        entities.append(WavinSentioOutdoorTemperatureSensor(dataservice))
-    else:
-        _LOGGER.debug("We have NO outdoor temperature sensor {0}".format(outdoor_temp))
+    for devices, descriptions in ((itcs, ITC_SENSORS), (hccs, HCC_SENSORS), (boilerTanks, BOILERTANK_SENSORS)):
+        for device in devices or ():
+            _LOGGER.debug("We have {0} {1}".format(descriptions[0].kind, device))
+            for description in descriptions:
+                entities.append(WavinSentioSensor(dataservice, description, device.index, device.name))
+
+    for room in rooms or ():
+        _LOGGER.debug("We found a Room {0}".format(room))
+        # Presence comes from the first poll or the cached topology, values may not be polled yet
+        for description in ROOM_SENSORS:
+            if sentioApi.isPresent((DEVICE_ROOM, room.index), description.field):
+                entities.append(WavinSentioSensor(dataservice, description, room.index, room.name))
+
+    for description in CONTROLLER_SENSORS:
+        present = sentioApi.isPresent(controller, description.field)
+        _LOGGER.debug("Controller sensor {0} present {1}".format(description.key, present))
+        if present:
+            entities.append(WavinSentioSensor(dataservice, description))
+
+    for description in METRIC_SENSORS:
+        entities.append(WavinSentioMetricSensor(dataservice, description))
 
     async_add_entities(entities)
 
@@ -316,454 +304,92 @@ class WavinSentioSensorDataService:
         """Initialize the data object."""
         self._api = api
 
-        self._outdoorTemp = None
-        self._itcData = None
-        self._hcsourceData = None
         self.hass = hass
-        self.coordinator = None
-        self._temperatureSensors = [None] * 5
-
-    @callback
-    def async_setup(self):
-        """Coordinator creation."""
-        self.coordinator = DataUpdateCoordinator(
-            self.hass,
-            _LOGGER,
-            name="WavinSentioDataService",
-            update_method=self.async_update_data,
-            update_interval=self.update_interval,
-        )
-
-    @property
-    def update_interval(self):
-        return UPDATE_DELAY
-
-    async def async_update_data(self):
-        _LOGGER.debug("Auto update self called from Sensors")
-        try:
-            await self._api.update()
-            
-            self._outdoorTemp = self._api.outdoorTemperature
-
-            self._itcData = self._api.getItcData()
-            self._hccData = self._api.getHccData()
-            self._boilerTanks = self._api.getBoilerTanks()
-
-            self._hcsourceData = self._api.hcSourceState
-            
-            for index in range(SentioThermistor.THERMISTOR_START, SentioThermistor.THERMISTOR_MAX):
-                sensor = self._api.getTemperatureSensors(index)
-                _LOGGER.debug("Obtained value for index {0} sensor {1}".format(index, sensor))
-                if sensor != None:
-                    self._temperatureSensors[index - 1] = sensor
-
-        except KeyError as ex:
-            raise UpdateFailed("Missing overview data, skipping update") from ex
-
-    def get_room(self, roomIndex):
-        return self._api.getRoom(roomIndex)
-        
-    def get_outdoorTemp(self):
-        return self._outdoorTemp
-    
-    def get_itcData(self):
-        return self._itcData
-    
-    def get_itcCircuit(self, itcIndex):
-        return self._api.getItcCircuit(itcIndex)
-    
-    def get_boilerTank(self, index):
-        return self._api.getBoilerTankByIndex(index)
-    
-    def get_hccData(self):
-        return self._hccData
-    
-    def get_boilerTankData(self):
-        return self._boilerTanks
-    
-    def get_hccCircuit(self, hccIndex):
-        return self._api.getHccCircuit(hccIndex)
-    
-    def get_HCSourceData(self):
-        return self._hcsourceData
+        self.coordinator = api.coordinator
 
     def get_serialNumber(self):
         return self._api.sentioData.serial_number
-    
-    def get_temperature_sensor(self, index):
-        return self._api.getTemperatureSensors(index)
-    
-class WavinItcSensor(SensorEntity):
-    #Representation of a generic Sensor. TODO; make classes and even more generic (ergo, remove the dirty tables)
-
-    def __init__(self, hass, itc, dataservice, sensorType:SentioSensorTypes):
-        #Initialize the sensor.
-        self._state = None
-        self._dataservice = dataservice
-        self._itcIndex = itc.index
-        self._hass = hass
-        self._sensorType = sensorType
-        self._name = "{0} {1}".format(itc.name, SENSORTYPE_TO_STRING[self._sensorType])
-        self._attr_name = self._name
-        self._attr_unique_id = "{0}_{1}".format(self._itcIndex, self._name.replace(" ", "_"))
-        self._attr_native_unit_of_measurement = SENSORTYPE_TO_SENSORUNIT[self._sensorType]
-        self._attr_device_class = SENSORTYPE_TO_DEVICECLASS[self._sensorType]
-
-        self._native_value = None
-        self._attr_native_value = None
-        if self._sensorType != SentioSensorTypes.ITC_STATE:           
-            self._attr_precision = 0.1
-            self._attr_temperature_unit = UnitOfTemperature.CELSIUS
-        
-        #self._attr_state_class = SensorStateClass.MEASUREMENT
-        self.update()
-
-
-    def update(self) -> None:
-        #Retrieve latest state.
-        local_itc = self._dataservice.get_itcCircuit(self._itcIndex)
-        if local_itc is not None:
-            if self._sensorType == SentioSensorTypes.ITC_STATE:
-                itcState = local_itc._state
-                if itcState == SentioHeatingStates.IDLE:
-                    self._attr_native_value = HVACMode.OFF
-                elif itcState == SentioHeatingStates.HEATING:
-                    self._attr_native_value = HVACMode.HEAT
-                elif itcState == SentioHeatingStates.COOLING:
-                     self._attr_native_value = HVACMode.COOL  
-            elif self._sensorType == SentioSensorTypes.ITC_PUMPSTATE:
-                pumpState = local_itc.getPumpState
-                if pumpState == PumpState.PUMP_IDLE:
-                    self._attr_native_value = "IDLE"
-                else:
-                    self._attr_native_value = "ON"
-            elif self._sensorType == SentioSensorTypes.ITC_INLETTEMP:
-                self._attr_native_value = local_itc.getInletMeasured
-            elif self._sensorType == SentioSensorTypes.ITC_INLETDESIRED:
-                self._attr_native_value = local_itc.getInletDesired
-            elif self._sensorType == SentioSensorTypes.ITC_RETURNTEMP:
-                self._attr_native_value = local_itc.getReturnTemp
-            elif self._sensorType == SentioSensorTypes.ITC_SUPPLIERTEMP:
-                self._attr_native_value = local_itc.getSupplierTemp
-            else:
-                _LOGGER.debug("Unsupported sensortype {0}".format(self._sensorType))
-        self._native_value = self._attr_native_value
-        _LOGGER.debug("Updating {0} {1}".format(self._attr_unique_id, self._attr_native_value))
-
-class WavinHccSensor(SensorEntity):
-    #Representation of a generic Sensor. TODO; make classes and even more generic (ergo, remove the dirty tables)
-
-    def __init__(self, hass, hcc, dataservice, sensorType:SentioSensorTypes):
-        #Initialize the sensor.
-        self._state = None
-        self._dataservice = dataservice
-        self._hccIndex = hcc.index
-        self._hass = hass
-        self._sensorType = sensorType
-        self._name = "{0} {1}".format(hcc.name, SENSORTYPE_TO_STRING[self._sensorType])
-        self._attr_name = self._name
-        self._attr_unique_id = "{0}_{1}".format(self._hccIndex, self._name.replace(" ", "_"))
-        self._attr_native_unit_of_measurement = SENSORTYPE_TO_SENSORUNIT[self._sensorType]
-        self._attr_device_class = SENSORTYPE_TO_DEVICECLASS[self._sensorType]
-
-        self._native_value = None
-        self._attr_native_value = None
-        if self._sensorType != SentioSensorTypes.HCC_STATE:           
-            self._attr_precision = 0.1
-            self._attr_temperature_unit = UnitOfTemperature.CELSIUS
-        
-        #self._attr_state_class = SensorStateClass.MEASUREMENT
-        self.update()
-
-    def update(self) -> None:
-        #Retrieve latest state.
-        local_hcc = self._dataservice.get_hccCircuit(self._hccIndex)
-        if local_hcc is not None:
-            if self._sensorType == SentioSensorTypes.HCC_STATE:
-                hccState = local_hcc._state
-                if hccState == SentioHeatingStates.IDLE:
-                    self._attr_native_value = HVACMode.OFF
-                elif hccState == SentioHeatingStates.HEATING:
-                    self._attr_native_value = HVACMode.HEAT
-                elif hccState == SentioHeatingStates.COOLING:
-                     self._attr_native_value = HVACMode.COOL  
-            elif self._sensorType == SentioSensorTypes.HCC_PUMPSTATE:
-                pumpState = local_hcc.getPumpState
-                if pumpState == PumpState.PUMP_IDLE:
-                    self._attr_native_value = "IDLE"
-                else:
-                    self._attr_native_value = "ON"
-            elif self._sensorType == SentioSensorTypes.HCC_INLETTEMP:
-                self._attr_native_value = local_hcc.getInletMeasured
-            elif self._sensorType == SentioSensorTypes.HCC_INLETDESIRED:
-                self._attr_native_value = local_hcc.getInletDesired
-            elif self._sensorType == SentioSensorTypes.HCC_RETURNTEMP:
-                self._attr_native_value = local_hcc.getReturnTemp
-            elif self._sensorType == SentioSensorTypes.HCC_SUPPLIERTEMP:
-                self._attr_native_value = local_hcc.getSupplierTemp
-            else:
-                _LOGGER.debug("Unsupported sensortype {0}".format(self._sensorType))
-        self._native_value = self._attr_native_value
-        _LOGGER.debug("Updating {0} {1}".format(self._attr_unique_id, self._attr_native_value))
-
-class WavinBoilerTankSensor(SensorEntity):
-    
-    def __init__(self, hass, tank, dataservice, sensorType:SentioSensorTypes):
-         #Initialize the sensor.
-        self._state = None
-        self._dataservice = dataservice
-        self._boilerIndex = tank.index
-        self._hass = hass
-        self._sensorType = sensorType
-        self._name = "{0} {1}".format(tank.name, SENSORTYPE_TO_STRING[self._sensorType])
-        self._attr_name = self._name
-        self._attr_unique_id = "{0}_{1}".format(self._boilerIndex, self._name.replace(" ", "_"))
-        self._attr_native_unit_of_measurement = SENSORTYPE_TO_SENSORUNIT[self._sensorType]
-        self._attr_device_class = SENSORTYPE_TO_DEVICECLASS[self._sensorType]
-
-        self._native_value = None
-        self._attr_native_value = None
-        if self._sensorType != SentioSensorTypes.ITC_STATE:           
-            self._attr_precision = 0.1
-            self._attr_temperature_unit = UnitOfTemperature.CELSIUS
-        
-        #self._attr_state_class = SensorStateClass.MEASUREMENT
-        self.update()
-
-
-    def update(self) -> None:
-        #Retrieve latest state.
-        tank = self._dataservice.get_boilerTank(self._boilerIndex)
-        if tank is not None:
-            if self._sensorType == SentioSensorTypes.BOILERTANK_SETPOINT:
-                self._attr_native_value = tank.getTemperatureSetpoint
-            elif self._sensorType == SentioSensorTypes.BOILERTANK_ACTUALTEMP:
-                self._attr_native_value = tank.getCurrentTemp
-            else:
-                _LOGGER.debug("Unsupported sensortype {0}".format(self._sensorType))
-        self._native_value = self._attr_native_value
-        _LOGGER.debug("Updating {0} {1}".format(self._attr_unique_id, self._attr_native_value))
-
-
-class WavinSentioOutdoorTemperatureSensor(CoordinatorEntity, SensorEntity):
-    """Representation of an Outdoor Temperature Sensor."""
-
-    def __init__(self, dataservice):
-        """Initialize the sensor."""
-        super().__init__(dataservice.coordinator)
-        self._state = None
-        self._dataservice = dataservice
-
-    @property
-    def should_poll(self):
-        """Return the polling state."""
-        return True
-
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return "Outdoor Temperature" 
-        #self._dataservice.outdoor_temp()["name"]
 
-    @property
-    def state(self):
-        """Return the state of the sensor."""
-    #    #return self._dataservice.outdoor_temp()
-
-        #return int(self._dataservice.get_outdoorTemp())
-        self._state = self._dataservice.get_outdoorTemp()
-        return self._state
-
-    @property
-    def native_value(self):
-        """Return the state."""
-        return self._dataservice.get_outdoorTemp()
-
-    @property
-    def unit_of_measurement(self) -> str:
-        """Return the unit of measurement."""
-        return UnitOfTemperature.CELSIUS
-
-    @property
-    def device_class(self):
-        return "temperature"
-
-    @property
-    def unique_id(self):
-        """Return the ID of this device."""
-        return "Invalid Serial"
-        #self._dataservice.get_outdoorTemp()["serialNumber"]
-
-    @property
-    def device_info(self):
-        temp_location = self._dataservice.get_outdoorTemp()
-        if temp_location is not None:
-            return {
-                "identifiers": {
-                    # Serial numbers are unique identifiers within a specific domain
-                    (SENTIO_CLIMATE_DOMAIN, self._dataservice.get_serialNumber())
-                },
-                "name": self._name,
-                "manufacturer": "Wavin",
-                "model": "Sentio",
-                "sw_version": self._dataservice.get_firmwareRevision(),
-            }
-        return
-    
-class WavinHCSourceTemperatureSensor(SensorEntity):
-
-    def __init__(self, dataservice):
-        #Initialize the sensor.
-        self._state = None
-        self._dataservice = dataservice
-        self._name = "HC Source"
-        self._attr_name = self._name
-        self._attr_unique_id = "Sentio-HCSource"
-
-        self._native_value = None
-        self._attr_native_value = None
-
-        #self._attr_state_class = SensorStateClass.MEASUREMENT
-        self.update()
-    
-    def update(self) -> None:       
-        state = self._dataservice.get_HCSourceData()
-        if state != None:
-            if state == SentioHeatingStates.IDLE:
-                self._attr_native_value = HVACMode.OFF
-            elif state == SentioHeatingStates.HEATING:
-                self._attr_native_value = HVACMode.HEAT
-            elif state == SentioHeatingStates.COOLING:
-                self._attr_native_value = HVACMode.COOL
-            elif state == SentioHeatingStates.BLOCKED_HEATING:
-                self._attr_native_value = "Blocked Heat"
-            elif state == SentioHeatingStates.BLOCKED_COOLING:
-                self._attr_native_value = "Blocked Cooling" 
-            else:
-                _LOGGER.error("MAIN HC Source state unknown? {0} ".format(state))
-            self._native_value = self._attr_native_value
-            _LOGGER.debug("MAIN HC Source Updating {0} {1}".format(self._attr_unique_id, self._attr_native_value))
-    
-    @property
-    def native_value(self) -> StateType:
-        """Return the state."""
-        return self._attr_native_value
-    
-class WavinSentioThermistorTemperatureSensor(CoordinatorEntity, SensorEntity):
-    """Representation of an Thermistor (T1 - T5) Temperature Sensor."""
+    def get_uniqueId(self, localId):
+        return self._api.uniqueId(localId)
+
+    def get_firmwareRevision(self):
+        return "FW {0}.{1}".format(self._api.sentioData.firmware_version_major, self._api.sentioData.firmware_version_minor)
+
+    def get_deviceInfo(self):
+        """Device of the controller itself, for sensors that belong to no room or circuit."""
+        return {
+            "identifiers": {(SENTIO_CLIMATE_DOMAIN, self.get_serialNumber())},
+            "manufacturer": "Wavin",
+            "model": "Sentio",
+            "sw_version": self.get_firmwareRevision(),
+        }
+
+    def get_metrics(self):
+        return self._api.metrics.asDict()
+
+
+class WavinSentioSensor(CoordinatorEntity, SensorEntity):
+    """Sensor for one coordinator value, as described by a SentioSensorEntityDescription.
+
+    Everything the description decides is resolved here once; an update is
+    a lookup in the coordinator snapshot and the description's value_fn.
+    """
+
+    _attr_should_poll = False
+    entity_description: SentioSensorEntityDescription
+
+    def __init__(self, dataservice, description: SentioSensorEntityDescription, index=0, deviceName=None):
+        self._deviceKey = (description.kind, index)
+        super().__init__(dataservice.coordinator, (self._deviceKey, description.field))
+        self.entity_description = description
+        self._getField = attrgetter(description.field)
+        self._valueFn = description.value_fn
+        if deviceName is None:
+            self._attr_name = description.name
+            self._attr_unique_id = dataservice.get_uniqueId(description.unique_id)
+            self._attr_device_info = dataservice.get_deviceInfo()
+        else:
+            self._attr_name = "{0} {1}".format(deviceName, description.name)
+            self._attr_unique_id = dataservice.get_uniqueId("{0}_{1}".format(index, self._attr_name.replace(" ", "_")))
+        self.updateSentioData()
 
-    def __init__(self, dataservice, index):
-        """Initialize the sensor."""
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update attributes when the coordinator updates."""
+        self.updateSentioData()
+        super()._handle_coordinator_update()
+
+    def updateSentioData(self) -> None:
+        # No snapshot yet when the entity was created from the cached topology
+        snapshot = self.coordinator.data
+        record = None if snapshot is None else snapshot.device(self._deviceKey)
+        value = None if record is None else self._getField(record)
+        if value is None:
+            self._attr_native_value = None
+        elif (native := self._valueFn(value)) is not None:
+            # A state the sensor has no value for keeps the last one
+            self._attr_native_value = native
+        # Runs for every changed sensor on every poll, formatted only when debug logging is on
+        _LOGGER.debug("Updating %s %s", self._attr_unique_id, self._attr_native_value)
+
+
+class WavinSentioMetricSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor for one poll or bus metric of the controller."""
+
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, dataservice, description: SensorEntityDescription):
+        # No context, metrics move with every poll
         super().__init__(dataservice.coordinator)
-        self._state = None
+        self.entity_description = description
         self._dataservice = dataservice
-        self._index = index
-        self._name = "Thermistor T{0}".format(self._index)
-
-    @property
-    def should_poll(self):
-        """Return the polling state."""
-        return True
-
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return self._name
-
-    @property
-    def state(self):
-        """Return the state of the sensor."""
-        self._state = self._dataservice.get_temperature_sensor(self._index)
-        return self._state
+        self._attr_name = "Sentio {0}".format(description.name)
+        self._attr_unique_id = dataservice.get_uniqueId("metric_{0}".format(description.key))
+        self._attr_device_info = dataservice.get_deviceInfo()
 
-    @property
-    def native_value(self):
-        """Return the state."""
-        return self._dataservice.get_temperature_sensor(self._index)
-
-    @property
-    def unit_of_measurement(self) -> str:
-        """Return the unit of measurement."""
-        return UnitOfTemperature.CELSIUS
-
-    @property
-    def device_class(self):
-        return "temperature"
-
-    @property
-    def device_info(self):
-        temp_location = self._dataservice.get_temperature_sensor(self._index)
-        if temp_location is not None:
-            return {
-                "identifiers": {
-                    # Serial numbers are unique identifiers within a specific domain
-                    (SENTIO_CLIMATE_DOMAIN, self._dataservice.get_serialNumber())
-                },
-                "name": self._name,
-                "manufacturer": "Wavin",
-                "model": "Sentio",
-                "sw_version": self._dataservice.get_firmwareRevision(),
-            }
-        return
-    
-class WavinSentioRoomSensor(SensorEntity):
-    """Representation of an Outdoor Temperature Sensor."""
-
-    def __init__(self, room, dataservice, sensorType:SentioSensorTypes):
-        """Initialize the sensor."""
-        #super().__init__(dataservice.coordinator)
-        #self._state = None
-        self._dataservice = dataservice
-        self._roomcode = room.index
-        self._sensorType = sensorType
-        self._name = "{0} {1}".format(room.name, SENSORTYPE_TO_STRING[self._sensorType])
-        self._attr_name = self._name
-        self._attr_unique_id = "{0}_{1}".format(self._roomcode, self._name.replace(" ", "_"))
-        self._native_value = None
-        self._attr_native_value = None
-
-        if self._sensorType == SentioSensorTypes.ROOM_HUMIDITY:
-            self._attr_native_unit_of_measurement = PERCENTAGE
-            self._attr_precision = 0
-            self._attr_device_class = SensorDeviceClass.HUMIDITY
-        elif self._sensorType == SentioSensorTypes.ROOM_CO2_LEVEL:
-            self._attr_native_unit_of_measurement = "ppm"
-            self._attr_precision = 0
-            self._attr_device_class = None
-        else:
-            self._attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
-            self._attr_precision = 0.1
-            self._attr_temperature_unit = UnitOfTemperature.CELSIUS
-            self._attr_device_class = SensorDeviceClass.TEMPERATURE
-        
-        self._attr_state_class = SensorStateClass.MEASUREMENT
-        #self.update()
-
-    @callback
-    #def _handle_coordinator_update(self) -> None:
-    #    """Update attributes when the coordinator updates."""
-    #    _LOGGER.debug("Calling coordinator update from roomsensor class ")
-    #    self.update()
-    #    super()._handle_coordinator_update()
-
-    def update(self) -> None:
-        """Retrieve latest state."""
-        temp_room = self._dataservice.get_room(self._roomcode)
-        if temp_room is not None:
-            if self._sensorType == SentioSensorTypes.ROOM_HUMIDITY:
-                self._attr_native_value = round(float(temp_room.getRoomRelativeHumidity()), 1)
-            elif self._sensorType == SentioSensorTypes.ROOM_FLOORTEMP:
-                self._attr_native_value = round(temp_room.GetFloorTemp(), 1)
-            elif self._sensorType == SentioSensorTypes.ROOM_CALCULATED_DEWPOINT:
-                self._attr_native_value = round(temp_room.getRoomCalculatedDewPoint(), 1)
-            elif self._sensorType == SentioSensorTypes.ROOM_CO2_LEVEL:
-                self._attr_native_value = int(temp_room.getRoomCO2Level())
-            else:
-                _LOGGER.debug("Unsupported sensortype {0}".format(self._sensorType))
-        self._native_value = self._attr_native_value
-        _LOGGER.debug("Updating {0} {1}".format(self._attr_unique_id, self._attr_native_value))
-    
     @property
     def native_value(self) -> StateType:
-        """Return the state."""
-        return self._attr_native_value
\ No newline at end of file
+        return self._dataservice.get_metrics()[self.entity_description.key]
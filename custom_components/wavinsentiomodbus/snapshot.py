@@ -0,0 +1,130 @@
+"""Immutable per-poll view of a controller, published as the coordinator data.
+
+The library objects are decoded in place on every poll. Entities read the
+snapshot of the last poll instead, which is never changed after it was
+built; a newer poll or readback publishes a new snapshot that shares the
+records of the devices it did not touch.
+"""
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple
+
+from .const import SENTIO_THERMISTORS
+
+
+class ControllerState(NamedTuple):
+    outdoor_temperature: Any
+    hc_source_state: Any
+    thermistor_1: Any
+    thermistor_2: Any
+    thermistor_3: Any
+    thermistor_4: Any
+    thermistor_5: Any
+
+
+class RoomState(NamedTuple):
+    setpoint: Any
+    temperature: Any
+    humidity: Any
+    floor_temperature: Any
+    dewpoint: Any
+    co2: Any
+    heating_state: Any
+    mode: Any
+
+
+class CircuitState(NamedTuple):
+    state: Any
+    pump_state: Any
+    inlet_temperature: Any
+    inlet_desired: Any
+    return_temperature: Any
+    supplier_temperature: Any
+
+
+class BoilerTankState(NamedTuple):
+    setpoint: Any
+    temperature: Any
+
+
+def controllerState(sentioData, temperatureSensors):
+    """temperatureSensors is the library's {"T1": value} of thermistors read so far."""
+    return ControllerState(
+        sentioData.outdoor_temperature,
+        sentioData.hc_source_state,
+        *(temperatureSensors.get("T{0}".format(index)) for index in SENTIO_THERMISTORS),
+    )
+
+
+def roomState(room):
+    return RoomState(
+        room.getRoomSetpoint(),
+        room.getRoomActualTemperature(),
+        room.getRoomRelativeHumidity(),
+        room.getRoomFloorTemperature(),
+        room.getRoomCalculatedDewPoint(),
+        room.getRoomCO2Level(),
+        room.getRoomHeatingState(),
+        room.getRoomMode(),
+    )
+
+
+def circuitState(circuit):
+    return CircuitState(
+        circuit._state,
+        circuit.getPumpState,
+        circuit.getInletMeasured,
+        circuit.getInletDesired,
+        circuit.getReturnTemp,
+        circuit.getSupplierTemp,
+    )
+
+
+def boilerTankState(tank):
+    return BoilerTankState(tank.getTemperatureSetpoint, tank.getCurrentTemp)
+
+
+class SentioSnapshot(NamedTuple):
+    """One record per device, keyed by (kind, index)."""
+
+    devices: Mapping
+
+    @classmethod
+    def build(cls, records):
+        return cls(MappingProxyType(dict(records)))
+
+    def device(self, deviceKey):
+        return self.devices.get(deviceKey)
+
+    def get(self, deviceKey, field):
+        record = self.devices.get(deviceKey)
+        return None if record is None else getattr(record, field)
+
+    def items(self):
+        """Flat ((deviceKey, field), value) pairs of all devices."""
+        for deviceKey, record in self.devices.items():
+            for field, value in zip(record._fields, record):
+                yield (deviceKey, field), value
+
+    def replace(self, records):
+        """A new snapshot with the given records replaced, the others are shared."""
+        devices = dict(self.devices)
+        devices.update(records)
+        return SentioSnapshot(MappingProxyType(devices))
+
+    def changedKeys(self, previous):
+        """deviceKeys and (deviceKey, field) pairs that differ from the previous snapshot."""
+        changed = set()
+        for deviceKey, record in self.devices.items():
+            before = previous.devices.get(deviceKey)
+            if before == record:
+                continue
+            changed.add(deviceKey)
+            if before is None:
+                changed.update((deviceKey, field) for field in record._fields)
+            else:
+                changed.update(
+                    (deviceKey, field)
+                    for field, value, old in zip(record._fields, record, before)
+                    if value != old
+                )
+        return changed
@@ -0,0 +1,340 @@
+import asyncio
+import collections
+import time
+
+from pymodbus.client import AsyncModbusSerialClient, AsyncModbusTcpClient
+from pymodbus.exceptions import ModbusException
+
+from WavinSentioModbus.ModbusWrapper import ModbusWrapper
+from WavinSentioModbus.SentioApi import ModbusType
+from WavinSentioModbus.SentioRegisterMap import RegisterType
+
+from .const import (
+    _LOGGER,
+    MODBUS_TIMEOUT,
+    MODBUS_ILLEGAL_DATA_ADDRESS,
+    MODBUS_RTU_CHAR_BITS,
+    MODBUS_RTU_MIN_FRAME_GAP,
+)
+
+# Serial buses shared by every transport on the same device, keyed by device path
+_serialBuses = {}
+
+
+def acquireSerialBus(device, baudrate, timeout=MODBUS_TIMEOUT):
+    """Return the bus owning the serial device, creating it for the first user."""
+    bus = _serialBuses.get(device)
+    if bus is None:
+        bus = _serialBuses[device] = SentioSerialBus(device, baudrate, timeout)
+    elif bus.baudrate != baudrate:
+        _LOGGER.warning("{0} is already opened at {1} baud, ignoring {2} baud".format(device, bus.baudrate, baudrate))
+    bus.users += 1
+    return bus
+
+
+def releaseSerialBus(bus):
+    bus.users -= 1
+    if bus.users <= 0:
+        _serialBuses.pop(bus.device, None)
+        bus.close()
+
+
+class SentioSerialBus:
+    """Owns one RS-485 port and schedules the requests of every slave on it.
+
+    Requests are queued per slave and served round robin, one frame per
+    slave in turn, so a long sweep of one controller can not starve the
+    others. Consecutive frames are separated by the RTU silent interval.
+    """
+
+    def __init__(self, device, baudrate, timeout=MODBUS_TIMEOUT):
+        self.device = device
+        self.baudrate = baudrate
+        self.users = 0
+        # Reconnecting is left to the connection manager of each controller
+        self.client = AsyncModbusSerialClient(
+            device, baudrate=baudrate, parity="E", stopbits=1, timeout=timeout, reconnect_delay=0
+        )
+        self._frameGap = max(3.5 * MODBUS_RTU_CHAR_BITS / baudrate, MODBUS_RTU_MIN_FRAME_GAP)
+        self._lastFrameEnd = 0.0
+        self._queues = collections.defaultdict(collections.deque)
+        self._ready = collections.deque()
+        self._wakeup = asyncio.Event()
+        self._worker = None
+        self._connectLock = asyncio.Lock()
+
+    @property
+    def connected(self):
+        return self.client.connected
+
+    async def connect(self):
+        async with self._connectLock:
+            if self.client.connected:
+                return True
+            return await self.client.connect()
+
+    def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        for queue in self._queues.values():
+            for _, future in queue:
+                if not future.done():
+                    future.cancel()
+        self._queues.clear()
+        self._ready.clear()
+        self.client.close()
+
+    async def submit(self, slave, request):
+        """Run request() on the bus in the slave's turn and return its result."""
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues[slave]
+        if not queue:
+            self._ready.append(slave)
+        queue.append((request, future))
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        self._wakeup.set()
+        return await future
+
+    async def _run(self):
+        while True:
+            if not self._ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            slave = self._ready.popleft()
+            queue = self._queues[slave]
+            request, future = queue.popleft()
+            if queue:
+                self._ready.append(slave)
+            if future.done():
+                # The caller gave up while queued
+                continue
+            delay = self._lastFrameEnd + self._frameGap - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                result = await request()
+            except Exception as err:  # pylint: disable=broad-except
+                if not future.done():
+                    future.set_exception(err)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._lastFrameEnd = time.monotonic()
+
+
+def toModbusType(value):
+    """Config entries may hold either the ModbusType member or its raw value."""
+    if isinstance(value, ModbusType):
+        return value
+    return ModbusType(value)
+
+
+class SentioAsyncTransport:
+    """Asyncio Modbus client (TCP or RTU) for a single Sentio controller.
+
+    RTU transports do not open the port themselves, they share the
+    SentioSerialBus of their serial device with every other slave on it.
+    """
+
+    def __init__(self, modbusType, host, port, slave, timeout=MODBUS_TIMEOUT):
+        self._modbusType = toModbusType(modbusType)
+        self._host = host
+        self._port = port
+        self._slave = slave
+        self._timeout = timeout
+        # One outstanding request at a time; the handler's operations are already serialized
+        # by its worker, this also covers the keep-alive probes of the connection manager
+        self._lock = asyncio.Lock()
+        self._bus = None
+        if self._modbusType == ModbusType.MODBUS_RTU:
+            # Serial entries store the device in CONF_HOST and the baud rate in CONF_PORT
+            self._bus = acquireSerialBus(self._host, self._port, self._timeout)
+            self.client = self._bus.client
+        else:
+            self.client = AsyncModbusTcpClient(self._host, port=self._port, timeout=self._timeout, reconnect_delay=0)
+        self.lastActivity = 0.0
+
+    @property
+    def slave(self):
+        return self._slave
+
+    @property
+    def connected(self):
+        return self.client.connected
+
+    async def connect(self):
+        try:
+            if self._bus is not None:
+                return await self._bus.connect()
+            return await self.client.connect()
+        except (ModbusException, OSError) as err:
+            _LOGGER.debug("Sentio connection to {0} failed: {1}".format(self._host, err))
+            return False
+
+    def close(self):
+        if self._bus is not None:
+            releaseSerialBus(self._bus)
+            self._bus = None
+        else:
+            self.client.close()
+
+    def reset(self):
+        """Drop a connection that stopped answering so the next connect starts clean.
+
+        On a shared serial bus a silent slave says nothing about the port,
+        which stays open for the other slaves.
+        """
+        if self._bus is None:
+            self.client.close()
+
+    async def _execute(self, request):
+        if self._bus is not None:
+            response = await self._bus.submit(self._slave, request)
+        else:
+            async with self._lock:
+                response = await request()
+        self.lastActivity = time.monotonic()
+        return response
+
+    async def readRegisters(self, regType, address, count):
+        """Return the raw register words, or None when the controller refuses the read.
+
+        Transport failures (timeouts, lost connection) raise ModbusException.
+        """
+        if regType == RegisterType.INPUT_REGISTER:
+            read = self.client.read_input_registers
+        elif regType == RegisterType.HOLDING_REGISTER:
+            read = self.client.read_holding_registers
+        else:
+            _LOGGER.warning("Read for {0} is not supported".format(regType))
+            return None
+        response = await self._execute(lambda: read(address, count=count, device_id=self._slave))
+        if response.isError():
+            _LOGGER.debug("Modbus read of {0} registers at {1} refused: {2}".format(count, address, response))
+            return None
+        return list(response.registers)
+
+    async def registersExist(self, regType, address, count):
+        """True when the registers are read, False when the controller answers they do not exist.
+
+        None for any other refusal, which says nothing about the registers.
+        """
+        if regType == RegisterType.INPUT_REGISTER:
+            read = self.client.read_input_registers
+        else:
+            read = self.client.read_holding_registers
+        response = await self._execute(lambda: read(address, count=count, device_id=self._slave))
+        if not response.isError():
+            return True
+        if getattr(response, "exception_code", None) == MODBUS_ILLEGAL_DATA_ADDRESS:
+            return False
+        return None
+
+    async def writeRegister(self, address, value):
+        try:
+            response = await self._execute(
+                lambda: self.client.write_register(address, value, device_id=self._slave)
+            )
+        except ModbusException as err:
+            _LOGGER.error("Modbus write to {0} failed: {1}".format(address, err))
+            return False
+        return not response.isError()
+
+
+class _CachedResponse:
+    def __init__(self, registers):
+        self.registers = registers
+
+    def isError(self):
+        return False
+
+
+class SentioRegisterCache(ModbusWrapper):
+    """ModbusWrapper that serves the library objects from prefetched registers.
+
+    Reads never touch the bus and writes are queued until the handler
+    flushes them through the transport, so the library code can run
+    directly on the event loop.
+    """
+
+    def __init__(self, client, device_id):
+        super().__init__(client, device_id)
+        self._values = {}
+        self._pendingWrites = []
+
+    def resolve(self, registerMapObject, subIndex=0):
+        if subIndex != 0:
+            return self._compute_address(registerMapObject, subIndex)
+        return registerMapObject.address
+
+    def store(self, regType, address, registers):
+        for offset, word in enumerate(registers):
+            self._values[(regType, address + offset)] = word
+
+    def snapshot(self, ranges):
+        """[regType, address, words] of the given ranges that are cached, in a JSON friendly form."""
+        result = []
+        for item in ranges:
+            try:
+                words = [self._values[(item.regType, item.address + offset)] for offset in range(item.count)]
+            except KeyError:
+                continue
+            result.append([item.regType.value, item.address, words])
+        return result
+
+    def restore(self, snapshot):
+        for regType, address, words in snapshot:
+            self.store(RegisterType(regType), address, words)
+
+    def words(self, regType, address, count):
+        """The cached words of a range, None when any of them is not cached."""
+        try:
+            return [self._values[(regType, address + offset)] for offset in range(count)]
+        except KeyError:
+            return None
+
+    def contains(self, regType, address, count):
+        return all((regType, address + offset) in self._values for offset in range(count))
+
+    def invalidate(self, regType, address, count):
+        for offset in range(count):
+            self._values.pop((regType, address + offset), None)
+
+    def _read_from_client(self, registerMapObject, address):
+        try:
+            registers = [
+                self._values[(registerMapObject.regType, address + offset)]
+                for offset in range(registerMapObject.count)
+            ]
+        except KeyError:
+            return None
+        return _CachedResponse(registers)
+
+    def writeRegister(self, registerMapObject, value, _subIndex=0):
+        if registerMapObject.regType != RegisterType.HOLDING_REGISTER:
+            _LOGGER.error("Cannot write to {0} registers.".format(registerMapObject.regType))
+            return -1
+        address = self.resolve(registerMapObject, _subIndex)
+        key = (RegisterType.HOLDING_REGISTER, address)
+        self._pendingWrites.append((address, value & 0xFFFF, self._values.get(key)))
+        # Keep the cache coherent with what is about to be written
+        self._values[key] = value & 0xFFFF
+        return 0
+
+    def popWrites(self):
+        """The queued (address, value, previous) writes; previous is the cached word they replaced."""
+        writes = self._pendingWrites
+        self._pendingWrites = []
+        return writes
+
+    def revert(self, writes):
+        """Put back the cached words of popped writes that never reached the controller."""
+        for address, _, previous in reversed(writes):
+            if previous is None:
+                self._values.pop((RegisterType.HOLDING_REGISTER, address), None)
+            else:
+                self._values[(RegisterType.HOLDING_REGISTER, address)] = previous
@@ -0,0 +1,113 @@
+import asyncio
+import collections
+import time
+
+from .connection import SentioConnectionUnavailable
+from .const import _LOGGER, IO_PRIORITY_BACKGROUND, IO_PRIORITY_POLL
+
+
+class SentioIoWorker:
+    """Runs the bus operations of one controller one after the other.
+
+    Polls, writes with their readback, rediscovery and rechecks are queued
+    as jobs and run by a single task, so an operation never sees the
+    register cache or the library objects halfway through another one, and
+    callers wait in the queue instead of on a lock.
+
+    Jobs run by priority (IO_PRIORITY_*), in order of submission within a
+    priority. A running job calls checkpoint() between two of its requests;
+    jobs queued with a higher priority run there, so a write does not wait
+    for a whole sweep to finish.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._queues = {priority: collections.deque() for priority in range(IO_PRIORITY_BACKGROUND + 1)}
+        self._wakeup = asyncio.Event()
+        self._worker = None
+        self._running = None
+        self._interrupted = 0.0
+        self._closed = False
+
+    @property
+    def pending(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def interrupted(self):
+        """Seconds the running job spent in checkpoint() running other jobs."""
+        return self._interrupted
+
+    async def submit(self, job, priority=IO_PRIORITY_POLL):
+        """Run job() on the worker and return its result."""
+        if self._closed:
+            raise SentioConnectionUnavailable("Controller connection closed")
+        future = asyncio.get_running_loop().create_future()
+        self._queues[priority].append((job, future))
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        self._wakeup.set()
+        return await future
+
+    async def checkpoint(self):
+        """Run the queued jobs of a higher priority than the running job; call between requests."""
+        if self._running is None or asyncio.current_task() is not self._worker:
+            return
+        while True:
+            item = self._next(self._running)
+            if item is None:
+                return
+            start = time.monotonic()
+            await self._runJob(*item)
+            self._interrupted += time.monotonic() - start
+
+    def close(self):
+        """Fail the queued jobs; a running job finishes against the closed transport."""
+        self._closed = True
+        for queue in self._queues.values():
+            while queue:
+                _, future = queue.popleft()
+                if not future.done():
+                    future.set_exception(SentioConnectionUnavailable("Controller connection closed"))
+        self._wakeup.set()
+
+    def _next(self, below=None):
+        """Pop the first job of the highest priority queued, only above priority below if given."""
+        for priority, queue in self._queues.items():
+            if below is not None and priority >= below:
+                return None
+            while queue:
+                job, future = queue.popleft()
+                # Skip callers that gave up while queued
+                if not future.done():
+                    return priority, job, future
+        return None
+
+    async def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                if self._closed:
+                    self._worker = None
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            await self._runJob(*item)
+
+    async def _runJob(self, priority, job, future):
+        interrupted = (self._running, self._interrupted)
+        self._running = priority
+        self._interrupted = 0.0
+        try:
+            result = await job()
+        except Exception as err:  # pylint: disable=broad-except
+            if not future.done():
+                future.set_exception(err)
+            else:
+                _LOGGER.debug("{0} job failed after its caller gave up: {1}".format(self._name, err))
+        else:
+            if not future.done():
+                future.set_result(result)
+        finally:
+            self._running, self._interrupted = interrupted
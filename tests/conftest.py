@@ -0,0 +1,71 @@
+"""Fixtures running the integration in a bare Home Assistant core against the simulated controller."""
+import logging
+
+import pytest
+
+from homeassistant import config_entries
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SLAVE, CONF_TYPE
+
+from WavinSentioModbus.SentioApi import ModbusType
+
+from custom_components.wavinsentiomodbus.const import DOMAIN
+
+from tools.benchmark import startHass
+from tools.sentio_simulator import SentioSimulator, SentioSimulatorServer, SimRoom
+
+SLAVE = 1
+
+
+@pytest.fixture
+def simulator():
+    """Rooms 1 and 3 (indexes 0 and 2), one ITC and thermistors T1 and T2."""
+    return SentioSimulator(
+        rooms=[SimRoom(0, floorTemperature=22.0, co2=600), SimRoom(2)],
+        itcs=1,
+        thermistors=(1, 2),
+    )
+
+
+@pytest.fixture
+async def server(simulator):
+    server = SentioSimulatorServer({SLAVE: simulator})
+    server.port = await server.startTcp()
+    yield server
+    await server.close()
+
+
+@pytest.fixture
+async def hass(tmp_path):
+    # The integration logs every poll at debug level
+    logging.getLogger("custom_components.wavinsentiomodbus").setLevel(logging.INFO)
+    hass = await startHass(str(tmp_path))
+    yield hass
+    await hass.async_stop(force=True)
+
+
+def makeEntry(port, slave=SLAVE, host="127.0.0.1", modbusType=ModbusType.MODBUS_TCPIP):
+    """A config entry as the config flow creates it; for RTU host is the serial device and port the baudrate."""
+    return config_entries.ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title="{0}:{1}".format(host, port),
+        data={CONF_TYPE: modbusType, CONF_HOST: host, CONF_PORT: port, CONF_SLAVE: slave},
+        source=config_entries.SOURCE_USER,
+    )
+
+
+@pytest.fixture
+async def entry(hass, server):
+    """A config entry for the simulated controller, set up and unloaded again after the test."""
+    entry = makeEntry(server.port)
+    await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+    assert entry.state == config_entries.ConfigEntryState.LOADED
+    yield entry
+    if entry.state == config_entries.ConfigEntryState.LOADED:
+        await hass.config_entries.async_unload(entry.entry_id)
+
+
+def handler(hass, entry):
+    return hass.data[DOMAIN][entry.entry_id]
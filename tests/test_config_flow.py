@@ -0,0 +1,69 @@
+from homeassistant import config_entries, data_entry_flow
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SLAVE, CONF_TYPE
+
+from custom_components.wavinsentiomodbus.const import (
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    DOMAIN,
+)
+
+from .conftest import SLAVE, handler
+
+
+async def startNetworkFlow(hass):
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+    assert result["step_id"] == "user"
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_TYPE: "Network"})
+    assert result["step_id"] == "setup_network"
+    return result
+
+
+async def test_network_flow_creates_an_entry_that_loads(hass, server, simulator):
+    result = await startNetworkFlow(hass)
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {CONF_HOST: "127.0.0.1", CONF_PORT: server.port, CONF_SLAVE: SLAVE}
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    entry = result["result"]
+    assert entry.state == config_entries.ConfigEntryState.LOADED
+    # The entry reuses the connection and discovery of the flow
+    assert [room.index for room in handler(hass, entry).getAvailableRooms()] == [0, 2]
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_network_flow_reports_an_unreachable_controller(hass, server):
+    result = await startNetworkFlow(hass)
+    port = server.port
+    await server.close()
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {CONF_HOST: "127.0.0.1", CONF_PORT: port, CONF_SLAVE: SLAVE}
+    )
+
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["errors"] == {"base": "connect_error"}
+    assert hass.config_entries.async_entries(DOMAIN) == []
+
+
+async def test_options_flow_stores_the_intervals(hass, entry):
+    options = {
+        CONF_FAST_SCAN_INTERVAL: 20,
+        CONF_SLOW_SCAN_INTERVAL: 600,
+        CONF_MIN_SCAN_INTERVAL: 10,
+        CONF_MAX_SCAN_INTERVAL: 120,
+    }
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(result["flow_id"], options)
+    await hass.async_block_till_done()
+
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert dict(entry.options) == options
+    # The update listener reloads the entry with the new intervals
+    assert handler(hass, entry).slowScanInterval == 600
@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import pytest
+
+from pymodbus.exceptions import ModbusException
+
+from custom_components.wavinsentiomodbus import connection
+from custom_components.wavinsentiomodbus.connection import SentioConnectionManager, SentioConnectionUnavailable
+from custom_components.wavinsentiomodbus.const import (
+    CONNECTION_STATE_CONNECTED,
+    CONNECTION_STATE_DISCONNECTED,
+    RECONNECT_BACKOFF_MAX,
+    RECONNECT_BACKOFF_MIN,
+)
+
+
+class FakeTransport:
+    """Stands in for SentioAsyncTransport; answers probes unless told to fail."""
+
+    def __init__(self):
+        self.connected = False
+        self.lastActivity = 0.0
+        self.connects = 0
+        self.probes = 0
+        self.failing = False
+
+    async def connect(self):
+        self.connects += 1
+        self.connected = not self.failing
+        return self.connected
+
+    def reset(self):
+        self.connected = False
+
+    async def readRegisters(self, regType, address, count):
+        self.probes += 1
+        if self.failing:
+            raise ModbusException("No response")
+        self.lastActivity = time.monotonic()
+        return [0] * count
+
+
+async def test_connect_probes_the_controller_and_reports_the_state():
+    transport = FakeTransport()
+    states = []
+    manager = SentioConnectionManager(transport, states.append)
+
+    await manager.ensureConnected()
+    await manager.ensureConnected()
+
+    assert (transport.connects, transport.probes) == (1, 1)
+    assert manager.state == CONNECTION_STATE_CONNECTED
+    assert states == [CONNECTION_STATE_CONNECTED]
+
+
+async def test_unreachable_controller_fails_fast_until_the_backoff_expires():
+    transport = FakeTransport()
+    transport.failing = True
+    manager = SentioConnectionManager(transport)
+
+    with pytest.raises(SentioConnectionUnavailable):
+        await manager.ensureConnected()
+    with pytest.raises(SentioConnectionUnavailable, match="next attempt"):
+        await manager.ensureConnected()
+
+    assert transport.connects == 1
+    assert manager.failures == 1
+    assert 0 < manager.retryIn <= RECONNECT_BACKOFF_MIN
+
+
+def test_backoff_doubles_with_jitter_up_to_the_maximum():
+    manager = SentioConnectionManager(FakeTransport())
+    delays = []
+    for _ in range(12):
+        manager.markFailed("timeout")
+        delays.append(manager.retryIn)
+
+    for failures, delay in enumerate(delays):
+        limit = min(RECONNECT_BACKOFF_MAX, RECONNECT_BACKOFF_MIN * 2 ** failures)
+        # Jittered into the upper half, so controllers that failed together do not retry together
+        assert limit / 2 - 0.1 <= delay <= limit
+    assert manager.state == CONNECTION_STATE_DISCONNECTED
+    assert manager.lastError == "timeout"
+
+
+async def test_success_resets_the_backoff(monkeypatch):
+    monkeypatch.setattr(connection, "RECONNECT_BACKOFF_MIN", 0)
+    transport = FakeTransport()
+    manager = SentioConnectionManager(transport)
+    manager.markFailed("timeout")
+    manager.markFailed("timeout")
+
+    await manager.ensureConnected()
+
+    assert manager.failures == 0
+    assert manager.lastError is None
+
+
+async def test_keep_alive_probes_an_idle_link_and_reconnects(hass, monkeypatch):
+    monkeypatch.setattr(connection, "KEEPALIVE_INTERVAL", 0.05)
+    monkeypatch.setattr(connection, "RECONNECT_BACKOFF_MIN", 0.05)
+    transport = FakeTransport()
+    states = []
+    manager = SentioConnectionManager(transport, states.append)
+    await manager.ensureConnected()
+    manager.start(hass)
+    try:
+        await asyncio.sleep(0.2)
+        assert transport.probes > 1
+
+        transport.failing = True
+        await asyncio.sleep(0.15)
+        assert manager.state == CONNECTION_STATE_DISCONNECTED
+
+        transport.failing = False
+        await asyncio.sleep(0.3)
+        assert manager.state == CONNECTION_STATE_CONNECTED
+    finally:
+        manager.stop()
+    assert states[:3] == [CONNECTION_STATE_CONNECTED, CONNECTION_STATE_DISCONNECTED, CONNECTION_STATE_CONNECTED]
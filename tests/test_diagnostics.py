@@ -0,0 +1,26 @@
+import json
+
+from homeassistant.components.diagnostics import REDACTED
+
+from custom_components.wavinsentiomodbus.diagnostics import async_get_config_entry_diagnostics
+
+from .conftest import handler
+
+
+async def test_diagnostics_redact_the_host_and_serial(hass, entry):
+    api = handler(hass, entry)
+    await api.coordinator.async_refresh()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    dump = json.dumps(diagnostics, default=str)
+    assert "127.0.0.1" not in dump
+    assert api.sentioData.serial_number not in dump
+    assert diagnostics["entry"]["data"]["host"] == REDACTED
+    assert diagnostics["controller"]["serial_number"] == REDACTED
+    # Everything needed to debug a slow poll stays
+    assert diagnostics["controller"]["rooms"] == {0: "Room 1", 2: "Room 3"}
+    assert diagnostics["connection"]["state"] == api.connection.state
+    assert diagnostics["metrics"]["requests_per_poll"] == len(diagnostics["last_poll_blocks"])
+    assert diagnostics["timings_ms"]["phases"]
+    assert all(block["registers"] for block in diagnostics["last_poll_blocks"])
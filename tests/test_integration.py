@@ -0,0 +1,413 @@
+"""The integration against the simulated controller in a bare Home Assistant core."""
+import asyncio
+import struct
+from datetime import timedelta
+
+import pytest
+
+from pymodbus.exceptions import ModbusException
+
+from homeassistant import config_entries
+from homeassistant.components.climate import HVACMode
+from homeassistant.helpers import entity_registry as er
+
+from WavinSentioModbus.SentioRegisterMap import SentioRegisterMap
+from WavinSentioModbus.SentioTypes import SentioRoomMode
+
+from custom_components import wavinsentiomodbus
+from custom_components.wavinsentiomodbus import SentioApiHandler
+from custom_components.wavinsentiomodbus.connection import SentioConnectionUnavailable
+from custom_components.wavinsentiomodbus.const import CONNECTION_STATE_DISCONNECTED, DEVICE_CONTROLLER, DEVICE_ROOM, DOMAIN
+from custom_components.wavinsentiomodbus.registers import PROBE_REGISTER
+
+from tools.sentio_simulator import DEVICE_STRIDE, SentioSimulator
+
+from .conftest import handler, makeEntry
+
+ROOM_1 = (DEVICE_ROOM, 0)
+ROOM_3 = (DEVICE_ROOM, 2)
+READ_HOLDING_REGISTERS = 3
+SLAVE_DEVICE_BUSY = 6
+
+
+async def poll(hass, entry):
+    await handler(hass, entry).coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+
+async def rediscover(hass):
+    await hass.services.async_call(DOMAIN, "rediscover", {}, blocking=True)
+    await hass.async_block_till_done()
+
+
+async def waitFor(condition, timeout=5):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+async def test_entities_follow_the_controller(hass, entry, simulator):
+    assert hass.states.get("climate.room_1").attributes["current_temperature"] == 20.0
+    assert hass.states.get("climate.room_3") is not None
+
+    simulator.room(0).temperature = 19.5
+    simulator.render()
+    await poll(hass, entry)
+
+    assert hass.states.get("climate.room_1").attributes["current_temperature"] == 19.5
+
+
+async def test_only_listeners_of_changed_devices_are_notified(hass, entry, simulator):
+    coordinator = handler(hass, entry).coordinator
+    calls = []
+    for context in (ROOM_1, ROOM_3, (ROOM_1, ("humidity",)), (ROOM_1, ("temperature",))):
+        entry.async_on_unload(coordinator.async_add_listener(lambda context=context: calls.append(context), context))
+
+    simulator.room(0).temperature = 19.5
+    simulator.render()
+    await poll(hass, entry)
+
+    assert calls == [ROOM_1, (ROOM_1, ("temperature",))]
+
+
+async def test_setpoint_write_reaches_the_controller(hass, entry, simulator):
+    await hass.services.async_call(
+        "climate", "set_temperature", {"entity_id": "climate.room_1", "temperature": 23.5}, blocking=True
+    )
+
+    assert simulator.room(0).setpoint == 23.5
+    # Published from the readback, without waiting for the next poll
+    assert handler(hass, entry).coordinator.data.get(ROOM_1, "setpoint") == 23.5
+    assert hass.states.get("climate.room_1").attributes["temperature"] == 23.5
+    assert handler(hass, entry).metrics.requestsPerWrite > 0
+
+
+async def test_mode_write_reaches_the_controller(hass, entry, simulator):
+    await hass.services.async_call(
+        "climate", "set_hvac_mode", {"entity_id": "climate.room_1", "hvac_mode": HVACMode.AUTO}, blocking=True
+    )
+    assert simulator.room(0).mode == SentioRoomMode.SCHEDULE.value
+    assert hass.states.get("climate.room_1").state == HVACMode.AUTO
+
+    await handler(hass, entry).setRoomMode(0, SentioRoomMode.MANUAL)
+    assert simulator.room(0).mode == SentioRoomMode.MANUAL.value
+
+
+async def test_refused_write_restores_the_cached_value(hass, entry, simulator, caplog):
+    simulator.write = lambda address, words: False
+
+    await hass.services.async_call(
+        "climate", "set_temperature", {"entity_id": "climate.room_1", "temperature": 25.0}, blocking=True
+    )
+
+    assert simulator.room(0).setpoint == 21.0
+    assert hass.states.get("climate.room_1").attributes["temperature"] == 21.0
+    assert "not accepted by the controller" in caplog.text
+
+
+async def test_write_runs_before_the_next_block_of_a_poll(hass, entry, server, simulator):
+    api = handler(hass, entry)
+    await poll(hass, entry)
+    requestsAlone = api.metrics.requestsPerPoll
+    server.latency = 0.05
+
+    served = sum(simulator.requests.values())
+    refresh = asyncio.ensure_future(api.coordinator.async_refresh())
+    while sum(simulator.requests.values()) == served:
+        await asyncio.sleep(0.01)
+    await api.setRoomMode(2, SentioRoomMode.SCHEDULE)
+
+    assert not refresh.done()
+    await refresh
+    assert simulator.room(2).mode == SentioRoomMode.SCHEDULE.value
+    # The write is not counted as part of the poll it interrupted
+    assert api.metrics.requestsPerPoll == requestsAlone
+    assert api.metrics.requestsPerWrite > 0
+
+
+async def test_disabled_entities_are_not_polled(hass, entry, simulator):
+    api = handler(hass, entry)
+    await poll(hass, entry)
+    bytesAll = api.metrics.bytesPerPoll
+
+    er.async_get(hass).async_update_entity("sensor.room_1_co2_level", disabled_by=er.RegistryEntryDisabler.USER)
+    await hass.async_block_till_done()
+    simulator.room(0).co2 = 900
+    simulator.render()
+    await poll(hass, entry)
+
+    assert api.metrics.bytesPerPoll < bytesAll
+    assert api.coordinator.data.get(ROOM_1, "co2") == 600
+
+
+async def test_removed_room_reloads_on_the_second_rediscovery(hass, entry, simulator):
+    api = handler(hass, entry)
+    simulator.rooms.pop()
+    simulator.render()
+
+    # A single miss may be the controller restarting, the room is kept
+    await rediscover(hass)
+    assert handler(hass, entry) is api
+    assert api.isPresent(ROOM_3, "temperature")
+
+    await rediscover(hass)
+    reloaded = handler(hass, entry)
+    assert reloaded is not api
+    assert [room.index for room in reloaded.getAvailableRooms()] == [0]
+
+
+def interceptNameReads(simulator, roomIndex, answer):
+    """Answer the reads that include the name of a room with answer(pdu, handle)."""
+    nameAddress = SentioRegisterMap.Room.Name.address + DEVICE_STRIDE * roomIndex
+    handle = simulator.handle
+
+    def intercept(pdu):
+        if pdu[0] == READ_HOLDING_REGISTERS:
+            address, count = struct.unpack(">HH", pdu[1:5])
+            if address <= nameAddress < address + count:
+                return answer(pdu, handle)
+        return handle(pdu)
+
+    simulator.handle = intercept
+
+
+async def test_busy_name_read_keeps_the_room(hass, entry, simulator):
+    api = handler(hass, entry)
+    interceptNameReads(simulator, ROOM_3[1], lambda pdu, handle: bytes([pdu[0] | 0x80, SLAVE_DEVICE_BUSY]))
+
+    await rediscover(hass)
+    await rediscover(hass)
+
+    assert handler(hass, entry) is api
+    assert [room.index for room in api.getAvailableRooms()] == [0, 2]
+
+
+async def test_connection_lost_during_rediscovery_counts_no_miss(hass, entry, simulator, monkeypatch):
+    api = handler(hass, entry)
+    simulator.rooms.pop()
+    simulator.render()
+
+    async def lost(regType, address, count):
+        raise ModbusException("Connection lost")
+
+    monkeypatch.setattr(api._transport, "registersExist", lost)
+    with pytest.raises(ModbusException):
+        await api.rediscover()
+
+    assert [room.index for room in api.getAvailableRooms()] == [0, 2]
+    assert api.getTopology()["missing_devices"] == []
+
+
+async def test_failed_background_reads_drop_the_connection(hass, entry, monkeypatch):
+    api = handler(hass, entry)
+    readRegisters = api._transport.readRegisters
+
+    async def timeout(regType, address, count):
+        # Only the probe of a reconnect is answered
+        if address == PROBE_REGISTER.address:
+            return await readRegisters(regType, address, count)
+        raise ModbusException("No response")
+
+    monkeypatch.setattr(api._transport, "readRegisters", timeout)
+    with pytest.raises(ModbusException):
+        await api.rediscover()
+    assert api.connectionState == CONNECTION_STATE_DISCONNECTED
+    assert api.connection.failures == 1
+
+    api.connection._nextAttempt = 0.0
+    with pytest.raises(ModbusException):
+        await api.recheckThermistors()
+    assert api.connectionState == CONNECTION_STATE_DISCONNECTED
+    assert api.connection.failures == 1
+
+
+async def test_missing_thermistors_are_not_polled_until_fitted(hass, entry, simulator):
+    api = handler(hass, entry)
+    assert api.missingThermistors() == [3, 4, 5]
+
+    simulator.thermistors[3] = 23.0
+    simulator.render()
+    await poll(hass, entry)
+    # Left to the hourly recheck, the poll does not read it
+    assert api.coordinator.data.get((DEVICE_CONTROLLER, 0), "thermistor_3") is None
+    assert hass.states.get("sensor.thermistor_t3") is None
+
+    assert await api.recheckThermistors() == [3]
+    assert api.missingThermistors() == [4, 5]
+    assert await api.recheckThermistors() == []
+
+
+async def test_fitted_thermistor_is_added_by_the_recheck(hass, server, simulator, monkeypatch):
+    monkeypatch.setattr(wavinsentiomodbus, "THERMISTOR_RECHECK_INTERVAL", timedelta(milliseconds=50))
+    entry = makeEntry(server.port)
+    await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+    api = handler(hass, entry)
+
+    simulator.thermistors[3] = 23.0
+    simulator.render()
+
+    def reloaded():
+        # The entry is briefly out of hass.data while it reloads
+        current = hass.data[DOMAIN].get(entry.entry_id)
+        return current not in (None, api) and hass.states.get("sensor.thermistor_t3") is not None
+
+    await waitFor(reloaded)
+
+    await poll(hass, entry)
+    assert hass.states.get("sensor.thermistor_t3").state == "23.0"
+    # The reload starts from the saved topology, which has the thermistor
+    assert handler(hass, entry).missingThermistors() == [4, 5]
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_unload_writes_pending_setpoints_without_a_refresh(hass, entry, simulator, monkeypatch):
+    api = handler(hass, entry)
+    refreshes = []
+
+    async def refresh():
+        refreshes.append(api.connectionState)
+
+    monkeypatch.setattr(api.coordinator, "async_request_refresh", refresh)
+    setpoint = asyncio.ensure_future(api.setRoomTemperature(0, 23.0))
+    await asyncio.sleep(0)
+    api.connection.failures = 6
+    api.connection.markFailed("timeout")
+    # The keep-alive task sleeps through the backoff, only the setpoint batch reconnects
+    api.connection._nextAttempt = 0.0
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await setpoint
+    await hass.async_block_till_done()
+
+    assert simulator.room(0).setpoint == 23.0
+    assert refreshes == []
+
+
+async def test_cached_topology_sets_up_without_the_controller(hass, entry, server):
+    entities = {state.entity_id for state in hass.states.async_all()}
+    await hass.config_entries.async_unload(entry.entry_id)
+    await server.close()
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state == config_entries.ConfigEntryState.LOADED
+    assert [room.index for room in handler(hass, entry).getAvailableRooms()] == [0, 2]
+    assert {state.entity_id for state in hass.states.async_all()} == entities
+
+
+async def test_failing_refresh_after_a_cached_start_counts_one_miss(hass, entry, simulator, monkeypatch):
+    monkeypatch.setattr(wavinsentiomodbus, "RECONNECT_BACKOFF_MIN", 0.01)
+    await hass.config_entries.async_unload(entry.entry_id)
+    simulator.rooms.pop()
+    simulator.render()
+    rediscoveries = []
+    failures = []
+    rediscover = SentioApiHandler.rediscover
+    update = SentioApiHandler.update
+
+    async def countedRediscover(self):
+        rediscoveries.append(self)
+        return await rediscover(self)
+
+    async def failingUpdate(self, wanted=None):
+        if len(failures) < 3:
+            failures.append(wanted)
+            raise SentioConnectionUnavailable("Controller busy")
+        await update(self, wanted)
+
+    monkeypatch.setattr(SentioApiHandler, "rediscover", countedRediscover)
+    monkeypatch.setattr(SentioApiHandler, "update", failingUpdate)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    api = handler(hass, entry)
+    await waitFor(lambda: api.getTopology()["missing_devices"] and api.coordinator.last_update_success)
+    await hass.async_block_till_done()
+
+    assert len(failures) == 3
+    assert rediscoveries == [api]
+    assert handler(hass, entry) is api
+    assert [room.index for room in api.getAvailableRooms()] == [0, 2]
+    assert api.getTopology()["missing_devices"] == [[DEVICE_ROOM, 2]]
+
+
+async def test_misses_counted_by_the_service_survive_a_restart(hass, entry, simulator):
+    simulator.room(0).co2 = None
+    simulator.render()
+    await rediscover(hass)
+    api = handler(hass, entry)
+    assert api.isPresent(ROOM_1, "co2")
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    restarted = handler(hass, entry)
+    # The rediscovery at startup counts the second miss and reloads without the sensor
+    await waitFor(lambda: handler(hass, entry) not in (api, restarted))
+    await hass.async_block_till_done()
+
+    assert not handler(hass, entry).isPresent(ROOM_1, "co2")
+    # Only its registry entry is left
+    assert hass.states.get("sensor.room_1_co2_level").attributes.get("restored")
+
+
+async def test_unreachable_controller_does_not_fail_the_service(hass, entry, server, simulator, caplog):
+    server.controllers[2] = SentioSimulator(rooms=1, itcs=0)
+    other = makeEntry(server.port, slave=2)
+    await hass.config_entries.async_add(other)
+    await hass.async_block_till_done()
+    connection = handler(hass, other).connection
+    connection.failures = 6
+    connection.markFailed("test")
+    simulator.rooms.pop()
+    simulator.render()
+
+    await rediscover(hass)
+
+    assert "rediscovery of {0} failed".format(other.title) in caplog.text
+    assert handler(hass, entry).getTopology()["missing_devices"] == [[DEVICE_ROOM, 2]]
+    await hass.config_entries.async_unload(other.entry_id)
+
+
+async def test_unreachable_controller_is_retried(hass, server):
+    entry = makeEntry(server.port)
+    await server.close()
+
+    await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+
+    assert entry.state == config_entries.ConfigEntryState.SETUP_RETRY
+
+
+async def setUpWithUniqueId(hass, entry, localId, uniqueId):
+    """Set the entry up again after giving the entity of localId the unique id uniqueId."""
+    registry = er.async_get(hass)
+    entityId = registry.async_get_entity_id("climate", DOMAIN, handler(hass, entry).uniqueId(localId))
+    await hass.config_entries.async_unload(entry.entry_id)
+    registry.async_update_entity(entityId, new_unique_id=uniqueId)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return registry.async_get(entityId)
+
+
+@pytest.mark.parametrize("legacy", ["Room 1_0", "Sentio-HCSource", "0_Room_1_Temperature"])
+async def test_legacy_unique_ids_are_prefixed_with_the_serial(hass, entry, legacy):
+    # The unique ids used before several controllers were supported
+    migrated = await setUpWithUniqueId(hass, entry, "Room 1_0", legacy)
+
+    assert migrated.unique_id == handler(hass, entry).uniqueId(legacy)
+
+
+async def test_prefixed_unique_ids_are_not_prefixed_again(hass, entry):
+    # Prefixed by a controller that was swapped since, or by a misread serial
+    other = "2019-00-0000-0042_Room 1_0"
+    kept = await setUpWithUniqueId(hass, entry, "Room 1_0", other)
+
+    assert kept.unique_id == other
+
+
+async def test_migrated_entity_keeps_its_entity_id(hass, entry):
+    migrated = await setUpWithUniqueId(hass, entry, "Room 1_0", "Room 1_0")
+    await poll(hass, entry)
+
+    assert migrated.entity_id == "climate.room_1"
+    assert hass.states.get("climate.room_1").attributes["current_temperature"] == 20.0
@@ -0,0 +1,67 @@
+"""Poll metrics and the diagnostic sensors that expose them."""
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.wavinsentiomodbus.const import DOMAIN
+from custom_components.wavinsentiomodbus.metrics import SentioPollMetrics
+
+from .conftest import handler
+
+
+def test_percentiles_use_the_nearest_rank_of_the_window():
+    metrics = SentioPollMetrics(window=4)
+    assert metrics.percentile(0.5) is None
+
+    for seconds in (0.5, 0.1, 0.4, 0.2, 0.3):
+        metrics.startPoll()
+        metrics.endPoll(seconds)
+
+    # The oldest poll (500 ms) left the window
+    assert metrics.percentile(0.50) == 200.0
+    assert metrics.percentile(0.95) == 400.0
+    assert metrics.lastPollDuration == 300.0
+
+
+def test_writes_during_a_poll_are_counted_apart():
+    metrics = SentioPollMetrics()
+    metrics.startPoll()
+    metrics.countRequest(16)
+    metrics.startWrite()
+    metrics.countRequest(1)
+    metrics.countRequest(2)
+    metrics.endWrite()
+    metrics.countRequest(4)
+    metrics.countError()
+    metrics.countRetry()
+    metrics.endPoll(0.25)
+
+    assert metrics.asDict() == {
+        "last_poll_duration": 250.0,
+        "poll_latency_p50": 250.0,
+        "poll_latency_p95": 250.0,
+        "requests_per_poll": 2,
+        "bytes_per_poll": 40,
+        "errors": 1,
+        "retries": 1,
+        "write_latency": None,
+        "requests_per_write": 2,
+        "bytes_per_write": 6,
+    }
+
+
+async def test_metric_sensors_are_disabled_until_enabled(hass, entry):
+    api = handler(hass, entry)
+    registry = er.async_get(hass)
+    entityId = registry.async_get_entity_id("sensor", DOMAIN, api.uniqueId("metric_requests_per_poll"))
+    assert registry.async_get(entityId).disabled_by == er.RegistryEntryDisabler.INTEGRATION
+    assert hass.states.get(entityId) is None
+
+    registry.async_update_entity(entityId, disabled_by=None)
+    await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    api = handler(hass, entry)
+    await api.coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert api.metrics.requestsPerPoll > 0
+    assert hass.states.get(entityId).state == str(api.metrics.requestsPerPoll)
+    assert hass.states.get(entityId).attributes["friendly_name"] == "Sentio Modbus requests per poll"
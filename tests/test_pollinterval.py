@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from WavinSentioModbus.SentioTypes import SentioHeatingStates
+
+from custom_components.wavinsentiomodbus.const import ADAPTIVE_BURST_POLLS, DEVICE_ROOM
+from custom_components.wavinsentiomodbus.pollinterval import SentioPollInterval
+from custom_components.wavinsentiomodbus.snapshot import RoomState, SentioSnapshot
+
+from .conftest import handler
+
+ROOM_1 = (DEVICE_ROOM, 0)
+
+
+def snapshot(setpoint=21.0, temperature=20.0, heatingState=SentioHeatingStates.IDLE):
+    return SentioSnapshot.build({ROOM_1: RoomState(setpoint, temperature, 45.0, None, None, None, heatingState, 1)})
+
+
+def intervals(pollInterval, snapshots):
+    previous = None
+    result = []
+    for current in snapshots:
+        result.append(pollInterval.next(current, previous).total_seconds())
+        previous = current
+    return result
+
+
+def test_idle_installation_doubles_the_interval_up_to_the_maximum():
+    pollInterval = SentioPollInterval(30, 10, 120)
+
+    # The first poll has nothing to compare with and keeps the base interval
+    assert intervals(pollInterval, [snapshot()] * 5) == [30, 60, 120, 120, 120]
+
+
+def test_heating_or_moving_temperatures_keep_the_base_interval():
+    pollInterval = SentioPollInterval(30, 10, 120)
+
+    heating = snapshot(heatingState=SentioHeatingStates.HEATING)
+
+    assert intervals(pollInterval, [heating, heating, heating]) == [30, 30, 30]
+    assert intervals(pollInterval, [snapshot(), snapshot(), snapshot(temperature=20.5)]) == [30, 60, 30]
+
+
+def test_switch_starts_a_burst_at_the_minimum_interval():
+    pollInterval = SentioPollInterval(30, 10, 120)
+    idle = [snapshot()] * 3
+    intervals(pollInterval, idle)
+
+    burst = intervals(pollInterval, [snapshot(), snapshot(setpoint=22.0)] + [snapshot(setpoint=22.0)] * 4)
+
+    # The poll that sees the new setpoint and the next ones, then idle doubling from the base
+    assert burst[1:] == [10] * ADAPTIVE_BURST_POLLS + [60, 120]
+
+
+def test_activity_moves_the_next_poll_forward():
+    pollInterval = SentioPollInterval(30, 10, 120)
+    intervals(pollInterval, [snapshot()] * 4)
+    assert pollInterval.current == 120
+
+    assert pollInterval.noteActivity() == timedelta(seconds=10)
+    assert intervals(pollInterval, [snapshot()] * (ADAPTIVE_BURST_POLLS + 1)) == [10] * ADAPTIVE_BURST_POLLS + [60]
+
+
+async def test_setpoint_write_shortens_the_poll_interval(hass, entry):
+    coordinator = handler(hass, entry).coordinator
+    for _ in range(3):
+        await coordinator.async_refresh()
+    assert coordinator.update_interval > timedelta(seconds=10)
+
+    await handler(hass, entry).setRoomTemperature(0, 22.5)
+
+    assert coordinator.update_interval == timedelta(seconds=10)
@@ -0,0 +1,53 @@
+from WavinSentioModbus.SentioRegisterMap import RegisterType
+
+from custom_components.wavinsentiomodbus.readplanner import ReadBlock, RegisterRange, SentioReadPlanner
+
+INPUT = RegisterType.INPUT_REGISTER
+HOLDING = RegisterType.HOLDING_REGISTER
+
+
+def test_ranges_within_the_gap_are_merged():
+    planner = SentioReadPlanner(maxCount=125, maxGap=4)
+    ranges = [RegisterRange(INPUT, 100, 2), RegisterRange(INPUT, 106, 1), RegisterRange(INPUT, 120, 1)]
+
+    blocks = planner.plan(ranges)
+
+    assert [(block.address, block.count) for block in blocks] == [(100, 7), (120, 1)]
+    assert blocks[0].parts == tuple(ranges[:2])
+
+
+def test_register_types_and_the_pdu_limit_split_blocks():
+    planner = SentioReadPlanner(maxCount=10, maxGap=4)
+    ranges = [
+        RegisterRange(INPUT, 0, 4),
+        RegisterRange(INPUT, 6, 4),
+        RegisterRange(INPUT, 10, 2),
+        RegisterRange(HOLDING, 2, 1),
+    ]
+
+    blocks = planner.plan(ranges)
+
+    assert [(block.regType, block.address, block.count) for block in blocks] == [
+        (INPUT, 0, 10),
+        (INPUT, 10, 2),
+        (HOLDING, 2, 1),
+    ]
+
+
+def test_duplicate_ranges_are_read_once():
+    planner = SentioReadPlanner()
+    item = RegisterRange(INPUT, 5, 1)
+
+    assert planner.plan([item, item]) == [ReadBlock(INPUT, 5, 1, (item,))]
+
+
+def test_broken_block_is_read_range_by_range():
+    planner = SentioReadPlanner(maxGap=4)
+    ranges = [RegisterRange(INPUT, 100, 1), RegisterRange(INPUT, 103, 1)]
+    block, = planner.plan(ranges)
+
+    planner.markBroken(block)
+
+    assert planner.plan(ranges) == [ReadBlock(INPUT, item.address, 1, (item,)) for item in ranges]
+    # Other blocks still merge
+    assert len(planner.plan([RegisterRange(INPUT, 200, 1), RegisterRange(INPUT, 201, 1)])) == 1
@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+from homeassistant import config_entries
+
+from WavinSentioModbus.SentioApi import ModbusType
+
+from custom_components.wavinsentiomodbus import transport
+from custom_components.wavinsentiomodbus.const import DEVICE_ROOM, MODBUS_RTU_CHAR_BITS
+from custom_components.wavinsentiomodbus.transport import SentioSerialBus, acquireSerialBus, releaseSerialBus
+
+from tools.sentio_simulator import SentioSimulator, SentioSimulatorServer
+
+from .conftest import handler, makeEntry
+
+DEVICE = "/dev/ttySentioTest"
+
+
+def request(order, slave, result=None):
+    async def run():
+        order.append(slave)
+        return result
+    return run
+
+
+async def test_slaves_take_turns_on_the_bus():
+    bus = SentioSerialBus(DEVICE, 19200)
+    order = []
+
+    results = await asyncio.gather(
+        *(bus.submit(1, request(order, 1, n)) for n in range(3)),
+        *(bus.submit(2, request(order, 2, n)) for n in range(2)),
+    )
+    bus.close()
+
+    # A sweep of slave 1 does not hold slave 2 back until it ends
+    assert order == [1, 2, 1, 2, 1]
+    assert results == [0, 1, 2, 0, 1]
+
+
+async def test_frames_are_separated_by_the_silent_interval():
+    baudrate = 1200
+    bus = SentioSerialBus(DEVICE, baudrate)
+    frames = []
+
+    async def frame():
+        start = time.monotonic()
+        await asyncio.sleep(0)
+        frames.append((start, time.monotonic()))
+
+    await asyncio.gather(*(bus.submit(slave, frame) for slave in (1, 2, 1)))
+    bus.close()
+
+    gap = 3.5 * MODBUS_RTU_CHAR_BITS / baudrate
+    for (_, end), (start, _) in zip(frames, frames[1:]):
+        assert start - end >= gap * 0.9
+
+
+async def test_failed_request_fails_only_its_caller():
+    bus = SentioSerialBus(DEVICE, 19200)
+    order = []
+
+    async def failing():
+        raise asyncio.TimeoutError()
+
+    results = await asyncio.gather(
+        bus.submit(1, failing), bus.submit(2, request(order, 2, "ok")), return_exceptions=True
+    )
+    bus.close()
+
+    assert isinstance(results[0], asyncio.TimeoutError)
+    assert results[1] == "ok"
+
+
+async def test_transports_on_one_device_share_the_bus():
+    first = acquireSerialBus(DEVICE, 19200)
+    second = acquireSerialBus(DEVICE, 9600)
+
+    assert first is second
+    assert first.baudrate == 19200
+    releaseSerialBus(first)
+    assert transport._serialBuses[DEVICE] is first
+    releaseSerialBus(second)
+    assert DEVICE not in transport._serialBuses
+
+
+async def test_controllers_on_one_serial_port_poll_over_the_shared_bus(hass, simulator):
+    server = SentioSimulatorServer({1: simulator, 2: SentioSimulator(rooms=1, itcs=0)})
+    device = await server.startRtuSocket()
+    entries = [makeEntry(19200, slave, host=device, modbusType=ModbusType.MODBUS_RTU) for slave in (1, 2)]
+    try:
+        for entry in entries:
+            await hass.config_entries.async_add(entry)
+        await hass.async_block_till_done()
+        assert [entry.state for entry in entries] == [config_entries.ConfigEntryState.LOADED] * 2
+        handlers = [handler(hass, entry) for entry in entries]
+        assert handlers[0]._transport.client is handlers[1]._transport.client
+        assert transport._serialBuses[device].users == 2
+
+        simulator.room(0).temperature = 18.5
+        simulator.render()
+        await asyncio.gather(*(api.coordinator.async_refresh() for api in handlers))
+
+        assert all(api.coordinator.last_update_success for api in handlers)
+        assert handlers[0].coordinator.data.get((DEVICE_ROOM, 0), "temperature") == 18.5
+        assert [room.index for room in handlers[1].getAvailableRooms()] == [0]
+    finally:
+        for entry in entries:
+            if entry.state == config_entries.ConfigEntryState.LOADED:
+                await hass.config_entries.async_unload(entry.entry_id)
+        await server.close()
+    assert device not in transport._serialBuses
@@ -0,0 +1,66 @@
+"""Debounced, coalesced setpoint writes against the simulated controller."""
+import asyncio
+import time
+
+from WavinSentioModbus.SentioRegisterMap import SentioRegisterMap
+
+from custom_components import wavinsentiomodbus
+from custom_components.wavinsentiomodbus.const import DEVICE_ROOM
+
+from tools.sentio_simulator import DEVICE_STRIDE, decodeSigned
+
+from .conftest import handler
+
+WINDOW = 0.2
+
+
+def setpointWrites(simulator, roomIndex, since=0):
+    address = SentioRegisterMap.Room.TemperatureSetpoint.address + DEVICE_STRIDE * roomIndex
+    return [decodeSigned(word) for written, word in simulator.writes[since:] if written == address]
+
+
+async def test_lone_setpoint_is_written_right_away(hass, entry, simulator, monkeypatch):
+    monkeypatch.setattr(wavinsentiomodbus, "SETPOINT_WRITE_DEBOUNCE", WINDOW)
+    start = time.monotonic()
+
+    await handler(hass, entry).setRoomTemperature(0, 22.5)
+
+    assert time.monotonic() - start < WINDOW
+    assert setpointWrites(simulator, 0) == [22.5]
+
+
+async def test_setpoints_after_a_write_are_coalesced(hass, entry, simulator, monkeypatch):
+    monkeypatch.setattr(wavinsentiomodbus, "SETPOINT_WRITE_DEBOUNCE", WINDOW)
+    api = handler(hass, entry)
+    await api.setRoomTemperature(0, 22.0)
+    written = len(simulator.writes)
+    start = time.monotonic()
+
+    await asyncio.gather(
+        api.setRoomTemperature(0, 23.0),
+        api.setRoomTemperature(2, 19.0),
+        api.setRoomTemperature(0, 24.0),
+    )
+
+    # One batch at the end of the window, with the last value per room
+    assert time.monotonic() - start >= WINDOW / 2
+    assert setpointWrites(simulator, 0, written) == [24.0]
+    assert setpointWrites(simulator, 2, written) == [19.0]
+    assert api.coordinator.data.get((DEVICE_ROOM, 0), "setpoint") == 24.0
+
+
+async def test_failed_batch_without_callers_is_logged(hass, entry, simulator, monkeypatch, caplog):
+    monkeypatch.setattr(wavinsentiomodbus, "SETPOINT_WRITE_DEBOUNCE", WINDOW)
+    api = handler(hass, entry)
+    await api.setRoomTemperature(0, 22.0)
+    api.connection.failures = 6
+    api.connection.markFailed("timeout")
+
+    caller = asyncio.ensure_future(api.setRoomTemperature(0, 25.0))
+    await asyncio.sleep(0)
+    caller.cancel()
+    await asyncio.sleep(WINDOW * 2)
+
+    assert caller.cancelled()
+    assert "Sentio setpoints could not be written" in caplog.text
+    assert setpointWrites(simulator, 0) == [22.0]
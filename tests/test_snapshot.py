@@ -0,0 +1,36 @@
+from custom_components.wavinsentiomodbus.const import DEVICE_ROOM
+from custom_components.wavinsentiomodbus.snapshot import RoomState, SentioSnapshot
+
+ROOM_1 = (DEVICE_ROOM, 0)
+ROOM_2 = (DEVICE_ROOM, 1)
+
+
+def room(setpoint=21.0, temperature=20.0):
+    return RoomState(setpoint, temperature, 45.0, None, None, None, 0, 1)
+
+
+def test_replace_shares_the_records_it_does_not_touch():
+    first = SentioSnapshot.build({ROOM_1: room(), ROOM_2: room()})
+
+    second = first.replace({ROOM_1: room(setpoint=22.0)})
+
+    assert second.get(ROOM_1, "setpoint") == 22.0
+    assert second.device(ROOM_2) is first.device(ROOM_2)
+    assert first.get(ROOM_1, "setpoint") == 21.0
+
+
+def test_changed_keys_name_the_device_and_its_changed_fields():
+    first = SentioSnapshot.build({ROOM_1: room(), ROOM_2: room()})
+
+    second = first.replace({ROOM_1: room(temperature=19.5)})
+
+    assert second.changedKeys(first) == {ROOM_1, (ROOM_1, "temperature")}
+    assert second.changedKeys(second) == set()
+
+
+def test_a_new_device_changes_all_of_its_fields():
+    first = SentioSnapshot.build({ROOM_1: room()})
+
+    second = first.replace({ROOM_2: room()})
+
+    assert second.changedKeys(first) == {ROOM_2} | {(ROOM_2, field) for field in RoomState._fields}
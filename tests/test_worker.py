@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from custom_components.wavinsentiomodbus.connection import SentioConnectionUnavailable
+from custom_components.wavinsentiomodbus.const import IO_PRIORITY_BACKGROUND, IO_PRIORITY_POLL, IO_PRIORITY_WRITE
+from custom_components.wavinsentiomodbus.worker import SentioIoWorker
+
+
+def recorder(order, name, result=None):
+    async def job():
+        order.append(name)
+        return result
+    return job
+
+
+async def test_jobs_run_by_priority_then_in_order():
+    worker = SentioIoWorker("test")
+    order = []
+    release = asyncio.Event()
+
+    async def running():
+        await release.wait()
+        order.append("running")
+
+    first = asyncio.ensure_future(worker.submit(running, IO_PRIORITY_BACKGROUND))
+    await asyncio.sleep(0)
+    queued = [
+        asyncio.ensure_future(worker.submit(recorder(order, name), priority))
+        for name, priority in (
+            ("background", IO_PRIORITY_BACKGROUND),
+            ("poll 1", IO_PRIORITY_POLL),
+            ("write", IO_PRIORITY_WRITE),
+            ("poll 2", IO_PRIORITY_POLL),
+        )
+    ]
+    await asyncio.sleep(0)
+    assert worker.pending == 4
+
+    release.set()
+    await asyncio.gather(first, *queued)
+
+    assert order == ["running", "write", "poll 1", "poll 2", "background"]
+
+
+async def test_checkpoint_runs_only_jobs_of_a_higher_priority():
+    worker = SentioIoWorker("test")
+    order = []
+    queued = []
+
+    async def sweep():
+        order.append("block 1")
+        queued.append(asyncio.ensure_future(worker.submit(recorder(order, "background"), IO_PRIORITY_BACKGROUND)))
+        queued.append(asyncio.ensure_future(worker.submit(recorder(order, "write"), IO_PRIORITY_WRITE)))
+        await asyncio.sleep(0)
+        await worker.checkpoint()
+        order.append("block 2")
+        return worker.interrupted
+
+    interrupted = await worker.submit(sweep, IO_PRIORITY_POLL)
+    await asyncio.gather(*queued)
+
+    assert order == ["block 1", "write", "block 2", "background"]
+    assert interrupted > 0
+
+
+async def test_nested_job_checkpoint_keeps_its_own_priority():
+    worker = SentioIoWorker("test")
+    order = []
+    queued = []
+
+    async def write():
+        order.append("write")
+        # Only a write could run here, the queued poll waits for the interrupted sweep
+        await worker.checkpoint()
+        return worker.interrupted
+
+    async def sweep():
+        queued.append(asyncio.ensure_future(worker.submit(write, IO_PRIORITY_WRITE)))
+        queued.append(asyncio.ensure_future(worker.submit(recorder(order, "poll"), IO_PRIORITY_POLL)))
+        await asyncio.sleep(0)
+        await worker.checkpoint()
+        order.append("rediscovery")
+
+    await worker.submit(sweep, IO_PRIORITY_BACKGROUND)
+    results = await asyncio.gather(*queued)
+
+    assert order == ["write", "poll", "rediscovery"]
+    assert results[0] == 0.0
+
+
+async def test_checkpoint_outside_the_worker_does_nothing():
+    worker = SentioIoWorker("test")
+    await worker.checkpoint()
+    assert await worker.submit(recorder([], "job", result=42)) == 42
+
+
+async def test_failed_job_raises_for_its_caller_only():
+    worker = SentioIoWorker("test")
+
+    async def failing():
+        raise SentioConnectionUnavailable("gone")
+
+    with pytest.raises(SentioConnectionUnavailable):
+        await worker.submit(failing)
+    assert await worker.submit(recorder([], "next", result="ok")) == "ok"
+
+
+async def test_close_fails_queued_jobs():
+    worker = SentioIoWorker("test")
+    release = asyncio.Event()
+    order = []
+
+    async def running():
+        await release.wait()
+        order.append("running")
+
+    first = asyncio.ensure_future(worker.submit(running))
+    await asyncio.sleep(0)
+    queued = asyncio.ensure_future(worker.submit(recorder(order, "queued")))
+    await asyncio.sleep(0)
+
+    worker.close()
+    release.set()
+    await first
+
+    with pytest.raises(SentioConnectionUnavailable):
+        await queued
+    with pytest.raises(SentioConnectionUnavailable):
+        await worker.submit(recorder(order, "late"))
+    assert order == ["running"]
@@ -0,0 +1 @@
+"""Development tools for the Wavin Sentio Modbus integration, not shipped with it."""
@@ -0,0 +1,321 @@
+"""Setup and polling benchmark of the integration against the simulated controller.
+
+Every scenario starts a bare Home Assistant core, adds one config entry per
+simulated controller (async_setup_entry with the climate and sensor
+platforms) and then runs N refresh cycles of all coordinators. Reported per
+scenario:
+
+    setup_ms            wall time until every entry and platform is set up
+    poll_p50_ms/p95_ms  latency of one refresh cycle of all coordinators
+    requests_setup      Modbus requests served during setup
+    requests_per_poll   Modbus requests served per refresh cycle
+    bytes_per_poll      register payload read per refresh cycle, two bytes per register
+    loop_blocked_ms     event loop time lost to blocking code, setup and polls
+    loop_max_lag_ms     longest single stall of the event loop
+    peak_memory_kib     peak traced Python allocations, in a separate pass
+    entities            entities registered for all entries
+
+The library handles at most 24 rooms per controller, larger installations
+are spread over several controllers (slaves) on the same TCP port or RTU bus.
+
+    python -m tools.benchmark                     # compare with the baseline
+    python -m tools.benchmark --save-baseline     # record a new baseline
+
+Only the counts gate: requests and bytes may not grow and the number of
+entities may not change, on any machine. Times and memory depend on the
+machine and its load; they are reported when they grow by more than the
+tolerance factor (plus a small absolute slack), and only fail the run with
+--strict-timings, on the machine that recorded the baseline. Each scenario
+runs --repeat times and the best time of each metric counts.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import statistics
+import sys
+import tempfile
+import termios
+import time
+import tracemalloc
+
+import serial
+from homeassistant import bootstrap, config_entries, loader
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_SLAVE, CONF_TYPE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.setup import async_setup_component
+
+from WavinSentioModbus.Defaults import Defaults
+from WavinSentioModbus.SentioApi import ModbusType
+
+from custom_components.wavinsentiomodbus.const import DOMAIN
+
+from .sentio_simulator import SentioSimulator, SentioSimulatorServer, SimRoom
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+DEFAULT_SIZES = (1, 8, 16, 64)
+DEFAULT_TRANSPORTS = ("tcp", "rtu")
+DEFAULT_POLLS = 20
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 1.5
+
+# Counts that must not grow, counts that must not change, and the absolute slack of the measured metrics
+COUNT_METRICS = ("requests_setup", "requests_per_poll", "bytes_per_poll")
+EXACT_METRICS = ("entities",)
+MEASURED_METRICS = {
+    "setup_ms": 20.0,
+    "poll_p50_ms": 2.0,
+    "poll_p95_ms": 5.0,
+    "loop_blocked_ms": 20.0,
+    "loop_max_lag_ms": 10.0,
+    "peak_memory_kib": 256.0,
+}
+
+# Stalls shorter than this are scheduling noise, not blocking
+LAG_INTERVAL = 0.005
+LAG_THRESHOLD = 0.002
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes a sleeping task, as a proxy for blocking calls."""
+
+    def __init__(self, interval=LAG_INTERVAL, threshold=LAG_THRESHOLD):
+        self._interval = interval
+        self._threshold = threshold
+        self._task = None
+        self.blocked = 0.0
+        self.maxLag = 0.0
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self._interval)
+            lag = time.perf_counter() - start - self._interval
+            if lag > self._threshold:
+                self.blocked += lag
+                self.maxLag = max(self.maxLag, lag)
+
+
+def _controllerRooms(rooms):
+    """Spread rooms evenly over as few controllers as the library allows."""
+    controllers = math.ceil(rooms / Defaults.MaxNumberOfRooms)
+    return [rooms // controllers + (1 if index < rooms % controllers else 0) for index in range(controllers)]
+
+
+def _simulator(slave, rooms):
+    return SentioSimulator(
+        rooms=[SimRoom(index, floorTemperature=22.0) for index in range(rooms)],
+        itcs=1,
+        thermistors=(1, 2),
+        serialNumber=12345678 + slave,
+    )
+
+
+def _ptyUsable(device):
+    """Whether the pseudo terminal accepts the 8E1 settings of the serial client."""
+    try:
+        port = serial.Serial(device, parity=serial.PARITY_EVEN)
+        try:
+            # Like the client, which applies the settings a second time
+            port.timeout = 0
+        finally:
+            port.close()
+    except (serial.SerialException, termios.error, OSError):
+        return False
+    return True
+
+
+async def startHass(configDir):
+    hass = HomeAssistant(configDir)
+    hass.config.skip_pip = True
+    loader.async_setup(hass)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await bootstrap.async_load_base_functionality(hass)
+    await hass.async_start()
+    await async_setup_component(hass, DOMAIN, {})
+    return hass
+
+
+async def runScenario(transport, rooms, polls, traceMemory=False):
+    controllers = {slave: _simulator(slave, count) for slave, count in enumerate(_controllerRooms(rooms), start=1)}
+    server = SentioSimulatorServer(controllers)
+    if transport == "tcp":
+        host, port, modbusType = "127.0.0.1", await server.startTcp(), ModbusType.MODBUS_TCPIP
+    else:
+        host, port, modbusType = server.startRtu(), 19200, ModbusType.MODBUS_RTU
+        if not _ptyUsable(host):
+            host = await server.startRtuSocket()
+
+    with tempfile.TemporaryDirectory() as configDir:
+        hass = await startHass(configDir)
+        try:
+            entries = [
+                config_entries.ConfigEntry(
+                    version=1,
+                    minor_version=1,
+                    domain=DOMAIN,
+                    title="{0}:{1}/{2}".format(host, port, slave),
+                    data={CONF_TYPE: modbusType, CONF_HOST: host, CONF_PORT: port, CONF_SLAVE: slave},
+                    source=config_entries.SOURCE_USER,
+                )
+                for slave in controllers
+            ]
+            result = await _measure(hass, entries, controllers, polls, traceMemory)
+            for entry in entries:
+                await hass.config_entries.async_unload(entry.entry_id)
+        finally:
+            await hass.async_stop(force=True)
+            await server.close()
+    return result
+
+
+def _served(controllers):
+    return sum(sum(simulator.requests.values()) for simulator in controllers.values())
+
+
+async def _measure(hass, entries, controllers, polls, traceMemory):
+    monitor = LoopLagMonitor()
+    if traceMemory:
+        tracemalloc.start()
+    monitor.start()
+    before = _served(controllers)
+
+    start = time.perf_counter()
+    for entry in entries:
+        await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+    setup = time.perf_counter() - start
+
+    failed = [entry.title for entry in entries if entry.state != config_entries.ConfigEntryState.LOADED]
+    if failed:
+        await monitor.stop()
+        tracemalloc.stop()
+        raise RuntimeError("Entries not set up: {0}".format(failed))
+
+    served = _served(controllers)
+    coordinators = [hass.data[DOMAIN][entry.entry_id].coordinator for entry in entries]
+    latencies = []
+    bytesPolled = 0
+    for _ in range(polls):
+        start = time.perf_counter()
+        await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+        latencies.append(time.perf_counter() - start)
+        bytesPolled += sum(coordinator.api.metrics.bytesPerPoll for coordinator in coordinators)
+    requestsPolls = _served(controllers) - served
+
+    await monitor.stop()
+    peak = None
+    if traceMemory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    failed = [coordinator.name for coordinator in coordinators if not coordinator.last_update_success]
+    if failed:
+        raise RuntimeError("Coordinators failed to poll: {0}".format(failed))
+    latencies.sort()
+    return {
+        "controllers": len(controllers),
+        "entities": len(er.async_get(hass).entities),
+        "setup_ms": round(setup * 1000, 1),
+        "poll_p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "poll_p95_ms": round(latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)] * 1000, 2),
+        "requests_setup": served - before,
+        "requests_per_poll": round(requestsPolls / polls, 1),
+        "bytes_per_poll": round(bytesPolled / polls, 1),
+        "loop_blocked_ms": round(monitor.blocked * 1000, 1),
+        "loop_max_lag_ms": round(monitor.maxLag * 1000, 1),
+        "peak_memory_kib": round(peak / 1024) if peak is not None else None,
+    }
+
+
+async def runAll(transports, sizes, polls, repeat):
+    results = {}
+    for transport in transports:
+        for rooms in sizes:
+            key = "{0}-{1}".format(transport, rooms)
+            runs = [await runScenario(transport, rooms, polls) for _ in range(repeat)]
+            # The best of a few runs is far less sensitive to other load on the machine
+            result = dict(runs[0])
+            for metric in MEASURED_METRICS:
+                if metric != "peak_memory_kib":
+                    result[metric] = min(run[metric] for run in runs)
+            # tracemalloc slows everything down, memory is measured in a pass of its own
+            result["peak_memory_kib"] = (await runScenario(transport, rooms, polls, traceMemory=True))["peak_memory_kib"]
+            results[key] = result
+            print("{0:<8} {1}".format(key, json.dumps(result)))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """(count regressions, slower measurements) of results against the baseline, as readable lines."""
+    regressions = []
+    slower = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for metric in COUNT_METRICS:
+            if metric in reference and result[metric] > reference[metric]:
+                regressions.append("{0} {1}: {2} > {3}".format(key, metric, result[metric], reference[metric]))
+        for metric in EXACT_METRICS:
+            if metric in reference and result[metric] != reference[metric]:
+                regressions.append("{0} {1}: {2} != {3}".format(key, metric, result[metric], reference[metric]))
+        for metric, slack in MEASURED_METRICS.items():
+            limit = reference[metric] * tolerance + slack
+            if result[metric] > limit:
+                slower.append("{0} {1}: {2} > {3:.1f} (baseline {4})".format(
+                    key, metric, result[metric], limit, reference[metric]))
+    return regressions, slower
+
+
+def _parseArgs(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark setup and polling against the simulated controller")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="rooms per scenario")
+    parser.add_argument("--transports", nargs="+", choices=DEFAULT_TRANSPORTS, default=list(DEFAULT_TRANSPORTS))
+    parser.add_argument("--polls", type=int, default=DEFAULT_POLLS)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per scenario, the best time counts")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--strict-timings", action="store_true", help="also fail on slower times and memory")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parseArgs(argv)
+    # The integration logs every poll at debug level
+    logging.basicConfig(level=logging.WARNING)
+    results = asyncio.run(runAll(args.transports, args.sizes, args.polls, args.repeat))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baselineFile:
+            json.dump(results, baselineFile, indent=2, sort_keys=True)
+            baselineFile.write("\n")
+        print("Baseline saved to {0}".format(args.baseline))
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline at {0}, run with --save-baseline first".format(args.baseline))
+        return 0
+    with open(args.baseline) as baselineFile:
+        regressions, slower = compare(results, json.load(baselineFile), args.tolerance)
+    for regression in regressions:
+        print("REGRESSION {0}".format(regression))
+    for line in slower:
+        print("{0} {1}".format("REGRESSION" if args.strict_timings else "SLOWER", line))
+    return 1 if regressions or (slower and args.strict_timings) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,616 @@
+"""Simulated Wavin Sentio controller for development, tests and benchmarks.
+
+Serves the register map of the WavinSentioModbus library over Modbus TCP on
+localhost and over Modbus RTU on a pseudo terminal, so SentioApiHandler, the
+coordinator and the config flow can run end to end without hardware. Rooms,
+ITC/HCC circuits, boiler tanks and thermistors are configurable; values
+evolve through a replaceable dynamics function.
+
+    python -m tools.sentio_simulator --rooms 8 --itcs 1 --tcp-port 5020
+    python -m tools.sentio_simulator --rooms 8 --rtu --baud 19200
+    python -m tools.sentio_simulator --rooms 8 --rtu-socket
+
+From code:
+
+    simulator = SentioSimulator(rooms=4, thermistors=(1, 2))
+    server = SentioSimulatorServer({1: simulator})
+    port = await server.startTcp()
+    device = server.startRtu()          # or await server.startRtuSocket()
+    ...
+    await server.close()
+"""
+import argparse
+import asyncio
+import collections
+import logging
+import math
+import os
+import struct
+import tty
+
+from WavinSentioModbus.Defaults import Defaults
+from WavinSentioModbus.SentioRegisterMap import RegisterDataType, RegisterType, SentioRegisterMap
+from WavinSentioModbus.SentioTypes import PumpState, SentioDeviceType, SentioHeatingStates, SentioRoomMode
+
+_LOGGER = logging.getLogger(__name__)
+
+# Registers of device n are at address + 100 * n, each device owns 100 addresses
+DEVICE_STRIDE = 100
+
+# Exception codes
+ILLEGAL_FUNCTION = 1
+ILLEGAL_DATA_ADDRESS = 2
+ILLEGAL_DATA_VALUE = 3
+GATEWAY_TARGET_FAILED = 11
+
+# Words the controller reports for a missing value, per data type
+_INVALID_WORDS = {
+    RegisterDataType.VAL_U1: 0xFF,
+    RegisterDataType.VAL_U2: 0xFFFF,
+    RegisterDataType.VAL_U4: 0xFFFF,
+    RegisterDataType.VAL_D2: 0x7FFF,
+    RegisterDataType.VAL_D2_FP10: 0x7FFF,
+    RegisterDataType.VAL_D2_FP100: 0x7FFF,
+}
+
+# Default dynamics, rates in degrees per hour
+HEATING_RATE = 1.5
+HEAT_LOSS = 0.02
+SWITCH_HYSTERESIS = 0.2
+FLOOR_TIME_CONSTANT = 1800
+TANK_HEATING_RATE = 12.0
+TANK_LOSS_RATE = 1.0
+TANK_HYSTERESIS = 5.0
+INLET_HEATING = 35.0
+INLET_IDLE = 20.0
+INLET_TIME_CONSTANT = 600
+
+
+def encode(register, value):
+    """Registers words of a value as the controller sends them; None is the invalid marker."""
+    dataType = register.dataType
+    if dataType == RegisterDataType.STRING:
+        raw = value.encode("utf-8")[:register.count * 2].ljust(register.count * 2, b"\0")
+        return list(struct.unpack(">{0}H".format(register.count), raw))
+    if value is None:
+        return [_INVALID_WORDS.get(dataType, 0xFFFF)] * register.count
+    if dataType == RegisterDataType.VAL_D2_FP100:
+        return [round(value * 100) & 0xFFFF]
+    if dataType == RegisterDataType.VAL_D2_FP10:
+        return [round(value * 10) & 0xFFFF]
+    if register.count == 2:
+        return [(int(value) >> 16) & 0xFFFF, int(value) & 0xFFFF]
+    return [int(value) & 0xFFFF]
+
+
+def decodeSigned(word, divider=100):
+    return (word - 0x10000 if word & 0x8000 else word) / divider
+
+
+def crc16(frame):
+    """Modbus RTU CRC, little endian on the wire."""
+    crc = 0xFFFF
+    for byte in frame:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return struct.pack("<H", crc)
+
+
+def dewPoint(temperature, humidity):
+    """Magnus approximation, as shown by the room sensors."""
+    if temperature is None or not humidity:
+        return None
+    gamma = math.log(humidity / 100) + 17.62 * temperature / (243.12 + temperature)
+    return 243.12 * gamma / (17.62 - gamma)
+
+
+def _relax(value, target, dt, timeConstant):
+    return target + (value - target) * math.exp(-dt / timeConstant)
+
+
+class SimRoom:
+    """One room; optional sensors are None when the room does not have them."""
+
+    def __init__(self, index, name=None, temperature=20.0, setpoint=21.0, floorTemperature=None, humidity=45.0, co2=None):
+        self.index = index
+        self.name = name or "Room {0}".format(index + 1)
+        self.temperature = temperature
+        self.setpoint = setpoint
+        self.floorTemperature = floorTemperature
+        self.humidity = humidity
+        self.co2 = co2
+        self.mode = SentioRoomMode.MANUAL.value
+        self.modeOverride = 0
+        # Only dummy rooms have presets, 0 keeps the library from decoding one
+        self.preset = 0
+        self.state = SentioHeatingStates.IDLE.value
+        self.blockingSource = 0
+
+
+class SimCircuit:
+    """An ITC or HCC mixing circuit."""
+
+    def __init__(self, index, name=None, inlet=INLET_IDLE, returnTemperature=INLET_IDLE, supplier=45.0):
+        self.index = index
+        self.name = name or "Circuit {0}".format(index + 1)
+        self.inlet = inlet
+        self.desiredInlet = INLET_IDLE
+        self.returnTemperature = returnTemperature
+        self.supplier = supplier
+        self.state = SentioHeatingStates.IDLE.value
+        self.pumpState = PumpState.PUMP_IDLE.value
+
+
+class SimTank:
+    """A domestic hot water tank."""
+
+    def __init__(self, index, name=None, temperature=50.0, setpoint=55.0):
+        self.index = index
+        self.name = name or "Boiler {0}".format(index + 1)
+        self.temperature = temperature
+        self.setpoint = setpoint
+        self.cleaningTemperature = 60.0
+        self.state = SentioHeatingStates.IDLE.value
+        self.circulationState = 1
+        self.sourceInlet = 60.0
+        self.sourceReturn = 40.0
+
+
+def defaultDynamics(simulator, dt):
+    """Rooms heat towards their setpoint with hysteresis and lose heat to outdoors.
+
+    Circuits follow the heat demand of the rooms, tanks reheat when they
+    cooled down by TANK_HYSTERESIS. Thermistors are left alone.
+    """
+    hours = dt / 3600
+    outdoor = simulator.outdoorTemperature if simulator.outdoorTemperature is not None else 10.0
+    for room in simulator.rooms:
+        if room.temperature < room.setpoint - SWITCH_HYSTERESIS:
+            room.state = SentioHeatingStates.HEATING.value
+        elif room.temperature >= room.setpoint:
+            room.state = SentioHeatingStates.IDLE.value
+        heating = room.state == SentioHeatingStates.HEATING.value
+        room.temperature += hours * ((HEATING_RATE if heating else 0) - HEAT_LOSS * (room.temperature - outdoor))
+        if room.floorTemperature is not None:
+            target = room.setpoint + 4 if heating else room.temperature
+            room.floorTemperature = _relax(room.floorTemperature, target, dt, FLOOR_TIME_CONSTANT)
+    demand = any(room.state == SentioHeatingStates.HEATING.value for room in simulator.rooms)
+    for circuit in simulator.itcs + simulator.hccs:
+        circuit.state = (SentioHeatingStates.HEATING if demand else SentioHeatingStates.IDLE).value
+        circuit.pumpState = (PumpState.PUMP_ON if demand else PumpState.PUMP_IDLE).value
+        circuit.desiredInlet = INLET_HEATING if demand else INLET_IDLE
+        circuit.inlet = _relax(circuit.inlet, circuit.desiredInlet, dt, INLET_TIME_CONSTANT)
+        circuit.returnTemperature = _relax(circuit.returnTemperature, circuit.inlet - (5 if demand else 0), dt, INLET_TIME_CONSTANT)
+    for tank in simulator.tanks:
+        if tank.temperature < tank.setpoint - TANK_HYSTERESIS:
+            tank.state = SentioHeatingStates.HEATING.value
+        elif tank.temperature >= tank.setpoint:
+            tank.state = SentioHeatingStates.IDLE.value
+        heating = tank.state == SentioHeatingStates.HEATING.value
+        tank.temperature += hours * ((TANK_HEATING_RATE if heating else 0) - TANK_LOSS_RATE)
+    simulator.hcSourceState = (SentioHeatingStates.HEATING if demand else SentioHeatingStates.IDLE).value
+
+
+class SentioSimulator:
+    """Register image of one controller, rendered from its device models.
+
+    Each device owns DEVICE_STRIDE addresses; reading an address of an
+    existing device that has no modelled value returns 0, reading into a
+    device that does not exist fails with ILLEGAL_DATA_ADDRESS, like the
+    real controller does for the Name registers used in detection.
+
+    dynamics(simulator, seconds) advances the models, replace it to script
+    scenarios; timeScale speeds up simulated time relative to the tick.
+    """
+
+    def __init__(self, rooms=8, itcs=1, hccs=0, tanks=0, thermistors=(1,), outdoorTemperature=8.0,
+                 serialPrefix=2021, serialNumber=12345678, firmware=(18, 2), dynamics=defaultDynamics, timeScale=1.0):
+        self.rooms = self._devices(rooms, Defaults.MaxNumberOfRooms, SimRoom)
+        self.itcs = self._devices(itcs, Defaults.MaxNumberOfItcs, SimCircuit)
+        self.hccs = self._devices(hccs, Defaults.MaxNumberOfHCCs, SimCircuit)
+        self.tanks = self._devices(tanks, Defaults.MaxNumberOfBoilerTanks, SimTank)
+        self.thermistors = {index: 20.0 + index for index in thermistors}
+        self.outdoorTemperature = outdoorTemperature
+        self.hcSourceState = SentioHeatingStates.IDLE.value
+        self.serialPrefix = serialPrefix
+        self.serialNumber = serialNumber
+        self.firmware = firmware
+        self.dynamics = dynamics
+        self.timeScale = timeScale
+        # Served requests per function code and every register written, for assertions
+        self.requests = collections.Counter()
+        self.writes = []
+        self._overrides = {}
+        self.render()
+
+    @staticmethod
+    def _devices(spec, maximum, factory):
+        devices = [factory(index) for index in range(spec)] if isinstance(spec, int) else list(spec)
+        if len(devices) > maximum:
+            raise ValueError("The controller supports at most {0} of {1}".format(maximum, factory.__name__))
+        return devices
+
+    def step(self, seconds):
+        """Advance the models by seconds of wall time and refresh the registers."""
+        self.dynamics(self, seconds * self.timeScale)
+        self.render()
+
+    def room(self, index):
+        return next(room for room in self.rooms if room.index == index)
+
+    def _put(self, register, value, index=0):
+        table = self._inputs if register.regType == RegisterType.INPUT_REGISTER else self._holdings
+        address = register.address + DEVICE_STRIDE * index
+        for offset, word in enumerate(encode(register, value)):
+            table[address + offset] = word
+
+    def _own(self, register, index=0):
+        start = register.address + DEVICE_STRIDE * index
+        self._blocks.append((start, start + DEVICE_STRIDE - 1))
+
+    def render(self):
+        """Rebuild the register image from the models."""
+        self._inputs = {}
+        self._holdings = {}
+        self._blocks = []
+        location = SentioRegisterMap.Location
+        self._blocks.append((1, DEVICE_STRIDE - 1))
+        self._put(location.DeviceType, SentioDeviceType.CCU208.value)
+        self._put(location.DeviceHwVersion, 1)
+        self._put(location.DeviceSwVersion, self.firmware[0])
+        self._put(location.DeviceSwVersionMinor, self.firmware[1])
+        self._put(location.DeviceSerialNrPrefix, self.serialPrefix)
+        self._put(location.DeviceSerialNumber, self.serialNumber)
+
+        outdoors = SentioRegisterMap.Outdoors
+        self._own(outdoors.Name)
+        self._put(outdoors.Name, "Outdoor")
+        self._put(outdoors.AirTemperature, self.outdoorTemperature)
+        self._own(SentioRegisterMap.HCSource.State)
+        self._put(SentioRegisterMap.HCSource.State, self.hcSourceState)
+
+        thermistors = SentioRegisterMap.HardwareIO.Thermistor
+        self._own(thermistors.T1)
+        for index in range(1, 6):
+            self._put(getattr(thermistors, "T{0}".format(index)), self.thermistors.get(index))
+
+        roomMap = SentioRegisterMap.Room
+        for room in self.rooms:
+            i = room.index
+            self._own(roomMap.Name, i)
+            self._put(roomMap.Name, room.name, i)
+            self._put(roomMap.DesiredTemperature, room.setpoint, i)
+            self._put(roomMap.TemperatureSetpoint, room.setpoint, i)
+            self._put(roomMap.GeneralHeatingCoolingState, room.state, i)
+            self._put(roomMap.GeneralHeatingCoolingBlockingSource, room.blockingSource, i)
+            self._put(roomMap.AirTemperature, room.temperature, i)
+            self._put(roomMap.FloorTemperature, room.floorTemperature, i)
+            self._put(roomMap.RelativeHumidity, room.humidity, i)
+            self._put(roomMap.CalculatedDewPoint, dewPoint(room.temperature, room.humidity), i)
+            self._put(roomMap.CO2Concentration, room.co2, i)
+            self._put(roomMap.Mode, room.mode, i)
+            self._put(roomMap.ModeOverride, room.modeOverride, i)
+            self._put(roomMap.TemperaturePreset, room.preset, i)
+
+        for registerMap, circuits in ((SentioRegisterMap.ITCCircuits, self.itcs), (SentioRegisterMap.HCCControllers, self.hccs)):
+            for circuit in circuits:
+                i = circuit.index
+                self._own(registerMap.Name, i)
+                self._put(registerMap.Name, circuit.name, i)
+                self._put(registerMap.State, circuit.state, i)
+                self._put(registerMap.PumpState, circuit.pumpState, i)
+                self._put(registerMap.DesiredInletTemperature, circuit.desiredInlet, i)
+                if registerMap is SentioRegisterMap.ITCCircuits:
+                    self._put(registerMap.MeasuredInletTemperature, circuit.inlet, i)
+                    self._put(registerMap.MeasuredReturnTemperature, circuit.returnTemperature, i)
+                    self._put(registerMap.MainSupplierTemperature, circuit.supplier, i)
+                else:
+                    self._put(registerMap.MeasuredTemperature, circuit.inlet, i)
+
+        tankMap = SentioRegisterMap.DHWTanks
+        for tank in self.tanks:
+            i = tank.index
+            self._own(tankMap.Name, i)
+            self._put(tankMap.Name, tank.name, i)
+            self._put(tankMap.MeasuredTemperature, tank.temperature, i)
+            self._put(tankMap.DesiredTemperature, tank.setpoint, i)
+            self._put(tankMap.TemperatureSetpoint, tank.setpoint, i)
+            self._put(tankMap.CleaningTemperature, tank.cleaningTemperature, i)
+            self._put(tankMap.State, tank.state, i)
+            self._put(tankMap.CirculationState, tank.circulationState, i)
+            self._put(tankMap.SourceInletTemperature, tank.sourceInlet, i)
+            self._put(tankMap.SourceReturnTemperature, tank.sourceReturn, i)
+
+        self._holdings.update(self._overrides)
+
+    def _owned(self, address):
+        return any(start <= address <= end for start, end in self._blocks)
+
+    def read(self, regType, address, count):
+        """Words of count registers from address, None when any of them does not exist."""
+        table = self._inputs if regType == RegisterType.INPUT_REGISTER else self._holdings
+        words = []
+        for register in range(address, address + count):
+            if register in table:
+                words.append(table[register])
+            elif self._owned(register):
+                words.append(0)
+            else:
+                return None
+        return words
+
+    def write(self, address, words):
+        """Write holding registers; False when one of them does not exist."""
+        if not all(self._owned(register) for register in range(address, address + len(words))):
+            return False
+        for offset, word in enumerate(words):
+            self.writes.append((address + offset, word))
+            if not self._apply(address + offset, word):
+                self._overrides[address + offset] = word
+        self.render()
+        return True
+
+    def _apply(self, address, word):
+        """Feed a write into the models; False for registers that are not modelled."""
+        roomMap = SentioRegisterMap.Room
+        for room in self.rooms:
+            offset = address - DEVICE_STRIDE * room.index
+            if offset == roomMap.TemperatureSetpoint.address:
+                room.setpoint = decodeSigned(word)
+            elif offset == roomMap.Mode.address:
+                room.mode = word
+            elif offset == roomMap.ModeOverride.address:
+                room.modeOverride = word
+            elif offset == roomMap.TemperaturePreset.address:
+                room.preset = word
+            else:
+                continue
+            return True
+        tankMap = SentioRegisterMap.DHWTanks
+        for tank in self.tanks:
+            offset = address - DEVICE_STRIDE * tank.index
+            if offset == tankMap.TemperatureSetpoint.address:
+                tank.setpoint = decodeSigned(word)
+            elif offset == tankMap.CleaningTemperature.address:
+                tank.cleaningTemperature = decodeSigned(word)
+            else:
+                continue
+            return True
+        return False
+
+    def handle(self, pdu):
+        """Answer one request PDU with a response PDU."""
+        function = pdu[0]
+        self.requests[function] += 1
+        try:
+            if function in (3, 4):
+                address, count = struct.unpack(">HH", pdu[1:5])
+                if not 1 <= count <= 125:
+                    return bytes([function | 0x80, ILLEGAL_DATA_VALUE])
+                regType = RegisterType.HOLDING_REGISTER if function == 3 else RegisterType.INPUT_REGISTER
+                words = self.read(regType, address, count)
+                if words is None:
+                    return bytes([function | 0x80, ILLEGAL_DATA_ADDRESS])
+                return bytes([function, 2 * count]) + struct.pack(">{0}H".format(count), *words)
+            if function == 6:
+                address, value = struct.unpack(">HH", pdu[1:5])
+                if not self.write(address, [value]):
+                    return bytes([function | 0x80, ILLEGAL_DATA_ADDRESS])
+                return bytes(pdu[:5])
+            if function == 16:
+                address, count, size = struct.unpack(">HHB", pdu[1:6])
+                if size != 2 * count or len(pdu) < 6 + size:
+                    return bytes([function | 0x80, ILLEGAL_DATA_VALUE])
+                if not self.write(address, list(struct.unpack(">{0}H".format(count), pdu[6:6 + size]))):
+                    return bytes([function | 0x80, ILLEGAL_DATA_ADDRESS])
+                return bytes(pdu[:5])
+        except struct.error:
+            return bytes([function | 0x80, ILLEGAL_DATA_VALUE])
+        return bytes([function | 0x80, ILLEGAL_FUNCTION])
+
+
+class SentioSimulatorServer:
+    """Serve {slave: SentioSimulator} over Modbus TCP and/or RTU on a pseudo terminal.
+
+    latency delays every response to mimic the controller; with baudrate
+    set, RTU responses are also delayed by the time both frames would
+    take on the wire.
+    """
+
+    def __init__(self, controllers, latency=0.0, baudrate=None):
+        self.controllers = controllers
+        self.latency = latency
+        self.baudrate = baudrate
+        self._server = None
+        self._connections = set()
+        self._tasks = set()
+        self._ptyMaster = None
+        self._ptySlave = None
+        self._ptyBuffer = bytearray()
+        self._rtuServer = None
+        self._ticker = None
+
+    async def _respond(self, slave, pdu, wireBytes=0):
+        simulator = self.controllers.get(slave)
+        if simulator is None:
+            return None
+        response = simulator.handle(pdu)
+        delay = self.latency
+        if self.baudrate:
+            delay += (wireBytes + len(response) + 3) * 11 / self.baudrate
+        if delay:
+            await asyncio.sleep(delay)
+        return response
+
+    async def startTcp(self, host="127.0.0.1", port=0):
+        """Listen for Modbus TCP; returns the bound port (pick a free one with 0)."""
+        self._server = await asyncio.start_server(self._serveTcp, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def _serveTcp(self, reader, writer):
+        self._connections.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(7)
+                transaction, protocol, length, unit = struct.unpack(">HHHB", header)
+                pdu = await reader.readexactly(length - 1)
+                response = await self._respond(unit, pdu)
+                if response is None:
+                    response = bytes([pdu[0] | 0x80, GATEWAY_TARGET_FAILED])
+                writer.write(struct.pack(">HHHB", transaction, protocol, len(response) + 1, unit) + response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    def startRtu(self):
+        """Open a pseudo terminal serving RTU; returns the device path for the client."""
+        self._ptyMaster, self._ptySlave = os.openpty()
+        tty.setraw(self._ptyMaster)
+        tty.setraw(self._ptySlave)
+        os.set_blocking(self._ptyMaster, False)
+        asyncio.get_running_loop().add_reader(self._ptyMaster, self._readPty)
+        return os.ttyname(self._ptySlave)
+
+    async def startRtuSocket(self, host="127.0.0.1", port=0):
+        """Serve RTU frames on a TCP socket; returns a pyserial socket:// URL for the client.
+
+        For hosts whose pseudo terminals refuse the 8E1 line settings of the
+        serial client; the framing is the same as on the pseudo terminal.
+        """
+        self._rtuServer = await asyncio.start_server(self._serveRtuSocket, host, port)
+        return "socket://{0}:{1}".format(host, self._rtuServer.sockets[0].getsockname()[1])
+
+    def _readPty(self):
+        try:
+            data = os.read(self._ptyMaster, 4096)
+        except BlockingIOError:
+            return
+        self._ptyBuffer += data
+        self._dispatchRtu(self._ptyBuffer, self._writePty)
+
+    def _writePty(self, frame):
+        if self._ptyMaster is not None:
+            os.write(self._ptyMaster, frame)
+
+    async def _serveRtuSocket(self, reader, writer):
+        self._connections.add(writer)
+        buffer = bytearray()
+        try:
+            while data := await reader.read(4096):
+                buffer += data
+                self._dispatchRtu(buffer, writer.write)
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    def _dispatchRtu(self, buffer, send):
+        """Answer every complete request frame in buffer, leaving a partial one."""
+        while len(buffer) >= 4:
+            function = buffer[1]
+            if function in (3, 4, 6):
+                size = 8
+            elif function == 16:
+                if len(buffer) < 7:
+                    return
+                size = 9 + buffer[6]
+            else:
+                # Not a request this simulator understands, resynchronise on the next burst
+                buffer.clear()
+                return
+            if len(buffer) < size:
+                return
+            frame = bytes(buffer[:size])
+            del buffer[:size]
+            if crc16(frame[:-2]) != frame[-2:]:
+                _LOGGER.debug("Dropping RTU frame with bad CRC: {0}".format(frame.hex()))
+                buffer.clear()
+                return
+            task = asyncio.ensure_future(self._answerRtu(frame[0], frame[1:-2], size, send))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _answerRtu(self, slave, pdu, size, send):
+        # Other slaves on a shared bus stay silent
+        response = await self._respond(slave, pdu, size)
+        if response is not None:
+            frame = bytes([slave]) + response
+            send(frame + crc16(frame))
+
+    def startDynamics(self, tick=1.0):
+        """Advance every controller by tick seconds, every tick seconds."""
+        async def run():
+            while True:
+                await asyncio.sleep(tick)
+                for simulator in self.controllers.values():
+                    simulator.step(tick)
+        self._ticker = asyncio.ensure_future(run())
+
+    async def close(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        for writer in list(self._connections):
+            writer.close()
+        for server in (self._server, self._rtuServer):
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+        self._server = self._rtuServer = None
+        if self._ptyMaster is not None:
+            asyncio.get_running_loop().remove_reader(self._ptyMaster)
+            os.close(self._ptyMaster)
+            os.close(self._ptySlave)
+            self._ptyMaster = self._ptySlave = None
+
+
+def _parseArgs(argv=None):
+    parser = argparse.ArgumentParser(description="Simulated Wavin Sentio controller")
+    parser.add_argument("--rooms", type=int, default=8)
+    parser.add_argument("--itcs", type=int, default=1)
+    parser.add_argument("--hccs", type=int, default=0)
+    parser.add_argument("--tanks", type=int, default=0)
+    parser.add_argument("--thermistors", type=int, nargs="*", default=[1], help="present thermistors, 1 to 5")
+    parser.add_argument("--slave", type=int, default=1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--tcp-port", type=int, default=5020, help="0 picks a free port, -1 disables TCP")
+    parser.add_argument("--rtu", action="store_true", help="also serve RTU on a pseudo terminal")
+    parser.add_argument("--rtu-socket", action="store_true", help="also serve RTU on a socket:// URL")
+    parser.add_argument("--baud", type=int, default=None, help="emulate the RTU wire time at this baud rate")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--tick", type=float, default=1.0, help="seconds between dynamics steps")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="simulated seconds per real second")
+    return parser.parse_args(argv)
+
+
+async def _main(args):
+    simulator = SentioSimulator(
+        rooms=args.rooms, itcs=args.itcs, hccs=args.hccs, tanks=args.tanks,
+        thermistors=args.thermistors, timeScale=args.time_scale,
+    )
+    server = SentioSimulatorServer({args.slave: simulator}, latency=args.latency, baudrate=args.baud)
+    if args.tcp_port >= 0:
+        port = await server.startTcp(args.host, args.tcp_port)
+        print("Modbus TCP on {0}:{1}, slave {2}".format(args.host, port, args.slave))
+    if args.rtu:
+        print("Modbus RTU on {0}, slave {1}".format(server.startRtu(), args.slave))
+    if args.rtu_socket:
+        print("Modbus RTU on {0}, slave {1}".format(await server.startRtuSocket(args.host), args.slave))
+    server.startDynamics(args.tick)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(_main(_parseArgs()))
+    except KeyboardInterrupt:
+        pass